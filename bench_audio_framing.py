@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Benchmark: base64-in-JSON audio messages vs binary PCM frames, per second of audio
+
+    python bench_audio_framing.py
+
+Murf messages are synthesized as Murf sends them: JSON with a base64 WAV
+chunk (header on the first chunk only) at 44.1 kHz, 16-bit mono, 100 ms each.
+
+- json:   server re-wraps each chunk as {"type": "murf_audio_chunk", "audio": ...} text
+- binary: server decodes, strips the WAV header and sends header + raw PCM bytes
+
+Server CPU covers the work from Murf's message to the outbound payload;
+the browser additionally saves atob() and per-chunk WAV parsing in binary mode.
+
+The last section converts headerless 24 kHz PCM to a 22.05 kHz float32
+client (the worst case: no Murf rate matches) with PcmConverter versus a
+per-sample Python loop.
+"""
+
+import base64
+import json
+import os
+import struct
+import time
+
+import main
+
+SAMPLE_RATE, CHANNELS, BITS = main.DEFAULT_PCM_FORMAT
+CHUNK_SECONDS = 0.1
+AUDIO_SECONDS = 60
+
+
+def wav_header(data_len: int) -> bytes:
+    block_align = CHANNELS * BITS // 8
+    fmt = struct.pack("<HHIIHH", 1, CHANNELS, SAMPLE_RATE, SAMPLE_RATE * block_align, block_align, BITS)
+    return (b"RIFF" + struct.pack("<I", 36 + data_len) + b"WAVE" + b"fmt " + struct.pack("<I", 16) + fmt
+            + b"data" + struct.pack("<I", data_len))
+
+
+def murf_messages() -> list[str]:
+    chunk_bytes = int(SAMPLE_RATE * CHUNK_SECONDS) * CHANNELS * BITS // 8
+    messages = []
+    for i in range(int(AUDIO_SECONDS / CHUNK_SECONDS)):
+        pcm = os.urandom(chunk_bytes)
+        payload = wav_header(chunk_bytes) + pcm if i == 0 else pcm
+        messages.append(json.dumps({"audio": base64.b64encode(payload).decode(), "context_id": "ctx"}))
+    return messages
+
+
+def json_path(message: str) -> str:
+    data = json.loads(message)
+    return json.dumps({"type": "murf_audio_chunk", "audio": data["audio"]})
+
+
+def binary_path(message: str, state: dict) -> bytes:
+    data = json.loads(message)
+    fmt, pcm = main.parse_wav_chunk(base64.b64decode(data["audio"]))
+    state["format"] = fmt or state["format"]
+    return main.encode_audio_frame(pcm, state["format"])
+
+
+def measure(name: str, messages: list[str], convert) -> None:
+    start = time.process_time()
+    wire = sum(len(out.encode() if isinstance(out, str) else out) for out in map(convert, messages))
+    cpu = time.process_time() - start
+    print(f"  {name:<7}: {wire / AUDIO_SECONDS / 1024:8.1f} KiB/s on the wire   "
+          f"{cpu / AUDIO_SECONDS * 1e6:7.1f} us server CPU per audio second")
+
+
+def python_resample(pcm: bytes, source_rate: int, target_rate: int) -> bytes:
+    samples = struct.unpack(f"<{len(pcm) // 2}h", pcm)
+    step, out, position = source_rate / target_rate, [], 0.0
+    while position < len(samples) - 1:
+        i = int(position)
+        frac = position - i
+        out.append((samples[i] * (1 - frac) + samples[i + 1] * frac) / 32768.0)
+        position += step
+    return struct.pack(f"<{len(out)}f", *out)
+
+
+def measure_resampling():
+    chunk = os.urandom(int(24000 * CHUNK_SECONDS) * 2)
+    chunks = int(10 / CHUNK_SECONDS)
+    print("\nResampling 24000 Hz int16 -> 22050 Hz float32, 10 s of audio")
+    converter = main.PcmConverter(24000, 22050)
+    for name, convert in (("numpy", converter.convert), ("python", lambda c: python_resample(c, 24000, 22050))):
+        start = time.process_time()
+        for _ in range(chunks):
+            convert(chunk)
+        print(f"  {name:<7}: {(time.process_time() - start) / 10 * 1e6:9.1f} us server CPU per audio second")
+
+
+def run():
+    messages = murf_messages()
+    pcm_rate = SAMPLE_RATE * CHANNELS * BITS // 8 / 1024
+    print(f"{AUDIO_SECONDS} s of {SAMPLE_RATE} Hz {BITS}-bit audio in {len(messages)} chunks "
+          f"(raw PCM {pcm_rate:.1f} KiB/s)")
+    measure("json", messages, json_path)
+    state = {"format": main.DEFAULT_PCM_FORMAT}
+    measure("binary", messages, lambda m: binary_path(m, state))
+    measure_resampling()
+
+
+if __name__ == "__main__":
+    run()
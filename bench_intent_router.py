@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Benchmark: compiled intent router vs the legacy is_weather_query / is_web_query pair
+
+    python bench_intent_router.py
+
+Runs every query in CORPUS through both implementations, reports any
+classification differences and the per-turn routing cost, then shows how
+routing cost scales as more keyword skills are registered.
+"""
+
+import random
+import string
+import time
+
+from main import Intent, IntentRouter, intent_router
+from testkit import CORPUS, legacy_route
+
+def router_route(text: str) -> tuple[Intent, str | None]:
+    route = intent_router.route(text)
+    city = route.slots.get("city")
+    # The router keeps commas in the slot for split_city_names; legacy dropped them
+    return route.intent, city.replace(",", "") if city else city
+
+
+def per_turn_us(fn, rounds: int = 200) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for query in CORPUS:
+            fn(query)
+    return (time.perf_counter() - start) / (rounds * len(CORPUS)) * 1e6
+
+
+def scaling(skill_counts=(2, 10, 50, 200), keywords_per_skill=15):
+    """Per-turn cost of one compiled scan vs a linear keyword scan per skill, as skills are added."""
+    rng = random.Random(0)
+    print(f"\nScaling ({keywords_per_skill} keywords per synthetic skill)")
+    for count in skill_counts:
+        skills = [["".join(rng.choices(string.ascii_lowercase, k=rng.randint(5, 10)))
+                   for _ in range(keywords_per_skill)] for _ in range(count)]
+        router = IntentRouter()
+        for keywords in skills:
+            router.register(Intent.WEB_SEARCH, keywords)
+
+        def linear(text, skills=skills):
+            t = text.lower()
+            for keywords in skills:
+                if any(k in t for k in keywords):
+                    return True
+            return False
+
+        linear_us = per_turn_us(linear, rounds=50)
+        router_us = per_turn_us(router.route, rounds=50)
+        print(f"  {count:>4} skills: linear {linear_us:8.1f} us/turn   compiled {router_us:6.1f} us/turn")
+
+
+def main():
+    differences = [(q, legacy_route(q), router_route(q)) for q in CORPUS if legacy_route(q) != router_route(q)]
+    for query, old, new in differences:
+        print(f"DIFF {query!r}: legacy={old} router={new}")
+    print(f"{len(CORPUS)} queries, {len(differences)} classification differences\n")
+
+    legacy_us = per_turn_us(legacy_route)
+    router_us = per_turn_us(router_route)
+    print(f"legacy is_weather_query + is_web_query : {legacy_us:6.1f} us/turn")
+    print(f"compiled intent router                 : {router_us:6.1f} us/turn")
+    print(f"speedup                                : {legacy_us / router_us:6.1f}x")
+    scaling()
+
+
+if __name__ == "__main__":
+    main()
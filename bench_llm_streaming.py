@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Benchmark: thread-per-response Gemini streaming vs native async streaming
+
+    python bench_llm_streaming.py
+
+A fake model emits 20 chunks 50 ms apart (about one second per reply) for N
+concurrent talkers.
+
+- legacy: the blocking stream runs in an executor shaped like the default one
+          (as asyncio.to_thread(stream_sync) did), so each live reply holds a thread
+- async:  AudioStreamer.stream_llm_response iterates generate_content_async
+
+Once talkers outnumber the executor's workers (min(32, cpus + 4)), legacy
+replies queue for a thread and time to first token climbs.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import main
+from testkit import FakeChunk
+
+CHUNKS = 20
+CHUNK_INTERVAL = 0.05
+TALKERS = (8, 32, 128)
+
+
+class FakeModel:
+    def generate_content(self, contents, stream=False, generation_config=None):
+        for i in range(CHUNKS):
+            time.sleep(CHUNK_INTERVAL)
+            yield FakeChunk(f"word{i} ")
+
+    async def generate_content_async(self, contents, stream=False, generation_config=None):
+        async def iterate():
+            for i in range(CHUNKS):
+                await asyncio.sleep(CHUNK_INTERVAL)
+                yield FakeChunk(f"word{i} ")
+        return iterate()
+
+
+class NullWebSocket:
+    async def send_text(self, text):
+        pass
+
+
+async def sample_threads(peak: list, stop: asyncio.Event):
+    while not stop.is_set():
+        peak[0] = max(peak[0], threading.active_count())
+        await asyncio.sleep(0.01)
+
+
+async def legacy_run(talkers: int) -> tuple[list[float], float]:
+    model = FakeModel()
+    ttfts = []
+
+    def stream_sync(started):
+        first = True
+        for chunk in model.generate_content("hi", stream=True):
+            if first:
+                ttfts.append(time.perf_counter() - started)
+                first = False
+
+    loop = asyncio.get_running_loop()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) + 4)) as executor:
+        await asyncio.gather(*[loop.run_in_executor(executor, stream_sync, time.perf_counter())
+                               for _ in range(talkers)])
+    return ttfts, time.perf_counter() - start
+
+
+async def async_run(talkers: int) -> tuple[list[float], float]:
+    streamer = main.AudioStreamer()
+    for i in range(talkers):
+        await streamer.set_session_keys(f"bench{i}", {"GEMINI_API_KEY": "fake"})
+    start = time.perf_counter()
+    await asyncio.gather(*[streamer.stream_llm_response(f"bench{i}", "hi", NullWebSocket()) for i in range(talkers)])
+    wall = time.perf_counter() - start
+    for sender in (session.sender for session in streamer.sessions.values() if session.sender):
+        sender.close()
+    return list(streamer.first_token_latencies), wall
+
+
+async def measure(fn, talkers: int):
+    peak, stop = [threading.active_count()], asyncio.Event()
+    sampler = asyncio.create_task(sample_threads(peak, stop))
+    ttfts, wall = await fn(talkers)
+    stop.set()
+    await sampler
+    return main.latency_summary(ttfts), wall, peak[0]
+
+
+async def run():
+    model = FakeModel()
+    main.MURF_API_KEY = None
+    main.get_gemini_model = lambda api_key: model
+    for talkers in TALKERS:
+        print(f"{talkers} concurrent talkers")
+        for name, fn in (("legacy", legacy_run), ("async", async_run)):
+            ttft, wall, threads = await measure(fn, talkers)
+            print(f"  {name:<7}: wall {wall:6.2f} s  ttft p95 {ttft['p95_ms']:8.1f} ms  peak threads {threads:>3}")
+        print()
+
+
+if __name__ == "__main__":
+    asyncio.run(run())
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Benchmark: time to first audio with a new Murf socket per reply vs the session's shared socket
+
+    python bench_murf_connection.py
+
+A local fake Murf server answers each text message with one audio chunk
+after SYNTHESIS_DELAY. Opening a connection costs HANDSHAKE_RTTS round trips
+of RTT (TCP + TLS + HTTP upgrade).
+
+- legacy: every reply opens its own socket and sends voice_config (the removed code path)
+- pooled: replies share a MurfConnection that was pre-warmed when the session started
+"""
+
+import asyncio
+import json
+import time
+
+import websockets
+
+import main
+from testkit import FakeMurfServer
+
+RTT = 0.04
+HANDSHAKE_RTTS = 3
+SYNTHESIS_DELAY = 0.08
+REPLIES = 10
+
+
+async def legacy_reply(url: str, text: str) -> float:
+    """The pre-change path: connect, send voice_config and text, wait for the first audio."""
+    started = time.perf_counter()
+    async with websockets.connect(f"{url}?api-key=bench&{main.MURF_STREAM_PARAMS}") as murf_ws:
+        await murf_ws.send(json.dumps({"voice_config": main.MURF_VOICE_CONFIG, "context_id": "ctx"}))
+        await murf_ws.send(json.dumps({"text": text, "context_id": "ctx"}))
+        await murf_ws.send(json.dumps({"text": "", "end": True, "context_id": "ctx"}))
+        async for msg in murf_ws:
+            if "audio" in json.loads(msg):
+                return time.perf_counter() - started
+    return float("nan")
+
+
+async def pooled_reply(connection: main.MurfConnection, text: str) -> float:
+    started = time.perf_counter()
+    context = await connection.open_context()
+    await context.send_text(text)
+    await context.end()
+    async for _ in context.audio_chunks():
+        latency = time.perf_counter() - started
+        break
+    context.close()
+    return latency
+
+
+def report(name: str, latencies: list[float]):
+    summary = main.latency_summary(latencies)
+    print(f"  {name:<7}: avg {summary['avg_ms']:7.1f} ms  p95 {summary['p95_ms']:7.1f} ms")
+
+
+async def run():
+    async with FakeMurfServer(handshake_delay=RTT * HANDSHAKE_RTTS, synthesis_delay=SYNTHESIS_DELAY) as server:
+        print(f"Time to first audio over {REPLIES} replies "
+              f"(handshake {RTT * HANDSHAKE_RTTS * 1000:.0f} ms, synthesis {SYNTHESIS_DELAY * 1000:.0f} ms)")
+        legacy = [await legacy_reply(server.url, "Hello there.") for _ in range(REPLIES)]
+
+        connection = main.MurfConnection(server.url, "bench", "bench_ctx")
+        await connection.connect()  # pre-warm at session start
+        pooled = [await pooled_reply(connection, "Hello there.") for _ in range(REPLIES)]
+        await connection.close()
+
+        report("legacy", legacy)
+        report("pooled", pooled)
+        gain = main.latency_summary(legacy)["avg_ms"] - main.latency_summary(pooled)["avg_ms"]
+        print(f"  gain   : {gain:7.1f} ms per reply ({server.connections} server connections in total)")
+
+
+if __name__ == "__main__":
+    asyncio.run(run())
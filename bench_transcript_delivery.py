@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Benchmark: end-of-turn -> llm_start latency, frame-piggybacked vs push-based delivery
+
+    python bench_transcript_delivery.py
+
+A fake AssemblyAI client fires end-of-turn events from its own thread (as
+the SDK does) while the "browser" streams 128 ms microphone frames
+(2048 samples at 16 kHz, as recorderWorklet.js sends them).
+
+- legacy: transcripts were only drained when the next audio frame arrived
+- push:   AudioStreamer bridges the callback into the loop and starts the turn at once
+
+The last scenario stops the microphone right after the user finishes
+speaking; the legacy path never starts the turn in that case.
+"""
+
+import asyncio
+import random
+import threading
+import time
+
+import assemblyai.streaming.v3 as aai_v3
+
+import main
+from testkit import FakeStreamingClient
+
+FRAME_INTERVAL = 2048 / 16000
+TURNS = 20
+
+
+class FakeWebSocket:
+    async def send_text(self, text):
+        pass
+
+
+async def legacy_latencies(mic_stops: bool) -> list[float]:
+    """The removed behaviour: callbacks append to a list that is drained on the next audio frame."""
+    pending = []
+    lock = threading.Lock()
+    latencies = []
+    for order in range(TURNS):
+        await asyncio.sleep(random.uniform(0, FRAME_INTERVAL))
+        with lock:
+            pending.append(time.perf_counter())
+        if mic_stops:
+            await asyncio.sleep(1.0)  # no more frames arrive; nothing drains the list
+            continue
+        await asyncio.sleep(FRAME_INTERVAL - (time.perf_counter() % FRAME_INTERVAL))
+        with lock:
+            latencies += [time.perf_counter() - t for t in pending]
+            pending.clear()
+    return latencies
+
+
+async def push_latencies(mic_stops: bool) -> list[float]:
+    streamer = main.AudioStreamer()
+
+    async def fake_llm_response(session_id, user_text, websocket, turn_started_at=None):
+        await streamer.send_llm_start(streamer.get_sender(session_id, websocket), user_text, turn_started_at)
+
+    streamer.stream_llm_response = fake_llm_response
+    await streamer.set_session_keys("bench", {"ASSEMBLYAI_API_KEY": "fake"})
+    await streamer.start_streaming("bench", FakeWebSocket())
+    client = FakeStreamingClient.instances[-1]
+
+    for order in range(TURNS):
+        await asyncio.sleep(random.uniform(0, FRAME_INTERVAL))
+        client.fire_end_of_turn("tell me a joke", order)
+        await asyncio.sleep(0.05 if mic_stops else FRAME_INTERVAL)
+    await asyncio.sleep(0.05)
+    await streamer.stop_streaming("bench")
+    return list(streamer.turn_latencies)
+
+
+def summarize(name: str, latencies: list[float]):
+    if not latencies:
+        print(f"  {name:<7}: no turns started ({TURNS} end-of-turn events lost until the next frame)")
+        return
+    latencies.sort()
+    avg = sum(latencies) / len(latencies) * 1000
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000
+    print(f"  {name:<7}: {len(latencies):>3} turns  avg {avg:7.2f} ms  p95 {p95:7.2f} ms")
+
+
+async def run():
+    aai_v3.StreamingClient = FakeStreamingClient
+    random.seed(0)
+    for mic_stops in (False, True):
+        print("Microphone stops after the turn" if mic_stops else "Microphone keeps streaming")
+        summarize("legacy", await legacy_latencies(mic_stops))
+        summarize("push", await push_latencies(mic_stops))
+        print()
+
+
+if __name__ == "__main__":
+    asyncio.run(run())
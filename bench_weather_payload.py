@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Benchmark: legacy hourly weather payload vs the slim current-conditions payload
+
+Compares bytes on the wire and JSON parse + extraction time for one lookup,
+plus a batched multi-city lookup versus one request per city.
+
+    python bench_weather_payload.py           # synthetic payloads shaped like Open-Meteo responses
+    python bench_weather_payload.py --live    # fetch real payloads from Open-Meteo
+"""
+
+import argparse
+import json
+import random
+import time
+from datetime import datetime, timedelta
+
+import httpx
+
+from main import WEATHER_API_URL, WEATHER_CURRENT_FIELDS, WEATHER_CODE_DESCRIPTIONS, parse_current_weather
+
+LEGACY_HOURLY_FIELDS = "temperature_2m,relative_humidity_2m,wind_speed_10m,weather_code"
+CITIES = [(48.85, 2.35), (52.52, 13.41), (51.51, -0.13), (35.69, 139.69), (40.71, -74.01)]
+ITERATIONS = 2000
+
+
+def legacy_parse(data: dict) -> dict | None:
+    """The pre-change extraction: locate the current hour in a week of hourly arrays."""
+    current_weather = data.get("current_weather", {})
+    hourly_data = data.get("hourly", {})
+    if not current_weather:
+        return None
+    current_time = current_weather.get("time")
+    try:
+        idx = hourly_data["time"].index(current_time)
+    except (KeyError, ValueError):
+        idx = 0
+    humidity = None
+    if hourly_data.get("relative_humidity_2m") and len(hourly_data["relative_humidity_2m"]) > idx:
+        humidity = hourly_data["relative_humidity_2m"][idx]
+    weather_code = current_weather.get("weathercode", 0)
+    return {
+        "temperature": current_weather.get("temperature"),
+        "wind_speed": current_weather.get("windspeed"),
+        "description": WEATHER_CODE_DESCRIPTIONS.get(weather_code, "Unknown"),
+        "weather_code": weather_code,
+        "humidity": humidity,
+    }
+
+
+def synthetic_legacy_payload(lat: float, lon: float) -> str:
+    start = datetime(2025, 1, 1)
+    times = [(start + timedelta(hours=h)).strftime("%Y-%m-%dT%H:%M") for h in range(7 * 24)]
+    now = times[37]
+    return json.dumps({
+        "latitude": lat, "longitude": lon, "generationtime_ms": 0.1, "utc_offset_seconds": 0,
+        "timezone": "GMT", "timezone_abbreviation": "GMT", "elevation": 38.0,
+        "current_weather_units": {"time": "iso8601", "interval": "seconds", "temperature": "°C",
+                                  "windspeed": "km/h", "winddirection": "°", "is_day": "", "weathercode": "wmo code"},
+        "current_weather": {"time": now, "interval": 900, "temperature": 11.3, "windspeed": 9.4,
+                            "winddirection": 240, "is_day": 1, "weathercode": 3},
+        "hourly_units": {"time": "iso8601", "temperature_2m": "°C", "relative_humidity_2m": "%",
+                         "wind_speed_10m": "km/h", "weather_code": "wmo code"},
+        "hourly": {
+            "time": times,
+            "temperature_2m": [round(random.uniform(-5, 30), 1) for _ in times],
+            "relative_humidity_2m": [random.randint(20, 100) for _ in times],
+            "wind_speed_10m": [round(random.uniform(0, 40), 1) for _ in times],
+            "weather_code": [random.choice([0, 1, 2, 3, 61, 80]) for _ in times],
+        },
+    }, separators=(",", ":"))
+
+
+def synthetic_current_object(lat: float, lon: float) -> dict:
+    return {
+        "latitude": lat, "longitude": lon, "generationtime_ms": 0.05, "utc_offset_seconds": 0,
+        "timezone": "GMT", "timezone_abbreviation": "GMT", "elevation": 38.0,
+        "current_units": {"time": "iso8601", "interval": "seconds", "temperature_2m": "°C",
+                          "relative_humidity_2m": "%", "wind_speed_10m": "km/h", "weather_code": "wmo code"},
+        "current": {"time": "2025-01-02T13:00", "interval": 900, "temperature_2m": 11.3,
+                    "relative_humidity_2m": 81, "wind_speed_10m": 9.4, "weather_code": 3},
+    }
+
+
+def live_payloads() -> tuple[list[str], list[str], str]:
+    with httpx.Client(timeout=15.0) as client:
+        legacy = [client.get(WEATHER_API_URL, params={
+            "latitude": lat, "longitude": lon, "current_weather": "true", "hourly": LEGACY_HOURLY_FIELDS,
+        }).text for lat, lon in CITIES]
+        current = [client.get(WEATHER_API_URL, params={
+            "latitude": lat, "longitude": lon, "current": WEATHER_CURRENT_FIELDS,
+        }).text for lat, lon in CITIES]
+        batch = client.get(WEATHER_API_URL, params={
+            "latitude": ",".join(str(lat) for lat, _ in CITIES),
+            "longitude": ",".join(str(lon) for _, lon in CITIES),
+            "current": WEATHER_CURRENT_FIELDS,
+        }).text
+    return legacy, current, batch
+
+
+def time_per_call(fn, payload: str) -> float:
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        fn(json.loads(payload))
+    return (time.perf_counter() - start) / ITERATIONS * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--live", action="store_true", help="fetch real payloads from Open-Meteo")
+    args = parser.parse_args()
+
+    if args.live:
+        legacy, current, batch = live_payloads()
+    else:
+        random.seed(0)
+        legacy = [synthetic_legacy_payload(lat, lon) for lat, lon in CITIES]
+        current = [json.dumps(synthetic_current_object(lat, lon), separators=(",", ":")) for lat, lon in CITIES]
+        batch = json.dumps([synthetic_current_object(lat, lon) for lat, lon in CITIES], separators=(",", ":"))
+
+    legacy_bytes = len(legacy[0].encode())
+    current_bytes = len(current[0].encode())
+    legacy_us = time_per_call(legacy_parse, legacy[0])
+    current_us = time_per_call(parse_current_weather, current[0])
+
+    print(f"Payload source: {'live Open-Meteo' if args.live else 'synthetic'}\n")
+    print("Single city lookup")
+    print(f"  legacy hourly payload : {legacy_bytes:>8} bytes  {legacy_us:8.1f} us parse+extract")
+    print(f"  current-only payload  : {current_bytes:>8} bytes  {current_us:8.1f} us parse+extract")
+    print(f"  reduction             : {legacy_bytes / current_bytes:8.1f}x bytes  {legacy_us / current_us:8.1f}x time\n")
+
+    n = len(CITIES)
+    per_city_bytes = sum(len(p.encode()) for p in legacy)
+    batch_bytes = len(batch.encode())
+    batch_us = time_per_call(lambda data: [parse_current_weather(d) for d in data], batch)
+    print(f"{n} cities")
+    print(f"  legacy, {n} requests    : {per_city_bytes:>8} bytes")
+    print(f"  batched, 1 request    : {batch_bytes:>8} bytes  {batch_us:8.1f} us parse+extract")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,15 @@
+"""
+Shared pytest fixtures
+"""
+
+import pytest
+
+import main
+
+
+@pytest.fixture(autouse=True)
+def tts_cache(monkeypatch, tmp_path):
+    """A private TTS cache per test, so no test reads or fills data/tts_cache."""
+    cache = main.TtsAudioCache(1024, main.DiskLRUCache("tts_audio", str(tmp_path / "tts"), 1024 * 1024, 64 * 1024))
+    monkeypatch.setattr(main, "tts_audio_cache", cache)
+    return cache
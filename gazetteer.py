@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+Offline gazetteer: a compact, memory-mapped index of populated places
+
+The index is a single binary file that is mmap'd read-only, so lookups touch
+only the pages they need and several worker processes share one copy through
+the OS page cache. Layout (little-endian):
+
+    header      magic b"GAZ1", count N, names blob length        (3 x uint32 after magic)
+    offsets     uint32[N + 1]   start of each name in the names blob
+    latitude    float32[N]
+    longitude   float32[N]
+    population  uint32[N]
+    names       UTF-8 normalized names, sorted, concatenated
+
+Entries are sorted by (name, -population), so an exact match returns the most
+populous place with that name and a prefix scan is one binary search.
+
+Build an index from the bundled seed list or a GeoNames dump
+(https://download.geonames.org/export/dump/, e.g. cities15000.txt):
+
+    python gazetteer.py build data/cities.tsv data/gazetteer.bin
+    python gazetteer.py build --geonames cities15000.txt data/gazetteer.bin
+    python gazetteer.py lookup data/gazetteer.bin "sao paulo"
+"""
+
+import argparse
+import array
+import difflib
+import mmap
+import re
+import struct
+import sys
+import unicodedata
+from bisect import bisect_left
+from typing import Iterable, NamedTuple
+
+MAGIC = b"GAZ1"
+HEADER = struct.Struct("<4sII")
+
+
+class Place(NamedTuple):
+    name: str
+    latitude: float
+    longitude: float
+    population: int
+
+
+def normalize_name(name: str) -> str:
+    """Fold accents, case and punctuation: "São-Paulo!" -> "sao paulo"."""
+    decomposed = unicodedata.normalize("NFKD", name or "")
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    cleaned = re.sub(r"[^\w\s]", " ", stripped.lower())
+    return " ".join(cleaned.split())
+
+
+class _NameKeys:
+    """Sequence view of the sorted names as bytes, so bisect works without decoding."""
+
+    def __init__(self, gazetteer: "Gazetteer"):
+        self._gazetteer = gazetteer
+
+    def __len__(self):
+        return len(self._gazetteer)
+
+    def __getitem__(self, i: int) -> bytes:
+        return self._gazetteer._name_bytes(i)
+
+
+class Gazetteer:
+    """Read-only lookups over a memory-mapped gazetteer index."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count, names_len = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            self._mm.close()
+            raise ValueError(f"{path} is not a gazetteer index")
+
+        self._count = count
+        pos = HEADER.size
+        view = memoryview(self._mm)
+        self._offsets = self._array(view, pos, "I", count + 1)
+        pos += 4 * (count + 1)
+        self._lat = self._array(view, pos, "f", count)
+        pos += 4 * count
+        self._lon = self._array(view, pos, "f", count)
+        pos += 4 * count
+        self._population = self._array(view, pos, "I", count)
+        pos += 4 * count
+        self._names = view[pos:pos + names_len]
+        self._keys = _NameKeys(self)
+
+    @staticmethod
+    def _array(view: memoryview, pos: int, fmt: str, count: int):
+        if sys.byteorder == "little":
+            return view[pos:pos + 4 * count].cast(fmt)
+        # Big-endian hosts get a byte-swapped copy instead of a zero-copy view
+        data = array.array(fmt, view[pos:pos + 4 * count].tobytes())
+        data.byteswap()
+        return data
+
+    def __len__(self):
+        return self._count
+
+    def _name_bytes(self, i: int) -> bytes:
+        return bytes(self._names[self._offsets[i]:self._offsets[i + 1]])
+
+    def place(self, i: int) -> Place:
+        return Place(
+            self._name_bytes(i).decode("utf-8"),
+            round(float(self._lat[i]), 4),
+            round(float(self._lon[i]), 4),
+            int(self._population[i]),
+        )
+
+    def _range(self, prefix: bytes) -> tuple[int, int]:
+        lo = bisect_left(self._keys, prefix)
+        hi = bisect_left(self._keys, prefix + b"\xff", lo)
+        return lo, hi
+
+    def exact(self, name: str) -> Place | None:
+        key = normalize_name(name).encode("utf-8")
+        if not key:
+            return None
+        i = bisect_left(self._keys, key)
+        if i < self._count and self._name_bytes(i) == key:
+            return self.place(i)
+        return None
+
+    def prefix(self, prefix: str, limit: int = 10) -> list[Place]:
+        """Places whose name starts with `prefix`, most populous first."""
+        key = normalize_name(prefix).encode("utf-8")
+        if not key:
+            return []
+        lo, hi = self._range(key)
+        ranked = sorted(range(lo, hi), key=lambda i: -self._population[i])
+        seen, places = set(), []
+        for i in ranked:
+            name = self._name_bytes(i)
+            if name in seen:
+                continue
+            seen.add(name)
+            places.append(self.place(i))
+            if len(places) >= limit:
+                break
+        return places
+
+    def fuzzy(self, name: str, cutoff: float = 0.85, limit: int = 3) -> list[Place]:
+        """Closest spellings of `name`; candidates share its first letter and a similar length."""
+        key = normalize_name(name)
+        if len(key) < 4:
+            return []
+        lo, hi = self._range(key[0].encode("utf-8"))
+        scored = []
+        matcher = difflib.SequenceMatcher(b=key, autojunk=False)
+        last = None
+        for i in range(lo, hi):
+            candidate = self._name_bytes(i)
+            if candidate == last or abs(len(candidate) - len(key)) > 2:
+                continue
+            last = candidate
+            matcher.set_seq1(candidate.decode("utf-8"))
+            if matcher.real_quick_ratio() < cutoff or matcher.quick_ratio() < cutoff:
+                continue
+            score = matcher.ratio()
+            if score >= cutoff:
+                scored.append((score, self._population[i], i))
+        scored.sort(reverse=True)
+        return [self.place(i) for _, _, i in scored[:limit]]
+
+    def lookup(self, name: str) -> Place | None:
+        """Exact match first, then the best fuzzy match."""
+        place = self.exact(name)
+        if place is None:
+            matches = self.fuzzy(name)
+            place = matches[0] if matches else None
+        return place
+
+    def close(self):
+        for view in (self._offsets, self._lat, self._lon, self._population, self._names):
+            if isinstance(view, memoryview):
+                view.release()
+        self._mm.close()
+
+
+# --- Index building ---
+def build_index(places: Iterable[tuple[Iterable[str], float, float, int]], path: str) -> int:
+    """Write an index from (names, latitude, longitude, population) rows; returns the entry count."""
+    entries = {}
+    for names, lat, lon, population in places:
+        for name in names:
+            key = normalize_name(name)
+            if key:
+                # One entry per (name, place); keep the most populous on exact duplicates
+                entries.setdefault((key, round(lat, 2), round(lon, 2)), (key, lat, lon, population))
+    rows = sorted(entries.values(), key=lambda row: (row[0].encode("utf-8"), -row[3]))
+
+    names_blob = bytearray()
+    offsets = array.array("I", [0])
+    for key, *_ in rows:
+        names_blob += key.encode("utf-8")
+        offsets.append(len(names_blob))
+    lat = array.array("f", (row[1] for row in rows))
+    lon = array.array("f", (row[2] for row in rows))
+    population = array.array("I", (min(int(row[3]), 0xFFFFFFFF) for row in rows))
+    if sys.byteorder != "little":
+        for data in (offsets, lat, lon, population):
+            data.byteswap()
+
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(rows), len(names_blob)))
+        for data in (offsets, lat, lon, population):
+            f.write(data.tobytes())
+        f.write(names_blob)
+    return len(rows)
+
+
+def read_seed_tsv(path: str):
+    """Rows from the bundled seed list: name, country, latitude, longitude, population, alternate names."""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip() or line.startswith("#"):
+                continue
+            cols = line.rstrip("\n").split("\t")
+            alternates = [n for n in (cols[5] if len(cols) > 5 else "").split(",") if n.strip()]
+            yield [cols[0], *alternates], float(cols[2]), float(cols[3]), int(cols[4])
+
+
+def read_geonames(path: str, min_population: int = 0):
+    """Rows from a GeoNames `cities*.txt` dump (name and ASCII name of each populated place)."""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            cols = line.rstrip("\n").split("\t")
+            if len(cols) < 15 or cols[6] != "P":
+                continue
+            population = int(cols[14] or 0)
+            if population < min_population:
+                continue
+            yield [cols[1], cols[2]], float(cols[4]), float(cols[5]), population
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or query an offline gazetteer index.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    build = sub.add_parser("build", help="build an index file")
+    build.add_argument("source", help="seed TSV (default format) or GeoNames dump with --geonames")
+    build.add_argument("output", help="index file to write")
+    build.add_argument("--geonames", action="store_true", help="source is a GeoNames cities*.txt dump")
+    build.add_argument("--min-population", type=int, default=0)
+
+    lookup = sub.add_parser("lookup", help="look up a place name")
+    lookup.add_argument("index")
+    lookup.add_argument("name")
+
+    args = parser.parse_args()
+    if args.command == "build":
+        rows = read_geonames(args.source, args.min_population) if args.geonames else read_seed_tsv(args.source)
+        count = build_index(rows, args.output)
+        print(f"Wrote {count} entries to {args.output}")
+    else:
+        gazetteer = Gazetteer(args.index)
+        print("exact :", gazetteer.exact(args.name))
+        print("prefix:", gazetteer.prefix(args.name, limit=5))
+        print("fuzzy :", gazetteer.fuzzy(args.name))
+        gazetteer.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,14 @@
-
 import os
 import logging
 import json
 import re
-from fastapi import FastAPI, UploadFile, File, HTTPException, WebSocket, WebSocketDisconnect
-from fastapi.responses import FileResponse, StreamingResponse, JSONResponse
+import base64
+import struct
+import hashlib
+import mimetypes
+import tempfile
+from fastapi import FastAPI, UploadFile, File, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import FileResponse, StreamingResponse, JSONResponse, RedirectResponse, Response
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
@@ -12,10 +16,22 @@ import httpx
 import websockets
 import assemblyai as aai
 import google.generativeai as genai
-from collections import defaultdict
+import google.ai.generativelanguage as glm
+from collections import deque, OrderedDict
 import asyncio
 import time
-from tavily import TavilyClient
+import numpy as np
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager, contextmanager
+import contextvars
+from enum import Enum
+from typing import NamedTuple
+from urllib.parse import urlencode
+from tavily import TavilyClient, AsyncTavilyClient
+import tavily.errors as tavily_errors
+from gazetteer import Gazetteer
+from session_store import SessionStore, open_session_store
 
 # --- Logging ---
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -28,6 +44,51 @@ GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 TAVILY_API_KEY = os.getenv("TAVILY_API_KEY")
 MURF_CONTEXT_ID = os.getenv("MURF_CONTEXT_ID", "murf_context_global_1")
 MURF_WS_URL = os.getenv("MURF_WS_URL", "wss://api.murf.ai/v1/speech/stream-input")
+MURF_GENERATE_URL = "https://api.murf.ai/v1/speech/generate"
+MURF_PING_INTERVAL = float(os.getenv("MURF_PING_INTERVAL", "20"))
+# Text handed to Murf is cut into sentence/clause-sized segments within these bounds
+TTS_SEGMENT_MIN_CHARS = int(os.getenv("TTS_SEGMENT_MIN_CHARS", "30"))
+TTS_SEGMENT_MAX_CHARS = int(os.getenv("TTS_SEGMENT_MAX_CHARS", "220"))
+TTS_FIRST_FLUSH_DEADLINE = float(os.getenv("TTS_FIRST_FLUSH_DEADLINE", "0.35"))
+# Play the "thinking" clip when a reply has produced no text after this many seconds (0 disables)
+THINKING_FILLER_DELAY = float(os.getenv("THINKING_FILLER_DELAY", "1.5"))
+TURN_LATENCY_SAMPLES = 500
+SENDER_QUEUE_SIZE = int(os.getenv("SENDER_QUEUE_SIZE", "256"))
+TAVILY_TIMEOUT = float(os.getenv("TAVILY_TIMEOUT", "8"))
+TAVILY_CLIENT_CACHE_SIZE = int(os.getenv("TAVILY_CLIENT_CACHE_SIZE", "64"))
+GEMINI_CLIENT_CACHE_SIZE = int(os.getenv("GEMINI_CLIENT_CACHE_SIZE", "64"))
+# Concurrent /agent/chat work per stage; requests beyond these wait without holding the event loop
+AGENT_STT_CONCURRENCY = int(os.getenv("AGENT_STT_CONCURRENCY", "4"))
+AGENT_LLM_CONCURRENCY = int(os.getenv("AGENT_LLM_CONCURRENCY", "8"))
+AGENT_TTS_CONCURRENCY = int(os.getenv("AGENT_TTS_CONCURRENCY", "8"))
+# An upstream failing this many times in a row is skipped (fail fast) for BREAKER_RESET_TIMEOUT seconds
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5"))
+BREAKER_RESET_TIMEOUT = float(os.getenv("BREAKER_RESET_TIMEOUT", "30"))
+# Idempotent GETs (geocoding, weather) share this budget per turn; a slow attempt is hedged after
+# UPSTREAM_HEDGE_DELAY and failed ones retried, at most UPSTREAM_MAX_ATTEMPTS requests in all
+UPSTREAM_TURN_DEADLINE = float(os.getenv("UPSTREAM_TURN_DEADLINE", "4"))
+UPSTREAM_HEDGE_DELAY = float(os.getenv("UPSTREAM_HEDGE_DELAY", "0.5"))
+UPSTREAM_MAX_ATTEMPTS = int(os.getenv("UPSTREAM_MAX_ATTEMPTS", "3"))
+UPSTREAM_RETRY_BACKOFF = 0.1
+# A one-shot Murf render gives up after this long (less when the turn's deadline is nearer)
+MURF_RENDER_TIMEOUT = float(os.getenv("MURF_RENDER_TIMEOUT", "20"))
+# Budget for a whole /agent/chat turn: transcription, skill or LLM, and the voice render
+AGENT_TURN_DEADLINE = float(os.getenv("AGENT_TURN_DEADLINE", "30"))
+
+# --- Web Search Cache Configuration ---
+WEB_SEARCH_CACHE_SIZE = int(os.getenv("WEB_SEARCH_CACHE_SIZE", "1024"))
+WEB_SEARCH_CACHE_TTL = float(os.getenv("WEB_SEARCH_CACHE_TTL", "1800"))
+# News, scores and prices go stale quickly, so they get a much shorter TTL
+WEB_SEARCH_VOLATILE_TTL = float(os.getenv("WEB_SEARCH_VOLATILE_TTL", "120"))
+WEB_SEARCH_VOLATILE_WORDS = {
+    "news", "latest", "breaking", "today", "tonight", "now", "live", "current", "score", "scores",
+    "result", "results", "won", "winner", "match", "game", "price", "prices", "stock", "stocks",
+}
+WEB_SEARCH_STOPWORDS = {
+    "a", "an", "the", "is", "are", "was", "were", "be", "of", "in", "on", "at", "to", "for", "and",
+    "or", "me", "my", "please", "tell", "can", "could", "you", "do", "does", "did", "about", "what",
+    "whats", "s", "hey", "hi", "ok", "okay", "so", "just", "know", "i", "want", "like",
+}
 AGENT_PERSONA = os.getenv(
     "AGENT_PERSONA",
     "a friendly Buddy who speaks casually and positively like a close friend; keep replies warm, supportive, and concise, avoid markdown, and use light slang when natural"
@@ -37,6 +98,63 @@ AGENT_PERSONA = os.getenv(
 GEOCODING_API_URL = "https://geocoding-api.open-meteo.com/v1/search"
 WEATHER_API_URL = "https://api.open-meteo.com/v1/forecast"
 
+# --- Geocoding Cache Configuration ---
+GEOCODE_CACHE_SIZE = int(os.getenv("GEOCODE_CACHE_SIZE", "2048"))
+GEOCODE_CACHE_TTL = float(os.getenv("GEOCODE_CACHE_TTL", str(7 * 24 * 3600)))
+GEOCODE_NEGATIVE_TTL = float(os.getenv("GEOCODE_NEGATIVE_TTL", "600"))
+GEOCODE_CACHE_PATH = os.getenv("GEOCODE_CACHE_PATH")  # optional JSON snapshot for warm restarts
+# Offline gazetteer consulted before the geocoding API; set to an empty string to disable
+GAZETTEER_PATH = os.getenv("GAZETTEER_PATH", "data/gazetteer.bin")
+
+# --- Conversation Store Configuration ---
+# "memory" keeps sessions in this process; "sqlite:///path.db" shares them between workers
+SESSION_STORE_URL = os.getenv("SESSION_STORE_URL", "memory")
+# A turn is one user message plus the reply; bytes count UTF-8 text only
+CHAT_HISTORY_MAX_TURNS = int(os.getenv("CHAT_HISTORY_MAX_TURNS", "20"))
+CHAT_HISTORY_MAX_BYTES = int(os.getenv("CHAT_HISTORY_MAX_BYTES", str(32 * 1024)))
+CHAT_HISTORY_IDLE_TTL = float(os.getenv("CHAT_HISTORY_IDLE_TTL", "1800"))
+# Ceiling across all sessions; least recently used conversations are dropped first
+CHAT_HISTORY_TOTAL_BYTES = int(os.getenv("CHAT_HISTORY_TOTAL_BYTES", str(64 * 1024 * 1024)))
+# Prompt sent to Gemini: the last N turns verbatim, older turns folded into a running summary
+PROMPT_WINDOW_TURNS = int(os.getenv("PROMPT_WINDOW_TURNS", "6"))
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "3000"))
+PROMPT_SUMMARY_MAX_TOKENS = int(os.getenv("PROMPT_SUMMARY_MAX_TOKENS", "256"))
+
+# --- Audio File Cache Configuration ---
+# Audio fetched through /proxy-audio is kept on disk, least recently used files evicted first
+AUDIO_CACHE_DIR = os.getenv("AUDIO_CACHE_DIR", "data/audio_cache")
+AUDIO_CACHE_MAX_BYTES = int(os.getenv("AUDIO_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+AUDIO_CACHE_MAX_FILE_BYTES = int(os.getenv("AUDIO_CACHE_MAX_FILE_BYTES", str(16 * 1024 * 1024)))
+
+# --- TTS Audio Cache Configuration ---
+# Synthesized audio keyed by (normalized text, voice, format, rate): memory LRU over a disk tier
+TTS_CACHE_MEMORY_BYTES = int(os.getenv("TTS_CACHE_MEMORY_BYTES", str(32 * 1024 * 1024)))
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", "data/tts_cache")
+TTS_CACHE_DISK_BYTES = int(os.getenv("TTS_CACHE_DISK_BYTES", str(256 * 1024 * 1024)))
+TTS_CACHE_MAX_ENTRY_BYTES = int(os.getenv("TTS_CACHE_MAX_ENTRY_BYTES", str(4 * 1024 * 1024)))
+
+# --- Weather Cache Configuration ---
+# Open-Meteo refreshes current conditions every 15 minutes on a ~0.1 degree model grid
+WEATHER_CACHE_SIZE = int(os.getenv("WEATHER_CACHE_SIZE", "1024"))
+WEATHER_CACHE_TTL = float(os.getenv("WEATHER_CACHE_TTL", "900"))
+WEATHER_GRID_DEGREES = float(os.getenv("WEATHER_GRID_DEGREES", "0.1"))
+WEATHER_MAX_CITIES = 5
+
+# Only the current-conditions block is requested; no hourly arrays
+WEATHER_CURRENT_FIELDS = "temperature_2m,relative_humidity_2m,wind_speed_10m,weather_code"
+
+WEATHER_CODE_DESCRIPTIONS = {
+    0: "Clear sky", 1: "Mainly clear", 2: "Partly cloudy", 3: "Overcast",
+    45: "Foggy", 48: "Depositing rime fog", 51: "Light drizzle",
+    53: "Moderate drizzle", 55: "Dense drizzle", 56: "Light freezing drizzle",
+    57: "Dense freezing drizzle", 61: "Slight rain", 63: "Moderate rain",
+    65: "Heavy rain", 66: "Light freezing rain", 67: "Heavy freezing rain",
+    71: "Slight snow", 73: "Moderate snow", 75: "Heavy snow",
+    77: "Snow grains", 80: "Slight rain showers", 81: "Moderate rain showers",
+    82: "Violent rain showers", 85: "Slight snow showers", 86: "Heavy snow showers",
+    95: "Thunderstorm", 96: "Thunderstorm with slight hail", 99: "Thunderstorm with heavy hail"
+}
+
 # Weather-related keywords and patterns
 WEATHER_KEYWORDS = [
     "weather", "temperature", "forecast", "climate", "hot", "cold", "sunny", 
@@ -62,16 +180,311 @@ if GEMINI_API_KEY:
 else:
     logging.warning("GEMINI_API_KEY not set.")
 
-# --- Tavily Client ---
+if not TAVILY_API_KEY:
+    logging.warning("TAVILY_API_KEY not set. Web search disabled.")
+
+# --- Shared HTTP Clients ---
+# One pooled client per upstream so every call reuses warm TCP/TLS connections.
+# Each upstream gets its own pool, which doubles as a per-host connection limit.
 try:
-    tavily_client: TavilyClient | None = TavilyClient(api_key=TAVILY_API_KEY) if TAVILY_API_KEY else None
-    if tavily_client is None:
-        logging.warning("TAVILY_API_KEY not set. Web search disabled.")
-except Exception as e:
-    tavily_client = None
-    logging.error(f"Failed to initialize Tavily client: {e}")
+    import h2  # noqa: F401
+    HTTP2_ENABLED = True
+except ImportError:
+    HTTP2_ENABLED = False
+    logging.warning("h2 package not installed; outbound HTTP/2 disabled.")
+
+HTTP_UPSTREAM_PROFILES = {
+    "open_meteo": {
+        "timeout": httpx.Timeout(10.0, connect=3.0),
+        "limits": httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=60.0),
+    },
+    "murf": {
+        "timeout": httpx.Timeout(MURF_RENDER_TIMEOUT, connect=5.0),
+        "limits": httpx.Limits(max_connections=50, max_keepalive_connections=20, keepalive_expiry=60.0),
+    },
+    "audio_proxy": {
+        "timeout": httpx.Timeout(30.0, connect=5.0),
+        "limits": httpx.Limits(max_connections=50, max_keepalive_connections=10, keepalive_expiry=30.0),
+    },
+}
+
+http_clients: dict[str, httpx.AsyncClient] = {}
+
+
+def get_http_client(upstream: str) -> httpx.AsyncClient:
+    """Return the shared pooled client for an upstream, creating it lazily."""
+    client = http_clients.get(upstream)
+    if client is None or client.is_closed:
+        profile = HTTP_UPSTREAM_PROFILES[upstream]
+        client = httpx.AsyncClient(
+            http2=HTTP2_ENABLED,
+            timeout=profile["timeout"],
+            limits=profile["limits"],
+        )
+        http_clients[upstream] = client
+    return client
+
+
+async def close_http_clients():
+    clients = list(http_clients.values())
+    http_clients.clear()
+    for client in clients:
+        try:
+            await client.aclose()
+        except Exception as e:
+            logging.error(f"Error closing HTTP client: {e}")
+
+
+# --- Upstream Resilience ---
+# A breaker per upstream remembers recent failures: while one is open, calls to that upstream
+# fail immediately and the caller takes its fallback path instead of waiting out a timeout.
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling an upstream whose breaker is open."""
+
+    def __init__(self, upstream: str, retry_after: float):
+        super().__init__(f"{upstream} is unavailable (circuit open, retrying in {retry_after:.0f}s)")
+        self.upstream = upstream
+        self.retry_after = retry_after
+
+
+class DeadlineExceeded(TimeoutError):
+    """The turn ran out of time before an upstream call could start; not the upstream's fault."""
 
-app = FastAPI()
+
+# Answers about the caller's key (bad, forbidden, out of quota) rather than about the upstream
+KEY_ERROR_STATUSES = (401, 403, 429)
+
+
+def upstream_status(exc: BaseException) -> int | None:
+    """HTTP status an upstream answered with, if the error carries one."""
+    # httpx and websockets errors carry the response; google.api_core errors carry the HTTP code
+    status = getattr(getattr(exc, "response", None), "status_code", None)
+    if status is None and isinstance(getattr(exc, "code", None), int):
+        status = exc.code
+    return status
+
+
+def is_upstream_failure(exc: BaseException, client_errors: tuple = ()) -> bool:
+    """Whether an error says the upstream is unhealthy, rather than that this one request was bad."""
+    if isinstance(exc, (CircuitOpenError, DeadlineExceeded, ValueError) + client_errors):
+        return False
+    status = upstream_status(exc)
+    return status is None or status >= 500 or status == 429
+
+
+class CircuitBreaker:
+    """closed --(N failures in a row)--> open --(reset timeout)--> half-open: one probe call decides."""
+
+    def __init__(self, name: str, failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+                 reset_timeout: float = BREAKER_RESET_TIMEOUT, client_errors: tuple = ()):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.client_errors = client_errors
+        self.consecutive_failures = 0
+        self.opened_at: float | None = None
+        self._probing = False
+        self.calls = 0
+        self.failures = 0
+        self.rejected = 0
+        self.trips = 0
+        self.retries = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "open" if time.monotonic() - self.opened_at < self.reset_timeout else "half_open"
+
+    def allow(self):
+        """Raise CircuitOpenError unless a call may go out now (half-open lets one probe through)."""
+        state = self.state
+        if state == "closed":
+            return
+        if state == "half_open" and not self._probing:
+            self._probing = True
+            return
+        self.rejected += 1
+        raise CircuitOpenError(self.name, max(0.0, self.opened_at + self.reset_timeout - time.monotonic()))
+
+    def record_success(self):
+        if self.opened_at is not None:
+            logging.info(f"Circuit for {self.name} closed again")
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self._probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        self.consecutive_failures += 1
+        self._probing = False
+        if self.opened_at is None and self.consecutive_failures < self.failure_threshold:
+            return
+        if self.opened_at is None:
+            self.trips += 1
+            logging.warning(f"Circuit for {self.name} opened after {self.consecutive_failures} failures in a row")
+        self.opened_at = time.monotonic()
+
+    @contextmanager
+    def call(self, session_key: bool = False):
+        """Guard one upstream call (works around `await`s too); an answered bad request counts as healthy.
+
+        `session_key` marks a call made with a key one client supplied: its auth and quota
+        errors are that client's problem and must not fail everyone else fast.
+        """
+        self.allow()
+        self.calls += 1
+        try:
+            yield
+        except (asyncio.CancelledError, DeadlineExceeded):
+            # The upstream was never given its chance: no verdict either way
+            self._probing = False
+            raise
+        except Exception as e:
+            if session_key and upstream_status(e) in KEY_ERROR_STATUSES:
+                self._probing = False
+                raise
+            if is_upstream_failure(e, self.client_errors):
+                self.record_failure()
+            else:
+                self.record_success()
+            raise
+        self.record_success()
+
+    def stats(self) -> dict:
+        retry_after = self.opened_at + self.reset_timeout - time.monotonic() if self.opened_at is not None else 0.0
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "retry_after": round(max(0.0, retry_after), 1),
+            "calls": self.calls,
+            "failures": self.failures,
+            "rejected": self.rejected,
+            "trips": self.trips,
+            "retries": self.retries,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+        }
+
+
+upstream_breakers = {
+    "open_meteo": CircuitBreaker("open_meteo"),
+    "murf": CircuitBreaker("murf"),
+    "gemini": CircuitBreaker("gemini"),
+    "assemblyai": CircuitBreaker("assemblyai"),
+    # Per-session keys: a bad or exhausted key says nothing about Tavily's health
+    "tavily": CircuitBreaker("tavily", client_errors=(
+        tavily_errors.BadRequestError, tavily_errors.InvalidAPIKeyError,
+        tavily_errors.MissingAPIKeyError, tavily_errors.UsageLimitExceededError,
+    )),
+}
+
+# Monotonic deadline of the turn being answered; retries and hedges stop when it passes
+turn_deadline: contextvars.ContextVar[float | None] = contextvars.ContextVar("turn_deadline", default=None)
+
+
+@contextmanager
+def deadline_scope(seconds: float):
+    """Give the upstream calls made inside (and in tasks started inside) one shared time budget."""
+    deadline = time.monotonic() + seconds
+    outer = turn_deadline.get()
+    token = turn_deadline.set(min(deadline, outer) if outer is not None else deadline)
+    try:
+        yield
+    finally:
+        turn_deadline.reset(token)
+
+
+def remaining_budget(limit: float) -> float:
+    """Seconds a call may take: `limit`, or less if the current turn's deadline is nearer."""
+    deadline = turn_deadline.get()
+    return limit if deadline is None else min(limit, deadline - time.monotonic())
+
+
+async def resilient_get(upstream: str, url: str, **kwargs) -> httpx.Response:
+    """Idempotent GET behind the upstream's breaker, hedged and retried within the turn's deadline.
+
+    If the first attempt has not answered after UPSTREAM_HEDGE_DELAY a second copy goes out;
+    failed attempts are retried with backoff while time remains. The first good response wins.
+    """
+    breaker = upstream_breakers[upstream]
+    client = get_http_client(upstream)
+    deadline = turn_deadline.get() or time.monotonic() + UPSTREAM_TURN_DEADLINE
+
+    async def attempt() -> httpx.Response:
+        response = await client.get(url, timeout=max(0.05, deadline - time.monotonic()), **kwargs)
+        response.raise_for_status()
+        return response
+
+    pending: set[asyncio.Task] = set()
+    hedged: set[asyncio.Task] = set()
+    attempts = 0
+
+    def launch() -> asyncio.Task:
+        nonlocal attempts
+        attempts += 1
+        task = asyncio.create_task(attempt())
+        pending.add(task)
+        return task
+
+    with breaker.call():
+        last_error: Exception | None = None
+        launch()
+        try:
+            while pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                can_hedge = attempts < UPSTREAM_MAX_ATTEMPTS
+                done, _ = await asyncio.wait(pending, timeout=min(remaining, UPSTREAM_HEDGE_DELAY) if can_hedge else remaining,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    if can_hedge:
+                        breaker.hedges += 1
+                        hedged.add(launch())
+                    continue
+                for task in done:
+                    pending.discard(task)
+                    error = task.exception()
+                    if error is None:
+                        if task in hedged:
+                            breaker.hedge_wins += 1
+                        return task.result()
+                    if not is_upstream_failure(error):
+                        raise error
+                    last_error = error
+                if not pending and attempts < UPSTREAM_MAX_ATTEMPTS:
+                    await asyncio.sleep(min(UPSTREAM_RETRY_BACKOFF * 2 ** (attempts - 1), max(0.0, deadline - time.monotonic())))
+                    if time.monotonic() < deadline:
+                        breaker.retries += 1
+                        launch()
+        finally:
+            for task in pending:
+                task.cancel()
+        raise last_error or httpx.TimeoutException(f"{upstream} did not answer within the turn deadline")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    for upstream in HTTP_UPSTREAM_PROFILES:
+        get_http_client(upstream)
+    logging.info(f"Shared HTTP clients ready (http2={HTTP2_ENABLED})")
+    load_geocode_snapshot()
+    get_gazetteer()
+    fallback_clips.load_assets()
+    # Clips without a shipped asset are rendered once in the background; until then the generic one stands in
+    render_task = asyncio.create_task(fallback_clips.render_missing())
+    try:
+        yield
+    finally:
+        render_task.cancel()
+        save_geocode_snapshot()
+        await close_http_clients()
+
+
+app = FastAPI(lifespan=lifespan)
 
 # --- CORS ---
 app.add_middleware(
@@ -84,115 +497,755 @@ app.add_middleware(
 
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
-chat_history = defaultdict(list)
+
+# --- In-Process Caches ---
+_CACHE_MISS = object()
+
+
+class TTLCache:
+    """Bounded LRU cache whose entries expire after a per-entry TTL.
+
+    Expiry uses wall-clock time so entries can be snapshotted to disk and
+    reloaded by a restarted worker.
+    """
+
+    def __init__(self, name: str, maxsize: int, ttl: float):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=_CACHE_MISS):
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        expires_at, value = entry
+        if expires_at <= time.time():
+            del self._data[key]
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key, value, ttl: float | None = None):
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+    def snapshot(self) -> list:
+        now = time.time()
+        return [[key, expires_at, value] for key, (expires_at, value) in self._data.items() if expires_at > now]
+
+    def load_snapshot(self, entries: list) -> int:
+        now = time.time()
+        loaded = 0
+        for key, expires_at, value in entries:
+            if expires_at > now:
+                self._data[key] = (expires_at, value)
+                loaded += 1
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+        return loaded
+
+
+class SingleFlight:
+    """Coalesce concurrent calls for the same key into one in-flight task."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: dict = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key, coro_factory):
+        task = self._inflight.get(key)
+        if task is None:
+            self.calls += 1
+            task = asyncio.create_task(coro_factory())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _t: self._inflight.pop(key, None))
+        else:
+            self.coalesced += 1
+        # Shield so one cancelled waiter does not cancel the shared upstream call
+        return await asyncio.shield(task)
+
+    def stats(self) -> dict:
+        return {"inflight": len(self._inflight), "calls": self.calls, "coalesced": self.coalesced}
+
+
+# Fire-and-forget work (cache fills); the event loop only keeps weak references to tasks
+background_tasks: set[asyncio.Task] = set()
+
+
+def _background_done(task: asyncio.Task):
+    background_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logging.error(f"Background task {task.get_name()} failed: {task.exception()!r}")
+
+
+def spawn_background(coro, name: str | None = None) -> asyncio.Task:
+    task = asyncio.create_task(coro, name=name)
+    background_tasks.add(task)
+    task.add_done_callback(_background_done)
+    return task
+
+
+session_store = open_session_store(
+    SESSION_STORE_URL,
+    max_turns=CHAT_HISTORY_MAX_TURNS,
+    max_bytes=CHAT_HISTORY_MAX_BYTES,
+    idle_ttl=CHAT_HISTORY_IDLE_TTL,
+    total_bytes=CHAT_HISTORY_TOTAL_BYTES,
+)
+geocode_cache = TTLCache("geocode", GEOCODE_CACHE_SIZE, GEOCODE_CACHE_TTL)
+weather_cache = TTLCache("weather", WEATHER_CACHE_SIZE, WEATHER_CACHE_TTL)
+weather_flights = SingleFlight("weather")
+web_search_cache = TTLCache("web_search", WEB_SEARCH_CACHE_SIZE, WEB_SEARCH_CACHE_TTL)
+web_search_flights = SingleFlight("web_search")
+
+
+# --- On-Disk Audio Cache ---
+# Temp files of in-flight downloads are named "<pid>-....part"; other workers' are left alone unless this old
+DISK_CACHE_STALE_PART_AGE = 3600
+# Streamed entries are handed to a worker thread in batches of about this size rather than per chunk
+DISK_CACHE_WRITE_BATCH = 256 * 1024
+
+
+class DiskLRUCache:
+    """Size-bounded LRU of files in one directory, each named by the SHA-256 of its key.
+
+    The directory is the source of truth, so several worker processes can
+    share it: recency is the file mtime (touched on every hit), a file another
+    worker wrote is adopted on lookup, and the index is rebuilt from the
+    directory before each eviction pass so the size budget covers every
+    worker's files. Methods do blocking file I/O, so async callers run them
+    with asyncio.to_thread; the index is guarded by a lock for that reason.
+    """
+
+    def __init__(self, name: str, directory: str, max_bytes: int, max_entry_bytes: int):
+        self.name = name
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self._index: OrderedDict[str, int] | None = None
+        self._lock = threading.RLock()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bytes_written = 0
+
+    def _load(self) -> OrderedDict:
+        with self._lock:
+            return self._load_locked()
+
+    def _load_locked(self) -> OrderedDict:
+        if self._index is None:
+            os.makedirs(self.directory, exist_ok=True)
+            self._scan(sweep_parts=True)
+            self._evict()
+        return self._index
+
+    def _scan(self, sweep_parts: bool = False):
+        """Rebuild the index from the directory, oldest mtime first (ties keep this worker's order)."""
+        known = {name: rank for rank, name in enumerate(self._index or ())}
+        entries = []
+        own_prefix = f"{os.getpid()}-"
+        stale_before = time.time() - DISK_CACHE_STALE_PART_AGE
+        for entry in os.scandir(self.directory):
+            try:
+                if entry.name.endswith(".part"):
+                    # Left behind by a download that was cut off (in this process, or long ago in any)
+                    if sweep_parts and (entry.name.startswith(own_prefix) or entry.stat().st_mtime < stale_before):
+                        os.remove(entry.path)
+                elif entry.is_file():
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime_ns, known.get(entry.name, -1), entry.name, stat.st_size))
+            except FileNotFoundError:
+                pass  # evicted by another worker mid-scan
+        self._index = OrderedDict((name, size) for _, _, name, size in sorted(entries))
+        self.size = sum(self._index.values())
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    @staticmethod
+    def key_name(key: str) -> str:
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    def get_path(self, key: str) -> str | None:
+        name = self.key_name(key)
+        path = self._path(name)
+        with self._lock:
+            index = self._load_locked()
+            self.size -= index.pop(name, 0)
+            try:
+                # Also finds files written by another worker since the index was built
+                size = os.stat(path).st_size
+                os.utime(path)
+            except FileNotFoundError:
+                self.misses += 1
+                return None
+            index[name] = size
+            self.size += size
+            self.hits += 1
+            return path
+
+    def writer(self, key: str) -> "DiskCacheWriter":
+        self._load()
+        return DiskCacheWriter(self, self.key_name(key))
+
+    def put(self, key: str, data: bytes) -> bool:
+        writer = self.writer(key)
+        writer.write(data)
+        return writer.commit()
+
+    def _add(self, name: str, size: int):
+        with self._lock:
+            self._load_locked()
+            # The file is in place already; rescanning counts other workers' files against max_bytes too
+            self._scan()
+            self.bytes_written += size
+            self._evict()
+
+    def _evict(self):
+        while self.size > self.max_bytes and self._index:
+            name, size = self._index.popitem(last=False)
+            self.size -= size
+            self.evictions += 1
+            try:
+                os.remove(self._path(name))
+            except FileNotFoundError:
+                pass
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._index or ()),
+            "bytes": self.size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "bytes_written": self.bytes_written,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class DiskCacheWriter:
+    """Streams one entry to a temporary file; commit() publishes it atomically, abort() discards it."""
+
+    def __init__(self, cache: DiskLRUCache, name: str):
+        self.cache = cache
+        self.name = name
+        self.size = 0
+        fd, self.temp_path = tempfile.mkstemp(dir=cache.directory, prefix=f"{os.getpid()}-", suffix=".part")
+        self._file = os.fdopen(fd, "wb")
+
+    def write(self, chunk: bytes):
+        if self._file is None:
+            return
+        self.size += len(chunk)
+        if self.size > self.cache.max_entry_bytes:
+            self.abort()
+            return
+        try:
+            self._file.write(chunk)
+        except OSError as e:
+            logging.warning(f"Disk cache {self.cache.name}: write failed, entry dropped: {e}")
+            self.abort()
+
+    def commit(self, expected_size: int | None = None) -> bool:
+        """Publish the entry; False (never an exception) if it is incomplete or the file went away."""
+        if self._file is None:
+            return False
+        try:
+            self._file.close()
+            self._file = None
+            if expected_size is not None and expected_size != self.size:
+                os.remove(self.temp_path)
+                return False
+            os.replace(self.temp_path, self.cache._path(self.name))
+        except OSError as e:
+            logging.warning(f"Disk cache {self.cache.name}: could not publish entry: {e}")
+            self._file = None
+            return False
+        self.cache._add(self.name, self.size)
+        return True
+
+    def abort(self):
+        if self._file is None:
+            return
+        self._file.close()
+        self._file = None
+        try:
+            os.remove(self.temp_path)
+        except FileNotFoundError:
+            pass
+
+
+audio_file_cache = DiskLRUCache("audio_files", AUDIO_CACHE_DIR, AUDIO_CACHE_MAX_BYTES, AUDIO_CACHE_MAX_FILE_BYTES)
+
+
+# --- TTS Audio Cache ---
+AUDIO_CHUNK_LENGTH = struct.Struct("<I")
+
+
+def tts_cache_key(text: str, voice: str, audio_format: str, sample_rate: int) -> str:
+    """Content address of a rendering; whitespace differences do not change the audio."""
+    normalized = " ".join(text.split())
+    return hashlib.sha256(f"{voice}\x1f{audio_format}\x1f{sample_rate}\x1f{normalized}".encode()).hexdigest()
+
+
+class TtsAudioCache:
+    """Rendered speech, looked up before paying for a Murf round trip.
+
+    Streamed replies are stored as the list of Murf audio chunks (memory LRU
+    bounded by bytes, written through to disk) so a hit replays through the
+    same per-client output path. One-shot renders are stored on disk as the
+    audio file itself and served from a local URL. Disk reads and writes run
+    in a worker thread; a memory hit is answered without one.
+    """
+
+    def __init__(self, memory_bytes: int, disk: DiskLRUCache):
+        self.memory_bytes = memory_bytes
+        self.disk = disk
+        self._memory: OrderedDict[str, list[bytes]] = OrderedDict()
+        self._memory_size = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.bytes_saved = 0
+
+    async def get_chunks(self, key: str) -> list[bytes] | None:
+        chunks = self._memory.get(key)
+        if chunks is not None:
+            self._memory.move_to_end(key)
+            self.memory_hits += 1
+        else:
+            chunks = await asyncio.to_thread(self._read_chunks, key)
+            if chunks is None:
+                self.misses += 1
+                return None
+            self._remember(key, chunks)
+            self.disk_hits += 1
+        self.bytes_saved += sum(map(len, chunks))
+        return chunks
+
+    def _read_chunks(self, key: str) -> list[bytes] | None:
+        path = self.disk.get_path(key)
+        if path is None:
+            return None
+        try:
+            with open(path, "rb") as f:
+                return unpack_audio_chunks(f.read())
+        except FileNotFoundError:
+            return None
+
+    async def put_chunks(self, key: str, chunks: list[bytes]):
+        if not chunks or sum(map(len, chunks)) > self.disk.max_entry_bytes:
+            return
+        self._remember(key, chunks)
+        await asyncio.to_thread(lambda: self.disk.put(key, pack_audio_chunks(chunks)))
+        self.stores += 1
+
+    def _remember(self, key: str, chunks: list[bytes]):
+        self._memory_size -= sum(map(len, self._memory.pop(key, ())))
+        self._memory[key] = chunks
+        self._memory_size += sum(map(len, chunks))
+        while self._memory_size > self.memory_bytes and self._memory:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_size -= sum(map(len, evicted))
+
+    async def read_file(self, key: str) -> bytes | None:
+        data = await asyncio.to_thread(self._read_file, key)
+        if data is None:
+            self.misses += 1
+            return None
+        self.disk_hits += 1
+        self.bytes_saved += len(data)
+        return data
+
+    def _read_file(self, key: str) -> bytes | None:
+        path = self.disk.get_path(key)
+        if path is None:
+            return None
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    async def has_file(self, key: str) -> bool:
+        size = await asyncio.to_thread(self._file_size, key)
+        if size is None:
+            self.misses += 1
+            return False
+        self.disk_hits += 1
+        self.bytes_saved += size
+        return True
+
+    def _file_size(self, key: str) -> int | None:
+        path = self.disk.get_path(key)
+        try:
+            return os.path.getsize(path) if path else None
+        except FileNotFoundError:
+            return None
+
+    async def put_file(self, key: str, data: bytes):
+        if await asyncio.to_thread(self.disk.put, key, data):
+            self.stores += 1
+
+    def stats(self) -> dict:
+        hits = self.memory_hits + self.disk_hits
+        lookups = hits + self.misses
+        return {
+            "memory_entries": len(self._memory),
+            "memory_bytes": self._memory_size,
+            "disk_entries": self.disk.stats()["entries"],
+            "disk_bytes": self.disk.size,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+            "bytes_saved": self.bytes_saved,
+        }
+
+
+def pack_audio_chunks(chunks: list[bytes]) -> bytes:
+    return b"".join(AUDIO_CHUNK_LENGTH.pack(len(chunk)) + chunk for chunk in chunks)
+
+
+def unpack_audio_chunks(data: bytes) -> list[bytes]:
+    chunks, offset = [], 0
+    while offset < len(data):
+        (length,) = AUDIO_CHUNK_LENGTH.unpack_from(data, offset)
+        offset += AUDIO_CHUNK_LENGTH.size
+        chunks.append(data[offset:offset + length])
+        offset += length
+    return chunks
+
+
+def sniff_audio_type(head: bytes) -> str:
+    if head.startswith(b"RIFF"):
+        return "audio/wav"
+    if head.startswith(b"OggS"):
+        return "audio/ogg"
+    return "audio/mpeg"
+
+
+def sniff_audio_file(path: str) -> str:
+    with open(path, "rb") as f:
+        return sniff_audio_type(f.read(4))
+
+
+tts_audio_cache = TtsAudioCache(
+    TTS_CACHE_MEMORY_BYTES,
+    DiskLRUCache("tts_audio", TTS_CACHE_DIR, TTS_CACHE_DISK_BYTES, TTS_CACHE_MAX_ENTRY_BYTES),
+)
+
+
+def weather_grid_key(lat: float, lon: float) -> tuple[float, float]:
+    """Snap coordinates to the weather model grid so nearby lookups share a cache entry."""
+    step = WEATHER_GRID_DEGREES
+    return round(round(lat / step) * step, 4), round(round(lon / step) * step, 4)
+
+
+def normalize_city_name(city_name: str) -> str:
+    """Normalize a city name for cache lookups ("  New-York! " -> "new york")."""
+    cleaned = re.sub(r"[^\w\s]", " ", (city_name or "").lower())
+    return " ".join(cleaned.split())
+
+
+_gazetteer: Gazetteer | None = None
+_gazetteer_loaded = False
+gazetteer_stats = {"hits": 0, "misses": 0}
+
+
+def get_gazetteer() -> Gazetteer | None:
+    """Open the offline gazetteer once; returns None when it is disabled or missing."""
+    global _gazetteer, _gazetteer_loaded
+    if not _gazetteer_loaded:
+        _gazetteer_loaded = True
+        if GAZETTEER_PATH and os.path.exists(GAZETTEER_PATH):
+            try:
+                _gazetteer = Gazetteer(GAZETTEER_PATH)
+                logging.info(f"Loaded offline gazetteer with {len(_gazetteer)} entries from {GAZETTEER_PATH}")
+            except Exception as e:
+                logging.error(f"Failed to load gazetteer {GAZETTEER_PATH}: {e}")
+        elif GAZETTEER_PATH:
+            logging.warning(f"Gazetteer {GAZETTEER_PATH} not found; using the geocoding API only.")
+    return _gazetteer
+
+
+def load_geocode_snapshot(path: str | None = GEOCODE_CACHE_PATH) -> int:
+    if not path or not os.path.exists(path):
+        return 0
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            entries = json.load(f)
+        # Only positive results are persisted; coordinates come back as lists from JSON
+        loaded = geocode_cache.load_snapshot(
+            [[key, expires_at, tuple(value)] for key, expires_at, value in entries if value]
+        )
+        logging.info(f"Loaded {loaded} geocoding cache entries from {path}")
+        return loaded
+    except Exception as e:
+        logging.error(f"Failed to load geocoding cache snapshot {path}: {e}")
+        return 0
+
+
+def save_geocode_snapshot(path: str | None = GEOCODE_CACHE_PATH) -> int:
+    if not path:
+        return 0
+    try:
+        entries = [entry for entry in geocode_cache.snapshot() if entry[2] is not None]
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entries, f)
+        os.replace(tmp_path, path)
+        logging.info(f"Saved {len(entries)} geocoding cache entries to {path}")
+        return len(entries)
+    except Exception as e:
+        logging.error(f"Failed to save geocoding cache snapshot {path}: {e}")
+        return 0
 
 
 # --- Weather Skill Functions ---
 async def get_coordinates(city_name: str) -> tuple[float, float] | None:
-    """Get latitude and longitude for a city using Open-Meteo Geocoding API."""
+    """Get latitude and longitude for a city, served from the geocoding cache when possible."""
+    key = normalize_city_name(city_name)
+    if not key:
+        return None
+
+    cached = geocode_cache.get(key)
+    if cached is not _CACHE_MISS:
+        logging.info(f"Geocoding cache hit for {city_name}: {cached}")
+        return cached
+
+    gazetteer = get_gazetteer()
+    if gazetteer is not None:
+        place = gazetteer.lookup(city_name)
+        if place is not None:
+            gazetteer_stats["hits"] += 1
+            logging.info(f"Gazetteer match for {city_name}: {place.name} ({place.latitude}, {place.longitude})")
+            return place.latitude, place.longitude
+        gazetteer_stats["misses"] += 1
+
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            params = {"name": city_name.strip(), "count": 1, "language": "en", "format": "json"}
-            response = await client.get(GEOCODING_API_URL, params=params)
-            response.raise_for_status()
-            
-            data = response.json()
-            results = data.get("results", [])
-            
-            if not results:
-                logging.warning(f"No coordinates found for city: {city_name}")
-                return None
-            
-            location = results[0]
-            lat = location.get("latitude")
-            lon = location.get("longitude")
-            
-            if lat is None or lon is None:
-                logging.warning(f"Invalid coordinates for city: {city_name}")
-                return None
-            
-            logging.info(f"Found coordinates for {city_name}: {lat}, {lon}")
-            return float(lat), float(lon)
-            
+        coords = await fetch_coordinates(city_name)
     except Exception as e:
+        # Network/API failures are not cached so the next turn retries
         logging.error(f"Error getting coordinates for {city_name}: {e}")
         return None
 
+    if coords is None:
+        geocode_cache.set(key, None, ttl=GEOCODE_NEGATIVE_TTL)
+    else:
+        geocode_cache.set(key, coords)
+    return coords
+
+
+async def fetch_coordinates(city_name: str) -> tuple[float, float] | None:
+    """Look up a city with the Open-Meteo Geocoding API; returns None when not found, raises on failure."""
+    params = {"name": city_name.strip(), "count": 1, "language": "en", "format": "json"}
+    response = await resilient_get("open_meteo", GEOCODING_API_URL, params=params)
+    
+    data = response.json()
+    results = data.get("results", [])
+    
+    if not results:
+        logging.warning(f"No coordinates found for city: {city_name}")
+        return None
+    
+    location = results[0]
+    lat = location.get("latitude")
+    lon = location.get("longitude")
+    
+    if lat is None or lon is None:
+        logging.warning(f"Invalid coordinates for city: {city_name}")
+        return None
+    
+    logging.info(f"Found coordinates for {city_name}: {lat}, {lon}")
+    return float(lat), float(lon)
+
 
 async def get_weather(lat: float, lon: float) -> dict | None:
+    """Get current weather data, shared across sessions via a short-TTL grid cache."""
+    key = weather_grid_key(lat, lon)
+    cached = weather_cache.get(key)
+    if cached is not _CACHE_MISS:
+        logging.info(f"Weather cache hit for {key}")
+        return dict(cached)
+
+    async def load():
+        weather_data = await fetch_weather(*key)
+        if weather_data:
+            weather_cache.set(key, weather_data)
+        return weather_data
+
+    weather_data = await weather_flights.do(key, load)
+    return dict(weather_data) if weather_data else None
+
+
+async def fetch_weather(lat: float, lon: float) -> dict | None:
     """Get current weather data using Open-Meteo Weather API."""
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            params = {
-                "latitude": lat,
-                "longitude": lon,
-                "current_weather": "true",
-                "hourly": "temperature_2m,relative_humidity_2m,wind_speed_10m,weather_code"
-            }
-            response = await client.get(WEATHER_API_URL, params=params)
-            response.raise_for_status()
-            
-            data = response.json()
-            current_weather = data.get("current_weather", {})
-            hourly_data = data.get("hourly", {})
-            
-            if not current_weather:
-                logging.warning("No current weather data received")
-                return None
-            
-            # Get current hour index
-            current_time = current_weather.get("time")
-            if current_time and hourly_data.get("time"):
-                try:
-                    current_hour_idx = hourly_data["time"].index(current_time)
-                except ValueError:
-                    current_hour_idx = 0
-            else:
-                current_hour_idx = 0
-            
-            # Weather code descriptions
-            weather_descriptions = {
-                0: "Clear sky", 1: "Mainly clear", 2: "Partly cloudy", 3: "Overcast",
-                45: "Foggy", 48: "Depositing rime fog", 51: "Light drizzle",
-                53: "Moderate drizzle", 55: "Dense drizzle", 56: "Light freezing drizzle",
-                57: "Dense freezing drizzle", 61: "Slight rain", 63: "Moderate rain",
-                65: "Heavy rain", 66: "Light freezing rain", 67: "Heavy freezing rain",
-                71: "Slight snow", 73: "Moderate snow", 75: "Heavy snow",
-                77: "Snow grains", 80: "Slight rain showers", 81: "Moderate rain showers",
-                82: "Violent rain showers", 85: "Slight snow showers", 86: "Heavy snow showers",
-                95: "Thunderstorm", 96: "Thunderstorm with slight hail", 99: "Thunderstorm with heavy hail"
-            }
-            
-            weather_code = current_weather.get("weathercode", 0)
-            description = weather_descriptions.get(weather_code, "Unknown")
-            
-            # Get additional data from hourly if available
-            humidity = None
-            if hourly_data.get("relative_humidity_2m") and len(hourly_data["relative_humidity_2m"]) > current_hour_idx:
-                humidity = hourly_data["relative_humidity_2m"][current_hour_idx]
-            
-            wind_speed = current_weather.get("windspeed")
-            if wind_speed is None and hourly_data.get("wind_speed_10m") and len(hourly_data["wind_speed_10m"]) > current_hour_idx:
-                wind_speed = hourly_data["wind_speed_10m"][current_hour_idx]
-            
-            weather_data = {
-                "temperature": current_weather.get("temperature"),
-                "wind_speed": wind_speed,
-                "description": description,
-                "weather_code": weather_code,
-                "humidity": humidity
-            }
-            
-            logging.info(f"Weather data retrieved: {weather_data}")
-            return weather_data
-            
+        params = {"latitude": lat, "longitude": lon, "current": WEATHER_CURRENT_FIELDS}
+        response = await resilient_get("open_meteo", WEATHER_API_URL, params=params)
+        
+        weather_data = parse_current_weather(response.json())
+        if not weather_data:
+            logging.warning("No current weather data received")
+            return None
+        
+        logging.info(f"Weather data retrieved: {weather_data}")
+        return weather_data
+        
     except Exception as e:
         logging.error(f"Error getting weather data: {e}")
         return None
 
 
+async def fetch_weather_batch(coords: list[tuple[float, float]]) -> list[dict | None]:
+    """Get current weather for several locations with one multi-coordinate Open-Meteo call."""
+    try:
+        params = {
+            "latitude": ",".join(str(lat) for lat, _ in coords),
+            "longitude": ",".join(str(lon) for _, lon in coords),
+            "current": WEATHER_CURRENT_FIELDS,
+        }
+        response = await resilient_get("open_meteo", WEATHER_API_URL, params=params)
+        
+        data = response.json()
+        # A single location comes back as an object, several as a list in request order
+        locations = data if isinstance(data, list) else [data]
+        results = [parse_current_weather(location) for location in locations]
+        results += [None] * (len(coords) - len(results))
+        logging.info(f"Batched weather data retrieved for {len(coords)} locations")
+        return results[:len(coords)]
+        
+    except Exception as e:
+        logging.error(f"Error getting batched weather data: {e}")
+        return [None] * len(coords)
+
+
+def parse_current_weather(data: dict) -> dict | None:
+    """Extract the fields the skill needs from an Open-Meteo `current=` payload."""
+    current = (data or {}).get("current") or {}
+    if not current or current.get("temperature_2m") is None:
+        return None
+    
+    weather_code = current.get("weather_code", 0)
+    return {
+        "temperature": current.get("temperature_2m"),
+        "wind_speed": current.get("wind_speed_10m"),
+        "description": WEATHER_CODE_DESCRIPTIONS.get(weather_code, "Unknown"),
+        "weather_code": weather_code,
+        "humidity": current.get("relative_humidity_2m")
+    }
+
+
+async def get_weather_batch(coords: list[tuple[float, float]]) -> list[dict | None]:
+    """Get current weather for several locations, fetching all cache misses in one request."""
+    keys = [weather_grid_key(lat, lon) for lat, lon in coords]
+    found = {}
+    for key in keys:
+        cached = weather_cache.get(key)
+        if cached is not _CACHE_MISS:
+            found[key] = cached
+    
+    missing = list(dict.fromkeys(key for key in keys if key not in found))
+    if len(missing) == 1:
+        found[missing[0]] = await get_weather(*missing[0])
+    elif missing:
+        for key, weather_data in zip(missing, await fetch_weather_batch(missing)):
+            if weather_data:
+                weather_cache.set(key, weather_data)
+            found[key] = weather_data
+    
+    return [dict(found[key]) if found.get(key) else None for key in keys]
+
+
+# Place names that contain "and" themselves (normalized); the gazetteer, when present, knows more
+PLACE_NAMES_WITH_AND = frozenset({
+    "antigua and barbuda", "bosnia and herzegovina", "saint kitts and nevis", "st kitts and nevis",
+    "saint vincent and the grenadines", "sao tome and principe", "trinidad and tobago",
+    "turks and caicos", "turks and caicos islands", "wallis and futuna",
+})
+# Region or country codes that qualify the city before them ("New York, NY"); no city is named like this
+CITY_QUALIFIER_PATTERN = re.compile(r"[a-z]{2}|usa|uae", re.IGNORECASE)
+CITY_CONJUNCTION_PATTERN = re.compile(r"\s*(?:&|\band\b|\bvs\.?\b)\s*", re.IGNORECASE)
+
+
+def is_place_name_with_and(name: str) -> bool:
+    key = normalize_city_name(name)
+    if " and " not in f" {key} ":
+        return False
+    if key in PLACE_NAMES_WITH_AND:
+        return True
+    gazetteer = get_gazetteer()
+    return gazetteer is not None and gazetteer.exact(key) is not None
+
+
+def split_city_names(city_name: str) -> list[str]:
+    """Split "Paris, Berlin and Rome" into individual city names.
+
+    Commas list cities only when a conjunction follows them; otherwise what follows
+    a comma qualifies the city before it ("Rome, Italy", "New York, NY"), as does a
+    region code anywhere. "and" inside a place name ("Trinidad and Tobago") does not split it.
+    """
+    segments = re.split(r"\s*,\s*", (city_name or "").strip())
+    listing = any(CITY_CONJUNCTION_PATTERN.search(segment) for segment in segments[1:])
+    cities = []
+    for segment in segments:
+        if not segment:
+            continue
+        if cities and not listing:
+            continue
+        parts = [segment] if is_place_name_with_and(segment) else CITY_CONJUNCTION_PATTERN.split(segment)
+        if cities and CITY_QUALIFIER_PATTERN.fullmatch(parts[0]):
+            parts = parts[1:]  # "Boston, MA and Austin"
+        cities.extend(parts)
+    cities = list(dict.fromkeys(city.strip() for city in cities if city and city.strip()))
+    return cities[:WEATHER_MAX_CITIES]
+
+
 async def weather_skill(city_name: str) -> dict | None:
-    """Complete weather skill: get coordinates and weather data for a city."""
+    """Complete weather skill: get coordinates and weather data for one or more cities."""
+    cities = split_city_names(city_name)
+    if len(cities) > 1:
+        return await multi_city_weather_skill(cities)
+    if cities:
+        city_name = cities[0]
+
     try:
         # Get coordinates
         coords = await get_coordinates(city_name)
@@ -229,153 +1282,1181 @@ async def weather_skill(city_name: str) -> dict | None:
         }
 
 
-def is_weather_query(text: str) -> tuple[bool, str | None]:
-    """Check if the user query is about weather and extract city name."""
-    text_lower = text.lower().strip()
-    
-    # Check for weather keywords
-    has_weather_keyword = any(keyword in text_lower for keyword in WEATHER_KEYWORDS)
-    
-    if not has_weather_keyword:
-        return False, None
-    
-    # Extract city name using patterns
-    for pattern in WEATHER_PATTERNS:
-        match = re.search(pattern, text_lower, re.IGNORECASE)
-        if match:
-            city_name = match.group(1).strip()
-            # Clean up the city name
-            city_name = re.sub(r'\?|\.|!|,', '', city_name).strip()
-            if city_name:
-                return True, city_name
-    
-    # If we have weather keywords but no city pattern match, try to extract city
-    # This handles cases like "weather Paris" or "temperature in London"
-    words = text_lower.split()
-    for i, word in enumerate(words):
-        if word in WEATHER_KEYWORDS and i + 1 < len(words):
-            potential_city = words[i + 1]
-            # Skip common words that aren't cities
-            if potential_city not in ['in', 'at', 'for', 'the', 'is', 'like', 'today', 'now']:
-                return True, potential_city
-    
-    return False, None
+async def multi_city_weather_skill(cities: list[str]) -> dict:
+    """Weather for several cities: geocode concurrently, then one batched weather call."""
+    try:
+        coords = await asyncio.gather(*(get_coordinates(city) for city in cities))
+        resolved = [(city, c) for city, c in zip(cities, coords) if c]
+        missing = [city for city, c in zip(cities, coords) if not c]
+        if not resolved:
+            return {
+                "error": f"Sorry, I couldn't find {' or '.join(cities)}. Could you check the spelling or try a different city?"
+            }
+        
+        weather_list = await get_weather_batch([c for _, c in resolved])
+        results = []
+        for (city, _), weather_data in zip(resolved, weather_list):
+            if not weather_data:
+                missing.append(city)
+                continue
+            results.append({
+                "city": city,
+                "temperature": weather_data["temperature"],
+                "wind_speed": weather_data["wind_speed"],
+                "description": weather_data["description"],
+                "humidity": weather_data.get("humidity")
+            })
+        
+        if not results:
+            return {
+                "error": "I'm having trouble getting the weather for those cities right now. Please try again later."
+            }
+        
+        response = {"cities": results, "unavailable": missing}
+        logging.info(f"Multi-city weather skill response: {response}")
+        return response
+        
+    except Exception as e:
+        logging.error(f"Multi-city weather skill error: {e}")
+        return {
+            "error": "Sorry, I'm having trouble with the weather service right now."
+        }
+
+
+# --- Intent Router ---
+class Intent(str, Enum):
+    WEATHER = "weather"
+    WEB_SEARCH = "web_search"
+    CHAT = "chat"
+
+
+class Route(NamedTuple):
+    intent: Intent
+    slots: dict
+
+
+class IntentRouter:
+    """Classify a transcript into an intent (plus slots) with one precompiled keyword scan.
+
+    The keywords of every skill are folded into one prefix trie compiled as a
+    single regex, and each match maps back to the skills owning that keyword, so
+    detecting which skills are mentioned is one regex pass that does not grow
+    linearly with the number of registered skills. Slot patterns then run only
+    for skills whose keywords were seen. Skills are resolved in registration
+    order; the first one that fires wins, and CHAT is the default.
+    """
+
+    def __init__(self):
+        self._skills = []
+        self._scanner = None
+        self._keyword_skills = {}
+
+    def register(self, intent: Intent, keywords: list[str], slot_patterns: list[str] | None = None,
+                 slot_name: str | None = None):
+        """Add a skill.
+
+        With `slot_patterns`, the skill fires only when one of its keywords is
+        present and a pattern yields a non-empty slot (patterns are tried in
+        order, each with exactly one capture group). Without, any keyword fires it.
+        """
+        compiled = [re.compile(pattern, re.IGNORECASE) for pattern in slot_patterns or []]
+        self._skills.append((intent, list(keywords), compiled, slot_name))
+        self._scanner = None
+
+    @staticmethod
+    def _trie_pattern(words: list[str]) -> str:
+        """Regex alternation of `words` with shared prefixes merged ("hot|how much" -> "ho(?:t|w much)")."""
+        trie = {}
+        for word in words:
+            node = trie
+            for ch in word:
+                node = node.setdefault(ch, {})
+            node[""] = {}
+
+        def build(node) -> str:
+            branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+            if not branches:
+                return ""
+            body = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+            # A word ending here is an empty alternative; try the longer branches first
+            return f"(?:{body})?" if "" in node else body
+
+        return build(trie)
+
+    def _compile(self):
+        # keyword -> skills that fire on it, including skills owning a keyword that is a prefix of it,
+        # because the scan reports only the longest keyword starting at each position
+        owners = {}
+        for s, (_, keywords, _, _) in enumerate(self._skills):
+            for keyword in keywords:
+                owners.setdefault(keyword.lower(), set()).add(s)
+        self._keyword_skills = {
+            keyword: frozenset().union(*(owners[keyword[:i]] for i in range(1, len(keyword) + 1) if keyword[:i] in owners))
+            for keyword in owners
+        }
+        # One trie over every skill's keywords, in a zero-width lookahead so overlapping keywords are all seen
+        self._scanner = re.compile(f"(?=({self._trie_pattern(list(owners))}))")
+
+    def route(self, text: str) -> Route:
+        if self._scanner is None:
+            self._compile()
+        text_lower = (text or "").lower()
+        keyword_hits = set()
+        for match in self._scanner.finditer(text_lower):
+            keyword_hits |= self._keyword_skills[match.group(1)]
+
+        for s, (intent, _, patterns, slot_name) in enumerate(self._skills):
+            if s not in keyword_hits:
+                continue
+            if not patterns:
+                return Route(intent, {})
+            for pattern in patterns:
+                match = pattern.search(text_lower)
+                if match:
+                    # Commas stay: they separate cities ("paris, berlin and rome") or qualify one ("new york, ny")
+                    slot = re.sub(r'[?.!]', '', match.group(1)).strip(" ,")
+                    if slot:
+                        return Route(intent, {slot_name: slot})
+        return Route(Intent.CHAT, {})
+
+
+# Legacy fallback: a weather keyword as a whole word followed by a word that is not filler ("weather paris")
+WEATHER_FALLBACK_PATTERN = (
+    r"(?<!\S)(?:" + "|".join(WEATHER_KEYWORDS) + r")\s+"
+    r"(?!(?:in|at|for|the|is|like|today|now)(?!\S))(\S+)"
+)
+
+WEB_KEYWORDS = [
+    "who won", "winner", "latest", "breaking", "news", "today",
+    "price", "prices", "cost", "how much", "release date", "2024", "2025", "2026",
+    "score", "result", "final", "vs ", "schedule", "fixtures",
+]
+
+intent_router = IntentRouter()
+intent_router.register(Intent.WEATHER, WEATHER_KEYWORDS, WEATHER_PATTERNS + [WEATHER_FALLBACK_PATTERN], slot_name="city")
+intent_router.register(Intent.WEB_SEARCH, WEB_KEYWORDS)
+
+
+def is_weather_query(text: str) -> tuple[bool, str | None]:
+    """Check if the user query is about weather and extract city name."""
+    route = intent_router.route(text)
+    if route.intent is Intent.WEATHER:
+        return True, route.slots["city"]
+    return False, None
+
+
+def format_weather_response(weather_data: dict) -> str:
+    """Format weather data into a natural language response."""
+    if "error" in weather_data:
+        return weather_data["error"]
+    
+    if "cities" in weather_data:
+        response_parts = [format_weather_response(city_data) for city_data in weather_data["cities"]]
+        unavailable = weather_data.get("unavailable") or []
+        if unavailable:
+            response_parts.append(f"I couldn't get the weather for {' or '.join(unavailable)}.")
+        return " ".join(response_parts)
+    
+    city = weather_data["city"]
+    temp = weather_data["temperature"]
+    wind = weather_data["wind_speed"]
+    desc = weather_data["description"]
+    humidity = weather_data.get("humidity")
+    
+    # Format temperature
+    temp_str = f"{temp:.1f}°C"
+    
+    # Format wind speed
+    wind_str = f"{wind:.1f} km/h"
+    
+    # Build response
+    response_parts = [f"Here's the weather in {city}:"]
+    response_parts.append(f"It's currently {temp_str} with {desc.lower()}.")
+    
+    if wind and wind > 0:
+        response_parts.append(f"The wind is blowing at {wind_str}.")
+    
+    if humidity:
+        response_parts.append(f"Humidity is at {humidity}%.")
+    
+    return " ".join(response_parts)
+
+
+# --- Web Search Helper (Tavily) ---
+TAVILY_SEARCH_OPTIONS = {
+    "search_depth": "advanced",
+    "include_images": False,
+    "include_answer": True,
+    "max_results": 8,
+}
+
+# Per-key clients are reused instead of being rebuilt on every search (LRU-bounded)
+_tavily_clients: OrderedDict = OrderedDict()
+
+
+def get_tavily_client(api_key: str | None = None, use_async: bool = False):
+    """Return a cached Tavily client for a key (default key when None), or None if unavailable."""
+    key = api_key or TAVILY_API_KEY
+    if not key:
+        return None
+    cache_key = (key, use_async)
+    client = _tavily_clients.get(cache_key)
+    if client is None:
+        try:
+            client = AsyncTavilyClient(api_key=key) if use_async else TavilyClient(api_key=key)
+        except Exception as e:
+            logging.error(f"Failed to initialize Tavily client: {e}")
+            return None
+        _tavily_clients[cache_key] = client
+        while len(_tavily_clients) > TAVILY_CLIENT_CACHE_SIZE:
+            _tavily_clients.popitem(last=False)
+    else:
+        _tavily_clients.move_to_end(cache_key)
+    return client
+
+
+def format_search_response(response: dict) -> str:
+    """Turn a Tavily response into speakable text: the answer, else the top result snippet."""
+    answer = (response.get("answer") or "").strip()
+    results = response.get("results", []) or []
+
+    if answer:
+        return answer
+
+    # Fallback: use the first result content without including sources
+    if results:
+        content = (results[0].get("content") or "").strip()
+        # Return a concise snippet
+        return content[:1200] if content else "No summary available."
+
+    return "No summary available."
+
+
+def webSearch(query: str, api_key: str | None = None) -> str:
+    """Run a Tavily web search and return a clean, formatted summary with sources.
+
+    Blocking; async code should use webSearchAsync instead.
+    """
+    client = get_tavily_client(api_key)
+    if not client:
+        return "Web search is unavailable: missing or invalid TAVILY_API_KEY."
+
+    try:
+        response = client.search(query=query, **TAVILY_SEARCH_OPTIONS)
+        return format_search_response(response)
+    except Exception as e:
+        logging.error(f"Tavily search error: {e}")
+        return "Sorry, web search failed. Please try again later."
+
+
+def normalize_search_query(query: str) -> str:
+    """Cache key for a query: lowercase, no punctuation, no stopwords ("Who won the match today?" -> "who won match today")."""
+    words = re.sub(r"[^\w\s]", " ", (query or "").lower().replace("'", "")).split()
+    kept = [w for w in words if w not in WEB_SEARCH_STOPWORDS]
+    return " ".join(kept or words)
+
+
+def search_cache_ttl(normalized_query: str) -> float:
+    """Short TTL for news/score/price style queries, the default TTL otherwise."""
+    if any(word in WEB_SEARCH_VOLATILE_WORDS for word in normalized_query.split()):
+        return WEB_SEARCH_VOLATILE_TTL
+    return WEB_SEARCH_CACHE_TTL
+
+
+async def webSearchAsync(query: str, api_key: str | None = None, timeout: float = TAVILY_TIMEOUT) -> str:
+    """Non-blocking Tavily web search with a hard timeout and a normalized-query result cache.
+
+    Identical concurrent queries share one Tavily request. Cancelling the
+    calling task stops it waiting; the shared request still finishes (within
+    the timeout) and fills the cache for the next asker.
+    """
+    timeout = remaining_budget(timeout)
+    key = normalize_search_query(query)
+    cached = web_search_cache.get(key)
+    if cached is not _CACHE_MISS:
+        logging.info(f"Web search cache hit for '{key}'")
+        return cached
+
+    client = get_tavily_client(api_key, use_async=True)
+    if not client:
+        return "Web search is unavailable: missing or invalid TAVILY_API_KEY."
+
+    async def load():
+        with upstream_breakers["tavily"].call():
+            if timeout <= 0:
+                raise DeadlineExceeded("Turn deadline passed before the search started.")
+            response = await asyncio.wait_for(client.search(query=query, **TAVILY_SEARCH_OPTIONS), timeout=timeout)
+        text = format_search_response(response)
+        if text != "No summary available.":
+            web_search_cache.set(key, text, ttl=search_cache_ttl(key))
+        return text
+
+    try:
+        return await web_search_flights.do(key, load)
+    except CircuitOpenError as e:
+        logging.warning(f"Skipping Tavily search: {e}")
+        return "Sorry, web search is unavailable right now. Please try again in a little while."
+    except (asyncio.TimeoutError, DeadlineExceeded):
+        logging.error(f"Tavily search timed out after {max(0.0, timeout):.1f}s")
+        return "Sorry, web search is taking too long right now. Please try again in a moment."
+    except Exception as e:
+        logging.error(f"Tavily search error: {e}")
+        return "Sorry, web search failed. Please try again later."
+
+
+# --- Web Query Detection ---
+def is_web_query(text: str) -> bool:
+    """Heuristic: detect queries better answered via web search (news, prices, winners, latest)."""
+    return intent_router.route(text).intent is Intent.WEB_SEARCH
+
+
+# --- Gemini Streaming ---
+GEMINI_MODEL_NAME = "gemini-1.5-flash"
+GEMINI_STREAM_CONFIG = genai.types.GenerationConfig(
+    temperature=0.7,
+    top_p=0.8,
+    top_k=40,
+    max_output_tokens=2048,
+)
+
+# Per-key models with their own async client (LRU-bounded), so concurrent sessions
+# with different keys never race on the process-wide genai.configure()
+_gemini_models: OrderedDict = OrderedDict()
+
+
+def get_gemini_model(api_key: str):
+    """Return a cached streaming model bound to an async client for `api_key`."""
+    model = _gemini_models.get(api_key)
+    if model is None:
+        model = genai.GenerativeModel(
+            GEMINI_MODEL_NAME,
+            system_instruction=f"You are {AGENT_PERSONA}. Keep responses brief, natural, and easy to speak aloud. Avoid markdown unless necessary.",
+        )
+        # GenerativeModel has no client argument; it otherwise picks up the global default client
+        model._async_client = glm.GenerativeServiceAsyncClient(client_options={"api_key": api_key})
+        _gemini_models[api_key] = model
+        while len(_gemini_models) > GEMINI_CLIENT_CACHE_SIZE:
+            _gemini_models.popitem(last=False)
+    else:
+        _gemini_models.move_to_end(api_key)
+    return model
+
+
+def latency_summary(latencies) -> dict:
+    """Sample count, mean and percentiles (in ms) of a window of latencies in seconds."""
+    samples = sorted(latencies)
+    if not samples:
+        return {"samples": 0}
+    return {
+        "samples": len(samples),
+        "avg_ms": round(sum(samples) / len(samples) * 1000, 2),
+        "p50_ms": round(samples[len(samples) // 2] * 1000, 2),
+        "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000, 2),
+        "max_ms": round(samples[-1] * 1000, 2),
+    }
+
+
+# --- Prompt Window ---
+PROMPT_SUMMARY_CONFIG = genai.types.GenerationConfig(temperature=0.2, max_output_tokens=PROMPT_SUMMARY_MAX_TOKENS)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough Gemini token count (~4 characters per token); counting exactly would cost a round trip."""
+    return len(text) // 4 + 1
+
+
+def message_tokens(message: dict) -> int:
+    return sum(estimate_tokens(part) for part in message["parts"])
+
+
+class PromptWindow:
+    """Builds the contents sent to Gemini from a session's stored history.
+
+    The last `turns` turns go in verbatim. Older turns are folded into a
+    running summary by a background Gemini call, so no request waits on it;
+    turns that left the window but are not summarized yet stay verbatim
+    until the summary catches up. The oldest verbatim messages are dropped
+    when the estimate exceeds `token_budget`.
+    """
+
+    def __init__(self, store: SessionStore, turns: int = PROMPT_WINDOW_TURNS,
+                 token_budget: int = PROMPT_TOKEN_BUDGET):
+        self.store = store
+        self.turns = turns
+        self.token_budget = token_budget
+        self._summarizing: dict[str, asyncio.Task] = {}
+        self.summaries = 0
+        self.summary_failures = 0
+        self.budget_trims = 0
+        self.prompt_tokens = deque(maxlen=TURN_LATENCY_SAMPLES)
+
+    async def contents(self, session_id: str, api_key: str | None = None) -> list[dict]:
+        """Prompt contents for the session's newest message (which must already be stored)."""
+        messages, first, summary, summary_upto = await self.store.run(self.store.snapshot, session_id)
+        # The newest message is the turn being answered, preceded by up to `turns` full turns
+        window_start = max(0, len(messages) - 1 - 2 * self.turns)
+        while window_start < len(messages) - 1 and messages[window_start]["role"] != "user":
+            window_start += 1
+
+        # Unsummarized older turns: fold them in off the critical path, meanwhile keep them verbatim
+        verbatim_start = min(window_start, max(0, summary_upto - first))
+        while verbatim_start < window_start and messages[verbatim_start]["role"] != "user":
+            verbatim_start += 1
+        if verbatim_start < window_start and api_key:
+            self._schedule_summary(session_id, api_key, summary, messages[verbatim_start:window_start],
+                                   first + window_start)
+
+        prefix = []
+        if summary:
+            prefix = [
+                {"role": "user", "parts": [f"Summary of our conversation so far: {summary}"]},
+                {"role": "model", "parts": ["Got it."]},
+            ]
+        verbatim = messages[verbatim_start:]
+        tokens = sum(map(message_tokens, prefix + verbatim))
+        while len(verbatim) > 1 and (tokens > self.token_budget or verbatim[0]["role"] != "user"):
+            tokens -= message_tokens(verbatim.pop(0))
+            self.budget_trims += 1
+        self.prompt_tokens.append(tokens)
+        return prefix + verbatim
+
+    def _schedule_summary(self, session_id: str, api_key: str, summary: str, messages: list[dict], upto: int):
+        if session_id in self._summarizing:
+            return
+        task = asyncio.create_task(self._summarize(session_id, api_key, summary, messages, upto))
+        self._summarizing[session_id] = task
+        task.add_done_callback(lambda _t: self._summarizing.pop(session_id, None))
+
+    async def _summarize(self, session_id: str, api_key: str, summary: str, messages: list[dict], upto: int):
+        transcript = "\n".join(f"{m['role']}: {' '.join(m['parts'])}" for m in messages)
+        prompt = (
+            "Update the running summary of a voice conversation with the new turns below. "
+            "Keep names, facts, preferences and open questions; at most a short paragraph, no markdown.\n\n"
+            f"Current summary: {summary or '(none)'}\n\nNew turns:\n{transcript}"
+        )
+        try:
+            with upstream_breakers["gemini"].call(session_key=api_key != GEMINI_API_KEY):
+                response = await get_gemini_model(api_key).generate_content_async(
+                    prompt, generation_config=PROMPT_SUMMARY_CONFIG
+                )
+            text = (response.text or "").strip()
+        except Exception as e:
+            self.summary_failures += 1
+            logging.warning(f"Conversation summary failed for session {session_id}: {e}")
+            return
+        if text:
+            await self.store.run(self.store.set_summary, session_id, text, upto)
+            self.summaries += 1
+
+    def stats(self) -> dict:
+        tokens = sorted(self.prompt_tokens)
+        return {
+            "prompts": len(tokens),
+            "avg_tokens": round(sum(tokens) / len(tokens), 1) if tokens else 0,
+            "max_tokens": tokens[-1] if tokens else 0,
+            "budget_trims": self.budget_trims,
+            "summaries": self.summaries,
+            "summary_failures": self.summary_failures,
+            "summarizing": len(self._summarizing),
+        }
+
+
+prompt_window = PromptWindow(session_store)
+
+
+# --- TTS Text Segmenting ---
+SENTENCE_END_PATTERN = re.compile(r"[.!?\u2026]+[\"')\]]*(?=\s)")
+CLAUSE_END_PATTERN = re.compile(r"[,;:\u2014](?=\s)")
+ABBREVIATIONS = {"mr", "mrs", "ms", "dr", "st", "vs", "etc", "e.g", "i.e", "approx", "no", "jr", "sr"}
+
+
+class TextSegmenter:
+    """Buffers streamed text and cuts it into speakable segments for TTS.
+
+    Segments end on a sentence boundary once at least `min_chars` are
+    buffered. The first segment may also end on a clause boundary, so audio
+    can start sooner. Nothing longer than `max_chars` is held back: it is cut
+    at the last clause boundary or space that fits.
+    """
+
+    def __init__(self, min_chars: int = TTS_SEGMENT_MIN_CHARS, max_chars: int = TTS_SEGMENT_MAX_CHARS):
+        self.min_chars = min_chars
+        self.max_chars = max(max_chars, min_chars)
+        self.buffer = ""
+        self.emitted = 0
+
+    def feed(self, text: str) -> list[str]:
+        """Add streamed text; return the segments that are ready."""
+        self.buffer += text
+        segments = []
+        while (cut := self._find_cut()) is not None:
+            segments.append(self._take(cut))
+        return [segment for segment in segments if segment]
+
+    def flush_partial(self) -> str | None:
+        """Deadline flush: emit what is buffered up to the last complete word."""
+        cut = self.buffer.rstrip().rfind(" ")
+        return self._take(cut) or None if cut > 0 else None
+
+    def finish(self) -> str | None:
+        """End of stream: emit whatever is left."""
+        return self._take(len(self.buffer)) or None
+
+    def _take(self, cut: int) -> str:
+        segment, self.buffer = self.buffer[:cut].strip(), self.buffer[cut:].lstrip()
+        if segment:
+            self.emitted += 1
+        return segment
+
+    def _is_abbreviation(self, end: int) -> bool:
+        words = self.buffer[:end].rstrip(".").split()
+        return bool(words) and words[-1].lower() in ABBREVIATIONS
+
+    def _find_cut(self) -> int | None:
+        buffer = self.buffer
+        for match in SENTENCE_END_PATTERN.finditer(buffer):
+            end = match.end()
+            if end > self.max_chars:
+                break
+            if end >= self.min_chars and not self._is_abbreviation(end):
+                return end
+        if self.emitted == 0:
+            for match in CLAUSE_END_PATTERN.finditer(buffer):
+                end = match.end()
+                if end > self.max_chars:
+                    break
+                if end >= self.min_chars:
+                    return end
+        if len(buffer) <= self.max_chars:
+            return None
+        # Over budget: the last clause boundary that fits, else the last space, else a hard cut
+        window = buffer[:self.max_chars + 1]
+        clause_ends = [m.end() for m in CLAUSE_END_PATTERN.finditer(window) if m.end() >= self.min_chars]
+        if clause_ends:
+            return clause_ends[-1]
+        space = window.rfind(" ")
+        return space if space > 0 else self.max_chars
+
+
+async def segment_text_stream(text_queue: asyncio.Queue, segmenter: TextSegmenter | None = None,
+                              first_flush_deadline: float = TTS_FIRST_FLUSH_DEADLINE):
+    """Yield TTS segments from a queue of streamed text ending with None.
+
+    If no segment is ready `first_flush_deadline` seconds after the first
+    text arrives, the complete words buffered so far are sent anyway.
+    """
+    segmenter = segmenter or TextSegmenter()
+    loop = asyncio.get_running_loop()
+    deadline = None
+    while True:
+        timeout = None
+        if deadline is not None and segmenter.emitted == 0:
+            timeout = max(0.0, deadline - loop.time())
+        try:
+            chunk = await asyncio.wait_for(text_queue.get(), timeout)
+        except asyncio.TimeoutError:
+            deadline = None
+            segment = segmenter.flush_partial()
+            if segment:
+                yield segment
+            continue
+        if chunk is None:
+            rest = segmenter.finish()
+            if rest:
+                yield rest
+            return
+        if deadline is None and segmenter.emitted == 0:
+            deadline = loop.time() + first_flush_deadline
+        for segment in segmenter.feed(chunk):
+            yield segment
+
+
+# --- Binary Audio Frames ---
+# Negotiated per session with {"type": "audio_config", "binary": true}; each audio chunk is then
+# sent as one binary WebSocket frame: header (magic, sample rate, channels, bits per sample) + raw PCM.
+AUDIO_FRAME_MAGIC = b"PCM1"
+AUDIO_FRAME_HEADER = struct.Struct("<4sIHH")
+DEFAULT_PCM_FORMAT = (44100, 1, 16)  # what MURF_STREAM_PARAMS asks Murf for
+
+
+def parse_wav_chunk(data: bytes) -> tuple[tuple[int, int, int] | None, bytes]:
+    """Split a Murf audio chunk into ((sample_rate, channels, bits) or None, PCM bytes).
+
+    Murf's first chunk of a context carries a RIFF/WAV header; later chunks are raw PCM.
+    """
+    if len(data) < 12 or data[:4] != b"RIFF" or data[8:12] != b"WAVE":
+        return None, data
+    fmt, pos = None, 12
+    while pos + 8 <= len(data):
+        chunk_id, size = data[pos:pos + 4], struct.unpack_from("<I", data, pos + 4)[0]
+        body = pos + 8
+        if chunk_id == b"fmt " and size >= 16:
+            _, channels, sample_rate, _, _, bits = struct.unpack_from("<HHIIHH", data, body)
+            fmt = (sample_rate, channels, bits)
+        elif chunk_id == b"data":
+            return fmt, data[body:]
+        pos = body + size + (size & 1)
+    return fmt, b""
+
+
+def encode_audio_frame(pcm: bytes, pcm_format: tuple[int, int, int]) -> bytes:
+    sample_rate, channels, bits = pcm_format
+    return AUDIO_FRAME_HEADER.pack(AUDIO_FRAME_MAGIC, sample_rate, channels, bits) + pcm
+
+
+# --- Output Format Negotiation ---
+# Clients may announce their playback rate and sample format in audio_config:
+#   {"type": "audio_config", "binary": true, "sample_rate": 48000, "format": "f32"}
+# Murf is then asked for headerless PCM at the closest rate it offers, and the server converts
+# to the exact rate and format, so frames go straight into the playback worklet
+# ("f32" frames carry 32 bits per sample and are float32, "s16" frames are int16).
+MURF_SAMPLE_RATES = (8000, 24000, 44100, 48000)
+CLIENT_SAMPLE_FORMATS = {"f32": 32, "s16": 16}
+
+
+def choose_murf_sample_rate(client_rate: int) -> int:
+    """The Murf rate needing the least conversion: exact, else the lowest rate above, else the highest."""
+    if client_rate in MURF_SAMPLE_RATES:
+        return client_rate
+    higher = [rate for rate in MURF_SAMPLE_RATES if rate > client_rate]
+    return min(higher) if higher else max(MURF_SAMPLE_RATES)
+
+
+def murf_stream_params(audio_format: dict | None) -> str:
+    if audio_format and audio_format.get("murf_sample_rate"):
+        return f"sample_rate={audio_format['murf_sample_rate']}&channel_type=MONO&format=PCM"
+    return MURF_STREAM_PARAMS
+
+
+class PcmConverter:
+    """Streaming int16 mono PCM -> client rate and sample format, vectorized with NumPy.
+
+    Linear interpolation keeps its phase and the previous chunk's last sample
+    between calls, so chunk boundaries are seamless.
+    """
 
+    def __init__(self, source_rate: int, target_rate: int, target_format: str = "f32"):
+        self.source_rate = source_rate
+        self.target_rate = target_rate
+        self.target_format = target_format
+        self.step = source_rate / target_rate
+        self._position = 0.0  # next output sample, in source samples relative to the pending tail
+        self._tail = np.zeros(0, dtype=np.float32)
+        self._odd_byte = b""
+
+    @property
+    def frame_format(self) -> tuple[int, int, int]:
+        return self.target_rate, 1, CLIENT_SAMPLE_FORMATS[self.target_format]
+
+    def convert(self, pcm: bytes) -> bytes:
+        pcm = self._odd_byte + pcm
+        usable = len(pcm) - (len(pcm) & 1)
+        self._odd_byte = pcm[usable:]
+        samples = np.frombuffer(pcm[:usable], dtype="<i2").astype(np.float32) / 32768.0
+        if self.source_rate != self.target_rate:
+            samples = self._resample(samples)
+        if self.target_format == "s16":
+            return (np.clip(samples, -1.0, 1.0) * 32767).astype("<i2").tobytes()
+        return samples.astype("<f4").tobytes()
+
+    def _resample(self, samples: np.ndarray) -> np.ndarray:
+        source = np.concatenate((self._tail, samples))
+        if len(source) < 2:
+            self._tail = source
+            return np.zeros(0, dtype=np.float32)
+        # Output positions that can be interpolated from what we have (need the sample after each one)
+        count = int(np.floor((len(source) - 1 - self._position) / self.step)) + 1
+        if count <= 0:
+            self._tail = source
+            return np.zeros(0, dtype=np.float32)
+        positions = self._position + np.arange(count) * self.step
+        out = np.interp(positions, np.arange(len(source)), source).astype(np.float32)
+        next_position = self._position + count * self.step
+        keep_from = min(int(np.floor(next_position)), len(source))
+        self._tail = source[keep_from:]
+        self._position = next_position - keep_from
+        return out
+
+
+class AudioOutput:
+    """Sends one reply's Murf audio chunks to a client in the format it negotiated."""
+
+    def __init__(self, sender, audio_format: dict | None = None, source_rate: int | None = None):
+        self.sender = sender
+        self.binary = bool(audio_format and audio_format.get("binary"))
+        self.converter = None
+        if self.binary and audio_format.get("murf_sample_rate"):
+            # Headerless PCM at `source_rate` (Murf's negotiated rate unless given) in, client format out
+            self.converter = PcmConverter(source_rate or audio_format["murf_sample_rate"], audio_format["sample_rate"],
+                                          audio_format["format"])
+        self.pcm_format = DEFAULT_PCM_FORMAT
+
+    async def send(self, audio: bytes | None = None, audio_b64: str | None = None):
+        """Send a chunk given raw (`audio`) or as Murf's base64 (`audio_b64`), whichever is at hand."""
+        if self.converter is not None:
+            pcm = self.converter.convert(audio if audio is not None else base64.b64decode(audio_b64))
+            if pcm:
+                await self.sender.send(encode_audio_frame(pcm, self.converter.frame_format))
+        elif self.binary:
+            fmt, pcm = parse_wav_chunk(audio if audio is not None else base64.b64decode(audio_b64))
+            self.pcm_format = fmt or self.pcm_format
+            if pcm:
+                await self.sender.send(encode_audio_frame(pcm, self.pcm_format))
+        else:
+            if audio_b64 is None:
+                audio_b64 = base64.b64encode(audio).decode()
+            await self.sender.send({"type": "murf_audio_chunk", "audio": audio_b64})
 
-def format_weather_response(weather_data: dict) -> str:
-    """Format weather data into a natural language response."""
-    if "error" in weather_data:
-        return weather_data["error"]
-    
-    city = weather_data["city"]
-    temp = weather_data["temperature"]
-    wind = weather_data["wind_speed"]
-    desc = weather_data["description"]
-    humidity = weather_data.get("humidity")
-    
-    # Format temperature
-    temp_str = f"{temp:.1f}°C"
-    
-    # Format wind speed
-    wind_str = f"{wind:.1f} km/h"
-    
-    # Build response
-    response_parts = [f"Here's the weather in {city}:"]
-    response_parts.append(f"It's currently {temp_str} with {desc.lower()}.")
-    
-    if wind and wind > 0:
-        response_parts.append(f"The wind is blowing at {wind_str}.")
-    
-    if humidity:
-        response_parts.append(f"Humidity is at {humidity}%.")
-    
-    return " ".join(response_parts)
 
+def murf_cache_key(text: str, audio_format: dict | None) -> str:
+    """Cache key for `text` rendered over the streaming socket in the session's Murf output format."""
+    rate = (audio_format or {}).get("murf_sample_rate")
+    voice = f"{MURF_VOICE_CONFIG['voiceId']}/{MURF_VOICE_CONFIG['style']}"
+    return tts_cache_key(text, voice, "PCM" if rate else "WAV", rate or DEFAULT_PCM_FORMAT[0])
 
-# --- Web Search Helper (Tavily) ---
-def webSearch(query: str, api_key: str | None = None) -> str:
-    """Run a Tavily web search and return a clean, formatted summary with sources.
 
-    Uses API key from .env via dotenv. Returns human-readable text.
+# --- Murf Streaming Connection ---
+MURF_STREAM_PARAMS = "sample_rate=44100&channel_type=MONO&format=WAV"
+MURF_VOICE_CONFIG = {
+    "voiceId": "en-US-amara",
+    "style": "Conversational",
+    "rate": 0,
+    "pitch": 0,
+    "variation": 1
+}
+
+murf_stats = {"connects": 0, "reconnects": 0, "connect_failures": 0, "contexts": 0, "warm_contexts": 0, "replayed_contexts": 0, "segments": 0}
+
+
+class MurfContext:
+    """One reply's text-in / audio-out stream on a shared Murf connection."""
+
+    def __init__(self, connection: "MurfConnection", context_id: str, warm: bool):
+        self.connection = connection
+        self.context_id = context_id
+        self.warm = warm
+        self.messages = []  # everything sent so far, replayed if the socket drops before any audio
+        self.audio = asyncio.Queue()  # base64 audio chunks, then None once the context is final
+        self.received_audio = False
+        self.completed = False  # Murf sent "final": the audio is whole, not cut short by a drop or close
+        self.first_text_at: float | None = None
+
+    async def _send(self, message: dict):
+        self.messages.append(message)
+        await self.connection.send(message)
+
+    async def configure(self):
+        await self._send({"voice_config": MURF_VOICE_CONFIG, "context_id": self.context_id})
+
+    async def send_text(self, text: str):
+        if self.first_text_at is None:
+            self.first_text_at = time.perf_counter()
+        await self._send({"text": text, "context_id": self.context_id})
+
+    async def end(self):
+        await self._send({"text": "", "end": True, "context_id": self.context_id})
+
+    async def audio_chunks(self):
+        while True:
+            chunk = await self.audio.get()
+            if chunk is None:
+                return
+            yield chunk
+
+    def close(self, clear: bool = False):
+        """Detach from the connection; `clear` asks Murf to stop synthesizing (barge-in)."""
+        self.connection.release(self, clear)
+
+
+class MurfConnection:
+    """Session-scoped Murf streaming socket, opened early and shared by every reply.
+
+    The socket is kept alive with WebSocket pings and each reply gets its own
+    context_id on it, so only the first reply of a session pays for the
+    handshake. A reader task routes audio to the matching context. A dropped
+    socket is reopened and contexts that have not produced audio yet are
+    replayed on the new one.
     """
-    # Prefer override key if provided
-    client = None
-    try:
-        if api_key:
-            client = TavilyClient(api_key=api_key)
-        else:
-            client = tavily_client
-    except Exception:
-        client = None
 
-    if not client:
-        return "Web search is unavailable: missing or invalid TAVILY_API_KEY."
+    def __init__(self, ws_url: str, api_key: str, context_prefix: str, stream_params: str = MURF_STREAM_PARAMS):
+        self.uri = f"{ws_url}?api-key={api_key}&{stream_params}"
+        self.api_key = api_key
+        self.context_prefix = context_prefix
+        self._ws = None
+        self._reader: asyncio.Task | None = None
+        self._lock = asyncio.Lock()
+        self._contexts: dict[str, MurfContext] = {}
+        self._context_count = 0
+        self._ever_connected = False
+        self.closed = False
+
+    @property
+    def connected(self) -> bool:
+        return self._ws is not None
+
+    async def connect(self):
+        """Open the socket if it is not open yet (also used to pre-warm)."""
+        async with self._lock:
+            if self._ws is not None or self.closed:
+                return
+            try:
+                with upstream_breakers["murf"].call(session_key=self.api_key != MURF_API_KEY):
+                    ws = await websockets.connect(self.uri, ping_interval=MURF_PING_INTERVAL, ping_timeout=MURF_PING_INTERVAL)
+            except Exception:
+                murf_stats["connect_failures"] += 1
+                raise
+            murf_stats["connects"] += 1
+            if self._ever_connected:
+                murf_stats["reconnects"] += 1
+            self._ever_connected = True
+            try:
+                await self._replay(ws)
+            except Exception:
+                await ws.close()
+                raise
+            if self.closed:
+                # close() ran during the handshake or the replay, and had no socket to close yet
+                await ws.close()
+                return
+            # Published only once the replay has caught up, so no send can overtake or repeat it
+            self._ws = ws
+            self._reader = asyncio.create_task(self._read(ws))
 
-    try:
-        response = client.search(
-            query=query,
-            search_depth="advanced",
-            include_images=False,
-            include_answer=True,
-            max_results=8,
-        )
+    async def _replay(self, ws):
+        """Send every recorded message, including ones recorded (or contexts opened) while replaying."""
+        replayed: dict[str, int] = {}
+        while True:
+            backlog = [(context, context.messages[replayed.get(context.context_id, 0):])
+                       for context in list(self._contexts.values())]
+            backlog = [(context, messages) for context, messages in backlog if messages]
+            if not backlog:
+                return
+            for context, messages in backlog:
+                if context.context_id not in replayed:
+                    murf_stats["replayed_contexts"] += 1
+                replayed[context.context_id] = replayed.get(context.context_id, 0) + len(messages)
+                for message in messages:
+                    await ws.send(json.dumps(message))
+
+    async def open_context(self) -> MurfContext:
+        warm = self._ws is not None
+        self._context_count += 1
+        context = MurfContext(self, f"{self.context_prefix}_{self._context_count}", warm)
+        self._contexts[context.context_id] = context
+        murf_stats["contexts"] += 1
+        if warm:
+            murf_stats["warm_contexts"] += 1
+        await context.configure()
+        return context
+
+    async def send(self, message: dict):
+        ws = self._ws
+        if ws is None:
+            # connect() replays the message, which the context has already recorded, before it returns
+            await self.connect()
+            return
+        try:
+            await ws.send(json.dumps(message))
+        except websockets.ConnectionClosed:
+            self._drop(ws)
+            await self.connect()
 
-        answer = (response.get("answer") or "").strip()
-        results = response.get("results", []) or []
+    async def _read(self, ws):
+        try:
+            async for raw in ws:
+                try:
+                    data = json.loads(raw)
+                except Exception:
+                    continue
+                context = self._contexts.get(data.get("context_id"))
+                if "context_id" not in data and len(self._contexts) == 1:
+                    context = next(iter(self._contexts.values()))
+                if context is None:
+                    continue
+                if data.get("audio"):
+                    context.received_audio = True
+                    context.audio.put_nowait(data["audio"])
+                if data.get("final"):
+                    context.completed = True
+                    self._contexts.pop(context.context_id, None)
+                    context.audio.put_nowait(None)
+        except websockets.ConnectionClosed:
+            pass
+        except Exception as e:
+            logging.error(f"Murf websocket reader error: {e}")
+        finally:
+            self._drop(ws)
+            if self._contexts and not self.closed:
+                spawn_background(self._reconnect(), name=f"murf-reconnect-{self.context_prefix}")
+
+    def _drop(self, ws):
+        """Forget a dead socket; contexts that already played audio cannot be resumed and end here."""
+        if self._ws is not ws:
+            return
+        self._ws = None
+        for context_id, context in list(self._contexts.items()):
+            if context.received_audio:
+                self._contexts.pop(context_id, None)
+                context.audio.put_nowait(None)
 
-        if answer:
-            return answer
+    async def _reconnect(self):
+        try:
+            await self.connect()
+        except Exception as e:
+            logging.error(f"Murf reconnect failed: {e}")
+            for context in self._contexts.values():
+                context.audio.put_nowait(None)
+            self._contexts.clear()
 
-        # Fallback: use the first result content without including sources
-        if results:
-            content = (results[0].get("content") or "").strip()
-            # Return a concise snippet
-            return content[:1200] if content else "No summary available."
+    def release(self, context: MurfContext, clear: bool = False):
+        if self._contexts.pop(context.context_id, None) is not None and clear and self._ws is not None:
+            spawn_background(self._send_quietly({"clear": True, "context_id": context.context_id}),
+                             name=f"murf-clear-{context.context_id}")
 
-        return "No summary available."
-    except Exception as e:
-        logging.error(f"Tavily search error: {e}")
-        return "Sorry, web search failed. Please try again later."
+    async def _send_quietly(self, message: dict):
+        try:
+            if self._ws is not None:
+                await self._ws.send(json.dumps(message))
+        except Exception:
+            pass
+
+    async def close(self):
+        self.closed = True
+        for context in self._contexts.values():
+            context.audio.put_nowait(None)
+        self._contexts.clear()
+        ws, self._ws = self._ws, None
+        if ws is not None:
+            await ws.close()
+
+
+# --- Per-Session Outbound Sender ---
+class SessionSender:
+    """Single writer for one browser WebSocket, fed by a bounded two-lane queue.
+
+    Every outbound message goes through `send`, so messages of each lane leave
+    in the order they were queued. Audio has its own lane and is always written
+    first. When the client falls behind, queued `llm_chunk` text is merged and
+    superseded partial transcripts are replaced; once the queue is full,
+    producers wait for space (backpressure) instead of piling up tasks.
+    """
 
+    AUDIO_TYPES = ("murf_audio_chunk", "murf_audio_final", "audio_flush")
+
+    def __init__(self, websocket, max_queue: int = SENDER_QUEUE_SIZE):
+        self.websocket = websocket
+        self.max_queue = max_queue
+        self._audio = deque()
+        self._text = deque()
+        self._has_items = asyncio.Event()
+        self._has_space = asyncio.Event()
+        self._has_space.set()
+        self._writer: asyncio.Task | None = None
+        self._writing = False
+        self.closed = False
+        self.sent = 0
+        self.merged = 0
+        self.dropped = 0
+        self.max_depth = 0
+
+    @property
+    def depth(self) -> int:
+        return len(self._audio) + len(self._text)
+
+    def start(self):
+        if self._writer is None and not self.closed:
+            self._writer = asyncio.create_task(self._write_loop())
+
+    async def send(self, message: dict | str | bytes):
+        """Queue a message (dict messages are JSON-encoded on write, bytes go out as binary audio frames)."""
+        if self.closed:
+            self.dropped += 1
+            return
+        self.start()
+        is_dict = isinstance(message, dict)
+        msg_type = message.get("type") if is_dict else None
+
+        if msg_type == "llm_chunk" and self._text:
+            last = self._text[-1]
+            if isinstance(last, dict) and last.get("type") == "llm_chunk" and not last.get("is_complete"):
+                last["text"] += message.get("text", "")
+                last["is_complete"] = message.get("is_complete", False)
+                self.merged += 1
+                return
+        if msg_type == "transcription" and self._text:
+            last = self._text[-1]
+            if (isinstance(last, dict) and last.get("type") == "transcription" and not last.get("end_of_turn")
+                    and last.get("turn_order") == message.get("turn_order")):
+                # A newer partial (or the final) transcript of the same turn supersedes the queued one
+                self._text[-1] = message
+                self.dropped += 1
+                return
 
-# --- Web Query Detection ---
-def is_web_query(text: str) -> bool:
-    """Heuristic: detect queries better answered via web search (news, prices, winners, latest)."""
-    t = (text or "").lower()
-    keywords = [
-        "who won", "winner", "latest", "breaking", "news", "today",
-        "price", "prices", "cost", "how much", "release date", "2024", "2025", "2026",
-        "score", "result", "final", "vs ", "schedule", "fixtures",
-    ]
-    # If it's a weather query, exclude here (weather handled separately)
-    is_weather, _ = is_weather_query(t)
-    if is_weather:
-        return False
-    return any(k in t for k in keywords)
+        while self.depth >= self.max_queue and not self.closed:
+            self._has_space.clear()
+            await self._has_space.wait()
+        if self.closed:
+            self.dropped += 1
+            return
+
+        is_audio = msg_type in self.AUDIO_TYPES or isinstance(message, bytes)
+        (self._audio if is_audio else self._text).append(message)
+        self.max_depth = max(self.max_depth, self.depth)
+        self._has_items.set()
+
+    async def flush_audio(self, interrupted: bool = False):
+        """Drop audio still queued for the client and tell it to stop playback."""
+        self.dropped += len(self._audio)
+        self._audio.clear()
+        self._has_space.set()
+        await self.send({"type": "audio_flush", "interrupted": interrupted})
+
+    async def _write_loop(self):
+        while not self.closed:
+            if not self._audio and not self._text:
+                self._has_items.clear()
+                await self._has_items.wait()
+                continue
+            message = self._audio.popleft() if self._audio else self._text.popleft()
+            self._has_space.set()
+            self._writing = True
+            try:
+                if isinstance(message, bytes):
+                    await self.websocket.send_bytes(message)
+                else:
+                    await self.websocket.send_text(json.dumps(message) if isinstance(message, dict) else message)
+                self.sent += 1
+            except Exception as e:
+                logging.error(f"Error sending to client, closing sender: {e}")
+                self._shutdown()
+            finally:
+                self._writing = False
+
+    async def drain(self, timeout: float = 2.0):
+        """Wait (bounded) until everything queued so far has been written."""
+        deadline = time.monotonic() + timeout
+        while (self.depth or self._writing) and not self.closed and time.monotonic() < deadline:
+            await asyncio.sleep(0.01)
+
+    def _shutdown(self):
+        self.closed = True
+        self.dropped += self.depth
+        self._audio.clear()
+        self._text.clear()
+        self._has_space.set()
+        self._has_items.set()
+
+    def close(self):
+        self._shutdown()
+        if self._writer and self._writer is not asyncio.current_task():
+            self._writer.cancel()
+
+    def stats(self) -> dict:
+        return {
+            "depth": self.depth,
+            "max_depth": self.max_depth,
+            "sent": self.sent,
+            "merged": self.merged,
+            "dropped": self.dropped,
+        }
+
+
+# --- Realtime Session State ---
+class Session:
+    """Everything the realtime pipeline holds for one session, so a frame needs one lookup and teardown one pop."""
+
+    __slots__ = (
+        "session_id", "started_at", "websocket", "sender", "streaming_client", "transcript_queue",
+        "transcript_consumer", "keys", "audio_format", "murf", "turn_tasks", "response_turn",
+        "audio_frames", "audio_bytes", "turns", "barge_ins",
+    )
+
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        self.started_at: float | None = None  # set while the session is streaming
+        self.websocket = None
+        self.sender: SessionSender | None = None
+        self.streaming_client = None
+        self.transcript_queue: asyncio.Queue | None = None
+        self.transcript_consumer: asyncio.Task | None = None
+        self.keys: dict = {}
+        # Negotiated client audio delivery, e.g. {"binary": True}
+        self.audio_format: dict | None = None
+        self.murf: MurfConnection | None = None
+        # Barge-in: tasks producing the current reply, and the user turn they answer
+        self.turn_tasks: set = set()
+        self.response_turn: int | None = None
+        self.audio_frames = 0
+        self.audio_bytes = 0
+        self.turns = 0
+        self.barge_ins = 0
+
+    def stats(self) -> dict:
+        return {
+            "duration_s": round(time.time() - self.started_at, 1) if self.started_at else 0,
+            "audio_frames": self.audio_frames,
+            "audio_bytes": self.audio_bytes,
+            "turns": self.turns,
+            "barge_ins": self.barge_ins,
+        }
 
 
 # --- Audio Streamer Class ---
 class AudioStreamer:
     def __init__(self):
-        self.active_sessions = {}
-        self.streaming_clients = {}
-        self.session_websockets = {}
-        self.pending_transcriptions = {}
-        self.final_transcripts = {}
-        self.session_keys = {}
-
-    def set_session_keys(self, session_id: str, keys: dict):
+        self.sessions: dict[str, Session] = {}
+        # End-of-turn (SDK callback) -> llm_start sent, in seconds
+        self.turn_latencies = deque(maxlen=TURN_LATENCY_SAMPLES)
+        # Gemini request sent -> first text chunk received, in seconds
+        self.first_token_latencies = deque(maxlen=TURN_LATENCY_SAMPLES)
+        self.llm_streams = {"active": 0, "completed": 0, "cancelled": 0, "failed": 0}
+        self.barge_ins = 0
+        # First text -> first audio on the session's shared Murf socket, split by warm/cold socket
+        self.first_audio_latencies = {"warm": deque(maxlen=TURN_LATENCY_SAMPLES), "cold": deque(maxlen=TURN_LATENCY_SAMPLES)}
+
+    def session(self, session_id: str) -> Session:
+        """The session's state, created on first use."""
+        session = self.sessions.get(session_id)
+        if session is None:
+            session = self.sessions[session_id] = Session(session_id)
+        return session
+
+    async def set_session_keys(self, session_id: str, keys: dict):
         safe = {}
         for k, v in (keys or {}).items():
             if isinstance(v, str) and v.strip():
                 safe[k.strip().upper()] = v.strip()
-        self.session_keys[session_id] = safe
+        self.session(session_id).keys = safe
+        # Shared so a reconnect served by another worker keeps the session's keys
+        await session_store.run(session_store.set_keys, session_id, safe)
 
     def get_session_key(self, session_id: str, name: str) -> str | None:
-        return (self.session_keys.get(session_id, {}) or {}).get(name.upper())
+        session = self.sessions.get(session_id)
+        return session.keys.get(name.upper()) if session else None
+
+    def get_sender(self, session_id: str, websocket) -> SessionSender:
+        """The session's outbound sender, created on first use for this websocket."""
+        session = self.session(session_id)
+        sender = session.sender
+        if sender is None or sender.closed or sender.websocket is not websocket:
+            sender = session.sender = SessionSender(websocket)
+            sender.start()
+        return sender
 
     async def start_streaming(self, session_id: str, websocket=None):
-        self.session_websockets[session_id] = websocket
+        session = self.session(session_id)
+        session.websocket = websocket
+        if not session.keys:
+            session.keys = await session_store.run(session_store.get_keys, session_id)
+        if websocket is not None:
+            self.get_sender(session_id, websocket)
+        
+        # SDK callbacks run on the AssemblyAI reader thread; hand events to the loop through this queue
+        loop = asyncio.get_running_loop()
+        transcript_queue: asyncio.Queue = asyncio.Queue()
+        session.transcript_queue = transcript_queue
+        session.transcript_consumer = asyncio.create_task(self._deliver_transcripts(session, transcript_queue))
+        self.prewarm_murf(session_id)
         
         try:
             session_assembly_key = self.get_session_key(session_id, "ASSEMBLYAI_API_KEY")
@@ -398,8 +2479,6 @@ class AudioStreamer:
                 def on_turn(client_instance, event: TurnEvent):
                     if event.transcript:
                         logging.info(f"AssemblyAI transcription turn received: {event.transcript}")
-                        if session_id not in self.pending_transcriptions:
-                            self.pending_transcriptions[session_id] = []
                         message = {
                             "type": "transcription",
                             "transcript": event.transcript,
@@ -407,10 +2486,11 @@ class AudioStreamer:
                             "turn_is_formatted": event.turn_is_formatted,
                             "turn_order": event.turn_order
                         }
-                        self.pending_transcriptions[session_id].append(message)
-                        
-                        if event.end_of_turn and event.turn_is_formatted:
-                            self.final_transcripts[session_id] = event.transcript
+                        try:
+                            loop.call_soon_threadsafe(transcript_queue.put_nowait, (time.perf_counter(), message))
+                        except RuntimeError:
+                            # Event loop already closed (server shutting down)
+                            pass
 
                 def on_terminated(client_instance, event: TerminationEvent):
                     logging.info(f"AssemblyAI session terminated: {event.audio_duration_seconds} seconds")
@@ -430,338 +2510,484 @@ class AudioStreamer:
                 client.on(StreamingEvents.Termination, on_terminated)
                 client.on(StreamingEvents.Error, on_error)
 
-                client.connect(
-                    StreamingParameters(
-                        sample_rate=16000,
-                        format_turns=True,
+                with upstream_breakers["assemblyai"].call(session_key=effective_assembly_key != ASSEMBLYAI_API_KEY):
+                    client.connect(
+                        StreamingParameters(
+                            sample_rate=16000,
+                            format_turns=True,
+                        )
                     )
-                )
-                self.streaming_clients[session_id] = client
+                session.streaming_client = client
                 logging.info(f"AssemblyAI Universal Streaming client started for session: {session_id}")
             else:
                 logging.warning("AssemblyAI API key not set. Transcription disabled.")
-                self.streaming_clients[session_id] = None
+                session.streaming_client = None
         except Exception as e:
             logging.error(f"Failed to initialize AssemblyAI client: {e}")
-            self.streaming_clients[session_id] = None
+            session.streaming_client = None
         
-        self.active_sessions[session_id] = {'start_time': time.time()}
+        session.started_at = time.time()
         logging.info(f"Started streaming session {session_id}")
         return session_id
 
     async def stream_audio_data(self, session_id: str, audio_data: bytes):
-        if session_id not in self.active_sessions:
+        session = self.sessions.get(session_id)
+        if session is None or session.started_at is None:
             logging.warning(f"Received audio data for unknown session: {session_id}")
             return
-        
-        logging.info(f"Received audio data for session {session_id}, size {len(audio_data)} bytes")
 
-        if session_id in self.streaming_clients and self.streaming_clients[session_id]:
+        # Counted rather than logged: this runs for every ~50 ms microphone frame
+        session.audio_frames += 1
+        session.audio_bytes += len(audio_data)
+        if session.streaming_client:
             try:
-                self.streaming_clients[session_id].stream(audio_data)
+                session.streaming_client.stream(audio_data)
             except Exception as e:
                 logging.error(f"Error streaming audio to AssemblyAI: {e}")
 
-        session_websocket = self.session_websockets.get(session_id)
-        if session_websocket and session_id in self.pending_transcriptions:
-            pending_messages = self.pending_transcriptions[session_id]
-            if pending_messages:
-                try:
-                    for message in pending_messages:
-                        logging.info(f"Sending transcription to client: {message['transcript']}")
-                        await session_websocket.send_text(json.dumps(message))
-                    self.pending_transcriptions[session_id] = []
-                except Exception as e:
-                    logging.error(f"Error sending transcriptions: {e}")
-
-        if session_id in self.final_transcripts:
-            final_transcript = self.final_transcripts[session_id]
-            asyncio.create_task(self.stream_llm_response(session_id, final_transcript, session_websocket))
-            del self.final_transcripts[session_id]
+    async def _deliver_transcripts(self, session: Session, transcript_queue: asyncio.Queue):
+        """Per-session consumer: push transcripts to the browser and start the LLM turn as soon as they arrive."""
+        session_id = session.session_id
+        while True:
+            received_at, message = await transcript_queue.get()
+            session_websocket = session.websocket
+            if not session_websocket:
+                continue
+            logging.info(f"Sending transcription to client: {message['transcript']}")
+            await self.get_sender(session_id, session_websocket).send(message)
+
+            if message["transcript"].strip():
+                await self.barge_in(session_id, message["turn_order"])
+
+            if message["end_of_turn"] and message["turn_is_formatted"]:
+                session.response_turn = message["turn_order"]
+                session.turns += 1
+                self.track_turn_task(session_id, asyncio.create_task(self.stream_llm_response(
+                    session_id, message["transcript"], session_websocket, turn_started_at=received_at
+                )))
+
+    def get_murf_connection(self, session_id: str) -> MurfConnection | None:
+        """The session's shared Murf socket, replaced if the session switched key, URL or output format."""
+        murf_key = self.get_session_key(session_id, "MURF_API_KEY") or MURF_API_KEY
+        if not murf_key:
+            return None
+        ws_url = self.get_session_key(session_id, "MURF_WS_URL") or MURF_WS_URL
+        context_prefix = self.get_session_key(session_id, "MURF_CONTEXT_ID") or MURF_CONTEXT_ID
+        session = self.session(session_id)
+        stream_params = murf_stream_params(session.audio_format)
+        connection = session.murf
+        if connection is None or connection.closed or connection.uri != f"{ws_url}?api-key={murf_key}&{stream_params}":
+            if connection is not None:
+                spawn_background(connection.close(), name=f"murf-close-{session_id}")
+            connection = session.murf = MurfConnection(ws_url, murf_key, context_prefix, stream_params)
+        return connection
+
+    def set_audio_config(self, session_id: str, config: dict) -> dict:
+        """Record how the client wants audio delivered; returns the accepted settings."""
+        accepted = {"binary": bool(config.get("binary"))}
+        try:
+            client_rate = int(config.get("sample_rate") or 0)
+        except (TypeError, ValueError):
+            client_rate = 0
+        sample_format = config.get("format", "f32")
+        if accepted["binary"] and 8000 <= client_rate <= 192000 and sample_format in CLIENT_SAMPLE_FORMATS:
+            accepted.update({
+                "sample_rate": client_rate,
+                "format": sample_format,
+                "murf_sample_rate": choose_murf_sample_rate(client_rate),
+            })
+        self.session(session_id).audio_format = accepted
+        return accepted
+
+    def get_audio_format(self, session_id: str) -> dict | None:
+        session = self.sessions.get(session_id)
+        return session.audio_format if session else None
+
+    def prewarm_murf(self, session_id: str):
+        """Open the session's Murf socket in the background so the first reply skips the handshake."""
+        connection = self.get_murf_connection(session_id)
+        if connection is None or connection.connected:
+            return
+
+        async def warm():
+            try:
+                await connection.connect()
+            except Exception as e:
+                logging.warning(f"Murf pre-warm failed for session {session_id}: {e}")
+
+        spawn_background(warm(), name=f"murf-prewarm-{session_id}")
+
+    async def speak(self, murf: MurfConnection, sender: SessionSender, text_queue: asyncio.Queue, final_timeout: float,
+                    audio_format: dict | None = None, cache_key: str | None = None):
+        """Send queued text (ended by None) to a new Murf context in speakable segments and forward its audio.
+
+        With `cache_key`, the reply's audio is stored in the TTS cache once Murf has sent all of it.
+        """
+        try:
+            context = await murf.open_context()
+        except Exception as ex:
+            logging.error(f"Murf websocket error: {ex}")
+            return
+
+        output = AudioOutput(sender, audio_format)
+        recorded = [] if cache_key else None
+
+        async def forward_audio():
+            first = True
+            async for audio_b64 in context.audio_chunks():
+                if first and context.first_text_at is not None:
+                    latency = time.perf_counter() - context.first_text_at
+                    self.first_audio_latencies["warm" if context.warm else "cold"].append(latency)
+                    logging.info(f"Murf time to first audio ({'warm' if context.warm else 'cold'}): {latency * 1000:.1f} ms")
+                first = False
+                if recorded is not None:
+                    audio = base64.b64decode(audio_b64)
+                    recorded.append(audio)
+                    await output.send(audio, audio_b64)
+                else:
+                    await output.send(audio_b64=audio_b64)
+            # Signal to the frontend that Murf has finished sending audio for this response
+            await sender.send({"type": "murf_audio_final"})
+
+        forwarder = asyncio.create_task(forward_audio())
+        finished = False
+        try:
+            async for segment in segment_text_stream(text_queue):
+                murf_stats["segments"] += 1
+                await context.send_text(segment)
+            await context.end()
+            try:
+                await asyncio.wait_for(asyncio.shield(forwarder), timeout=final_timeout)
+                finished = True
+            except asyncio.TimeoutError:
+                pass
+            # Audio cut short by a dropped socket or a closed connection must not be replayed later
+            if finished and context.completed and recorded:
+                await tts_audio_cache.put_chunks(cache_key, recorded)
+        except Exception as ex:
+            logging.error(f"Murf websocket error: {ex}")
+        finally:
+            # Also reached on barge-in: stop forwarding and let Murf drop the unfinished context
+            forwarder.cancel()
+            context.close(clear=not finished)
+
+    def murf_stats(self) -> dict:
+        return {
+            **murf_stats,
+            "open_connections": sum(1 for s in self.sessions.values() if s.murf and s.murf.connected),
+            "time_to_first_audio": {
+                "warm": latency_summary(self.first_audio_latencies["warm"]),
+                "cold": latency_summary(self.first_audio_latencies["cold"]),
+            },
+        }
+
+    def track_turn_task(self, session_id: str, task: asyncio.Task) -> asyncio.Task:
+        """Register a task producing the session's current reply so a barge-in can cancel it."""
+        tasks = self.session(session_id).turn_tasks
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+        return task
+
+    def cancel_turn_tasks(self, session_id: str) -> int:
+        session = self.sessions.get(session_id)
+        tasks = [task for task in session.turn_tasks if not task.done()] if session else []
+        for task in tasks:
+            task.cancel()
+        return len(tasks)
+
+    async def barge_in(self, session_id: str, turn_order: int) -> bool:
+        """The user is speaking in a new turn: cancel the previous reply and flush the browser's playback."""
+        session = self.sessions.get(session_id)
+        if session is None or session.response_turn in (None, turn_order):
+            return False
+        session.response_turn = None
+        cancelled = self.cancel_turn_tasks(session_id)
+        if cancelled:
+            self.barge_ins += 1
+            session.barge_ins += 1
+            logging.info(f"Barge-in on session {session_id}: cancelled {cancelled} reply task(s)")
+        sender = session.sender
+        if sender:
+            await sender.flush_audio(interrupted=bool(cancelled))
+        return bool(cancelled)
+
+    def start_thinking_filler(self, session_id: str, sender: SessionSender) -> asyncio.Task | None:
+        """Play the "thinking" clip if the reply has not started after THINKING_FILLER_DELAY; cancel once it does."""
+        if THINKING_FILLER_DELAY <= 0 or fallback_clips.get("thinking") is None:
+            return None
+        if not (MURF_API_KEY or self.get_session_key(session_id, "MURF_API_KEY")):
+            return None
+
+        async def filler():
+            await asyncio.sleep(THINKING_FILLER_DELAY)
+            # A clip that has started goes out whole, even if the reply starts meanwhile
+            await asyncio.shield(fallback_clips.send("thinking", sender, self.get_audio_format(session_id)))
+
+        return self.track_turn_task(session_id, asyncio.create_task(filler()))
+
+    async def play_fallback_clip(self, session_id: str, sender: SessionSender, name: str):
+        try:
+            for candidate in (name, FALLBACK_CLIP_DEFAULT):
+                if await fallback_clips.send(candidate, sender, self.get_audio_format(session_id)):
+                    return
+        except Exception as e:
+            logging.warning(f"Could not play fallback clip {name}: {e}")
+
+    async def send_llm_start(self, sender: SessionSender, user_text: str, turn_started_at: float | None = None):
+        await sender.send({"type": "llm_start", "transcript": user_text})
+        if turn_started_at is not None:
+            latency = time.perf_counter() - turn_started_at
+            self.turn_latencies.append(latency)
+            logging.info(f"End-of-turn to llm_start latency: {latency * 1000:.1f} ms")
+
+    def sender_stats(self) -> dict:
+        senders = [session.sender for session in self.sessions.values() if session.sender]
+        return {
+            "sessions": len(senders),
+            "queue_depth": sum(sender.depth for sender in senders),
+            "max_queue_depth": max((sender.max_depth for sender in senders), default=0),
+            "sent": sum(sender.sent for sender in senders),
+            "merged": sum(sender.merged for sender in senders),
+            "dropped": sum(sender.dropped for sender in senders),
+        }
+
+    def audio_in_stats(self) -> dict:
+        return {
+            "frames": sum(session.audio_frames for session in self.sessions.values()),
+            "bytes": sum(session.audio_bytes for session in self.sessions.values()),
+        }
+
+    def latency_stats(self) -> dict:
+        return latency_summary(self.turn_latencies)
+
+    def llm_stats(self) -> dict:
+        return {
+            **self.llm_streams,
+            "time_to_first_token": latency_summary(self.first_token_latencies),
+            # Streams run on the event loop, so this stays flat as concurrent talkers grow
+            "process_threads": threading.active_count(),
+        }
+
+    @property
+    def active_sessions(self) -> int:
+        return sum(1 for session in self.sessions.values() if session.started_at is not None)
 
     async def stop_streaming(self, session_id: str):
-        if session_id not in self.active_sessions:
+        session = self.sessions.get(session_id)
+        if session is None or session.started_at is None:
             logging.warning(f"Attempted to stop unknown streaming session: {session_id}")
             return None
-        
-        if session_id in self.streaming_clients and self.streaming_clients[session_id]:
+        # One pop tears the whole session down; the steps below only release what it held
+        del self.sessions[session_id]
+
+        if session.streaming_client:
             try:
-                self.streaming_clients[session_id].disconnect(terminate=True)
+                session.streaming_client.disconnect(terminate=True)
                 logging.info("AssemblyAI Streaming client disconnected")
             except Exception as e:
                 logging.error(f"Error disconnecting AssemblyAI client: {e}")
-            del self.streaming_clients[session_id]
-
-        duration = time.time() - self.active_sessions[session_id]['start_time']
-        logging.info(f"Stopped streaming session {session_id} duration: {duration:.2f}s")
 
-        del self.active_sessions[session_id]
-        self.session_websockets.pop(session_id, None)
-        self.pending_transcriptions.pop(session_id, None)
-        self.final_transcripts.pop(session_id, None)
+        duration = time.time() - session.started_at
+        logging.info(f"Stopped streaming session {session_id} duration: {duration:.2f}s "
+                     f"({session.audio_frames} frames, {session.audio_bytes} bytes, {session.turns} turns)")
+
+        if session.transcript_consumer:
+            session.transcript_consumer.cancel()
+        for task in list(session.turn_tasks):
+            task.cancel()
+        if session.murf:
+            await session.murf.close()
+        if session.sender:
+            session.sender.close()
         return session_id
 
-    async def stream_llm_response(self, session_id: str, user_text: str, websocket):
+    async def stream_llm_response(self, session_id: str, user_text: str, websocket, turn_started_at: float | None = None):
         session_gemini_key = self.get_session_key(session_id, "GEMINI_API_KEY")
         effective_gemini_key = session_gemini_key or GEMINI_API_KEY
         if not effective_gemini_key:
             logging.error("Gemini API key not set")
             return
 
+        sender = self.get_sender(session_id, websocket)
         try:
             logging.info(f"Starting LLM streaming for session {session_id}")
-            if session_id not in chat_history:
-                chat_history[session_id] = []
-            chat_history[session_id].append({"role": "user", "parts": [user_text]})
+            await session_store.run(session_store.append, session_id, "user", user_text)
 
-            # Check if this is a weather query
-            is_weather, city_name = is_weather_query(user_text)
+            # Route the turn to a skill with one pass over the text
+            route = intent_router.route(user_text)
             
-            if is_weather and city_name:
+            if route.intent is Intent.WEATHER:
+                city_name = route.slots["city"]
                 logging.info(f"Weather query detected for city: {city_name}")
-                await websocket.send_text(json.dumps({"type": "llm_start", "transcript": user_text}))
+                await self.send_llm_start(sender, user_text, turn_started_at)
                 
                 # Get weather data
-                weather_data = await weather_skill(city_name)
+                with deadline_scope(UPSTREAM_TURN_DEADLINE):
+                    weather_data = await weather_skill(city_name)
                 weather_response = format_weather_response(weather_data)
                 
                 # Stream the weather response
-                await websocket.send_text(json.dumps({
+                await sender.send({
                     "type": "llm_chunk",
                     "text": weather_response,
                     "is_complete": True
-                }))
+                })
                 
-                await websocket.send_text(json.dumps({
+                await sender.send({
                     "type": "llm_complete",
                     "full_response": weather_response,
                     "is_complete": True
-                }))
+                })
                 
                 # Add to chat history
-                chat_history[session_id].append({"role": "model", "parts": [weather_response]})
+                await session_store.run(session_store.append, session_id, "model", weather_response)
                 
                 # Stream TTS for weather response
                 if MURF_API_KEY or self.get_session_key(session_id, "MURF_API_KEY"):
-                    asyncio.create_task(self.stream_tts(weather_response, websocket, session_id))
+                    self.track_turn_task(session_id, asyncio.create_task(self.stream_tts(weather_response, websocket, session_id)))
                 
                 return
 
             # Web search route if detected
-            if is_web_query(user_text):
+            if route.intent is Intent.WEB_SEARCH:
                 logging.info("Web query detected; performing Tavily search")
-                await websocket.send_text(json.dumps({"type": "llm_start", "transcript": user_text}))
-                web_text = webSearch(user_text)
+                await self.send_llm_start(sender, user_text, turn_started_at)
+                filler = self.start_thinking_filler(session_id, sender)
+                try:
+                    web_text = await webSearchAsync(user_text, self.get_session_key(session_id, "TAVILY_API_KEY"))
+                finally:
+                    if filler:
+                        filler.cancel()
 
                 # Start Murf TTS streaming for web search response as well
                 if MURF_API_KEY or self.get_session_key(session_id, "MURF_API_KEY"):
-                    asyncio.create_task(self.stream_tts(web_text, websocket, session_id))
+                    self.track_turn_task(session_id, asyncio.create_task(self.stream_tts(web_text, websocket, session_id)))
 
-                await websocket.send_text(json.dumps({
+                await sender.send({
                     "type": "llm_chunk",
                     "text": web_text,
                     "is_complete": True
-                }))
-                await websocket.send_text(json.dumps({
+                })
+                await sender.send({
                     "type": "llm_complete",
                     "full_response": web_text,
                     "is_complete": True
-                }))
-                chat_history[session_id].append({"role": "model", "parts": [web_text]})
+                })
+                await session_store.run(session_store.append, session_id, "model", web_text)
                 return
 
-            # Fallback to normal Gemini response
-            genai.configure(api_key=effective_gemini_key)
-            model = genai.GenerativeModel('gemini-1.5-flash', system_instruction=f"You are {AGENT_PERSONA}. Keep responses brief, natural, and easy to speak aloud. Avoid markdown unless necessary.")
-
-            await websocket.send_text(json.dumps({"type": "llm_start", "transcript": user_text}))
+            # Fallback to normal Gemini response, streamed natively on the event loop
+            model = get_gemini_model(effective_gemini_key)
 
-            loop = asyncio.get_running_loop()
-            full_response_ref = {"text": ""}
+            await self.send_llm_start(sender, user_text, turn_started_at)
 
             async def murf_streamer(text_stream_queue: asyncio.Queue):
-                if not MURF_API_KEY:
+                murf = self.get_murf_connection(session_id)
+                if murf is None:
                     logging.warning("MURF_API_KEY not set; skipping TTS streaming")
                     return
-                uri = f"{MURF_WS_URL}?api-key={MURF_API_KEY}&sample_rate=44100&channel_type=MONO&format=WAV"
-                try:
-                    async with websockets.connect(uri) as murf_ws:
-                        voice_config_msg = {
-                            "voice_config": {
-                                "voiceId": "en-US-amara",
-                                "style": "Conversational",
-                                "rate": 0,
-                                "pitch": 0,
-                                "variation": 1
-                            },
-                            "context_id": MURF_CONTEXT_ID
-                        }
-                        await murf_ws.send(json.dumps(voice_config_msg))
-
-                        async def receiver():
-                            async for msg in murf_ws:
-                                try:
-                                    data = json.loads(msg)
-                                except Exception:
-                                    continue
-                                if "audio" in data:
-                                    audio_b64 = data.get("audio")
-                                    if audio_b64:
-                                        await websocket.send_text(json.dumps({
-                                            "type": "murf_audio_chunk",
-                                            "audio": audio_b64
-                                        }))
-                                if data.get("final"):
-                                    # Signal to the frontend that Murf has finished sending audio for this response
-                                    try:
-                                        await websocket.send_text(json.dumps({"type": "murf_audio_final"}))
-                                    except Exception:
-                                        pass
-                                    break
-                        recv_task = asyncio.create_task(receiver())
-
-                        chunk_id = 0
-                        while True:
-                            chunk = await text_stream_queue.get()
-                            if chunk is None:
-                                break
-                            await murf_ws.send(json.dumps({
-                                "text": chunk,
-                                "context_id": MURF_CONTEXT_ID
-                            }))
-                            chunk_id += 1
-
-                        await murf_ws.send(json.dumps({"text": "", "end": True, "context_id": MURF_CONTEXT_ID}))
-                        try:
-                            await asyncio.wait_for(recv_task, timeout=2.0)
-                        except asyncio.TimeoutError:
-                            recv_task.cancel()
-                except Exception as ex:
-                    logging.error(f"Murf websocket error: {ex}")
+                await self.speak(murf, sender, text_stream_queue, final_timeout=2.0,
+                                 audio_format=self.get_audio_format(session_id))
 
             text_queue: asyncio.Queue[str | None] = asyncio.Queue()
             murf_task = asyncio.create_task(murf_streamer(text_queue))
+            filler = self.start_thinking_filler(session_id, sender)
 
-            def stream_sync():
-                try:
-                    stream = model.generate_content(
-                        user_text,
+            full_response = ""
+            requested_at = time.perf_counter()
+            self.llm_streams["active"] += 1
+            try:
+                # Built outside the breaker: a session store error is not a Gemini outage
+                contents = await prompt_window.contents(session_id, effective_gemini_key)
+                with upstream_breakers["gemini"].call(session_key=effective_gemini_key != GEMINI_API_KEY):
+                    stream = await model.generate_content_async(
+                        contents,
                         stream=True,
-                        generation_config=genai.types.GenerationConfig(
-                            temperature=0.7,
-                            top_p=0.8,
-                            top_k=40,
-                            max_output_tokens=2048,
-                        )
+                        generation_config=GEMINI_STREAM_CONFIG,
                     )
-                    for chunk in stream:
+                    async for chunk in stream:
                         text_chunk = getattr(chunk, "text", "") or ""
                         if text_chunk:
-                            full_response_ref["text"] += text_chunk
-                            msg = json.dumps({
+                            if not full_response:
+                                if filler:
+                                    filler.cancel()
+                                ttft = time.perf_counter() - requested_at
+                                self.first_token_latencies.append(ttft)
+                                logging.info(f"Gemini time to first token: {ttft * 1000:.1f} ms")
+                            full_response += text_chunk
+                            await sender.send({
                                 "type": "llm_chunk",
                                 "text": text_chunk,
                                 "is_complete": False
                             })
-                            loop.call_soon_threadsafe(asyncio.create_task, websocket.send_text(msg))
-                            loop.call_soon_threadsafe(asyncio.create_task, text_queue.put(text_chunk))
-                    try:
-                        stream.resolve()
-                    except Exception:
-                        pass
-                    complete_msg = json.dumps({
-                        "type": "llm_complete",
-                        "full_response": full_response_ref["text"],
-                        "is_complete": True
-                    })
-                    loop.call_soon_threadsafe(asyncio.create_task, websocket.send_text(complete_msg))
-                    loop.call_soon_threadsafe(asyncio.create_task, text_queue.put(None))
-                    logging.info(f"LLM streaming completed")
-                except Exception as ex:
-                    err_msg = json.dumps({"type": "llm_error", "error": str(ex)})
-                    loop.call_soon_threadsafe(asyncio.create_task, websocket.send_text(err_msg))
-
-            await asyncio.to_thread(stream_sync)
+                            text_queue.put_nowait(text_chunk)
+                await sender.send({
+                    "type": "llm_complete",
+                    "full_response": full_response,
+                    "is_complete": True
+                })
+                self.llm_streams["completed"] += 1
+                logging.info(f"LLM streaming completed")
+            except asyncio.CancelledError:
+                # The turn was abandoned; closing the Murf stream stops paying for unheard audio
+                self.llm_streams["cancelled"] += 1
+                murf_task.cancel()
+                raise
+            except Exception as ex:
+                self.llm_streams["failed"] += 1
+                await sender.send({"type": "llm_error", "error": str(ex)})
+                if not full_response:
+                    await self.play_fallback_clip(session_id, sender, "model_unavailable")
+            finally:
+                if filler:
+                    filler.cancel()
+                self.llm_streams["active"] -= 1
+                text_queue.put_nowait(None)
+
             try:
                 await asyncio.wait_for(murf_task, timeout=5.0)
             except asyncio.TimeoutError:
                 murf_task.cancel()
 
-            if full_response_ref["text"]:
-                chat_history[session_id].append({"role": "model", "parts": [full_response_ref["text"]]})
+            if full_response:
+                await session_store.run(session_store.append, session_id, "model", full_response)
 
         except Exception as e:
             logging.error(f"LLM streaming error: {e}")
             try:
-                await websocket.send_text(json.dumps({"type": "llm_error", "error": str(e)}))
+                await sender.send({"type": "llm_error", "error": str(e)})
             except:
                 pass
+            await self.play_fallback_clip(session_id, sender, "connection_error")
 
     async def stream_tts(self, text: str, websocket, session_id: str):
-        """Stream TTS for responses using Murf (per-session key if provided)."""
-        session_murf_key = self.get_session_key(session_id, "MURF_API_KEY")
-        session_ws_url = self.get_session_key(session_id, "MURF_WS_URL")
-        session_ctx_id = self.get_session_key(session_id, "MURF_CONTEXT_ID")
-
-        effective_murf_key = session_murf_key or MURF_API_KEY
-        effective_ws_url = session_ws_url or MURF_WS_URL
-        effective_ctx_id = session_ctx_id or MURF_CONTEXT_ID
+        """Stream TTS for responses using the session's Murf connection (per-session key if provided).
+
+        Text rendered before in the same output format is replayed from the TTS cache instead.
+        """
+        sender = self.get_sender(session_id, websocket)
+        audio_format = self.get_audio_format(session_id)
+        cache_key = murf_cache_key(text, audio_format)
+        cached = await tts_audio_cache.get_chunks(cache_key)
+        if cached is not None:
+            await self.replay_audio(cached, sender, audio_format)
+            return
 
-        if not effective_murf_key:
+        murf = self.get_murf_connection(session_id)
+        if murf is None:
             return
 
-        uri = f"{effective_ws_url}?api-key={effective_murf_key}&sample_rate=44100&channel_type=MONO&format=WAV"
-        try:
-            async with websockets.connect(uri) as murf_ws:
-                voice_config_msg = {
-                    "voice_config": {
-                        "voiceId": "en-US-amara",
-                        "style": "Conversational",
-                        "rate": 0,
-                        "pitch": 0,
-                        "variation": 1
-                    },
-                    "context_id": effective_ctx_id
-                }
-                await murf_ws.send(json.dumps(voice_config_msg))
-
-                async def receiver():
-                    async for msg in murf_ws:
-                        try:
-                            data = json.loads(msg)
-                        except Exception:
-                            continue
-                        if "audio" in data:
-                            audio_b64 = data.get("audio")
-                            if audio_b64:
-                                await websocket.send_text(json.dumps({
-                                    "type": "murf_audio_chunk",
-                                    "audio": audio_b64
-                                }))
-                        if data.get("final"):
-                            try:
-                                await websocket.send_text(json.dumps({"type": "murf_audio_final"}))
-                            except Exception:
-                                pass
-                            break
-                
-                recv_task = asyncio.create_task(receiver())
-                
-                # Send the weather text
-                await murf_ws.send(json.dumps({
-                    "text": text,
-                    "context_id": effective_ctx_id
-                }))
-                
-                await murf_ws.send(json.dumps({"text": "", "end": True, "context_id": effective_ctx_id}))
-                
-                try:
-                    await asyncio.wait_for(recv_task, timeout=5.0)
-                except asyncio.TimeoutError:
-                    recv_task.cancel()
-                    
-        except Exception as ex:
-            logging.error(f"TTS error: {ex}")
+        text_queue: asyncio.Queue[str | None] = asyncio.Queue()
+        text_queue.put_nowait(text)
+        text_queue.put_nowait(None)
+        await self.speak(murf, sender, text_queue, final_timeout=5.0, audio_format=audio_format, cache_key=cache_key)
+
+    async def replay_audio(self, chunks: list[bytes], sender: SessionSender, audio_format: dict | None = None):
+        """Send stored Murf audio exactly as a live reply would have arrived."""
+        output = AudioOutput(sender, audio_format)
+        for chunk in chunks:
+            await output.send(chunk)
+        await sender.send({"type": "murf_audio_final"})
 
 
 audio_streamer = AudioStreamer()
@@ -773,7 +2999,8 @@ async def websocket_audio_endpoint(websocket: WebSocket, session_id: str):
     logging.info(f"WebSocket connection established for session: {session_id}")
 
     await audio_streamer.start_streaming(session_id, websocket)
-    await websocket.send_text(f"Streaming started: {session_id}")
+    sender = audio_streamer.get_sender(session_id, websocket)
+    await sender.send(f"Streaming started: {session_id}")
 
     try:
         while True:
@@ -786,8 +3013,13 @@ async def websocket_audio_endpoint(websocket: WebSocket, session_id: str):
                 except Exception:
                     payload = None
                 if isinstance(payload, dict) and payload.get("type") == "set_keys":
-                    audio_streamer.set_session_keys(session_id, payload.get("keys") or {})
-                    await websocket.send_text(json.dumps({"type": "keys_ack", "ok": True}))
+                    await audio_streamer.set_session_keys(session_id, payload.get("keys") or {})
+                    audio_streamer.prewarm_murf(session_id)
+                    await sender.send({"type": "keys_ack", "ok": True})
+                elif isinstance(payload, dict) and payload.get("type") == "audio_config":
+                    accepted = audio_streamer.set_audio_config(session_id, payload)
+                    audio_streamer.prewarm_murf(session_id)
+                    await sender.send({"type": "audio_config_ack", **accepted})
 
     except WebSocketDisconnect:
         logging.info(f"WebSocket disconnected for session: {session_id}")
@@ -802,20 +3034,351 @@ def serve_index():
     return FileResponse("static/index.html")
 
 
+@app.get("/stats")
+def service_stats():
+    """Operator-facing counters for the in-process caches."""
+    return {
+        "caches": {
+            "geocode": geocode_cache.stats(),
+            "weather": weather_cache.stats(),
+            "web_search": web_search_cache.stats(),
+            "audio_files": audio_file_cache.stats(),
+            "tts_audio": tts_audio_cache.stats(),
+        },
+        "conversations": session_store.stats(),
+        "prompt_window": prompt_window.stats(),
+        "fallback_clips": fallback_clips.stats(),
+        "upstreams": {name: breaker.stats() for name, breaker in upstream_breakers.items()},
+        "agent_pipeline": {stage.name: stage.stats() for stage in (stt_stage, llm_stage, tts_stage)},
+        "realtime": {
+            "active_sessions": audio_streamer.active_sessions,
+            "audio_in": audio_streamer.audio_in_stats(),
+            "end_of_turn_to_llm_start": audio_streamer.latency_stats(),
+            "outbound": audio_streamer.sender_stats(),
+            "llm": audio_streamer.llm_stats(),
+            "barge_ins": audio_streamer.barge_ins,
+            "murf": audio_streamer.murf_stats(),
+        },
+        "gazetteer": dict(gazetteer_stats, entries=len(_gazetteer) if _gazetteer else 0),
+        "coalescing": {
+            "weather": weather_flights.stats(),
+            "web_search": web_search_flights.stats(),
+        },
+    }
+
+
+def audio_media_type(url: str) -> str:
+    media_type, _ = mimetypes.guess_type(url.split("?", 1)[0])
+    return media_type if media_type and media_type.startswith("audio/") else "audio/mpeg"
+
+
 @app.get("/proxy-audio/")
-async def proxy_audio(url: str):
-    async with httpx.AsyncClient() as client:
+async def proxy_audio(url: str, request: Request):
+    """Stream remote audio to the browser, serving repeats (including Range requests) from the disk cache."""
+    media_type = audio_media_type(url)
+    cors = {"Access-Control-Allow-Origin": "*"}
+    cached_path = await asyncio.to_thread(audio_file_cache.get_path, url)
+    if cached_path:
+        # FileResponse answers Range requests itself
+        return FileResponse(cached_path, media_type=media_type, headers=cors)
+
+    # A seek into an uncached file is forwarded; a full read (or "bytes=0-") is fetched whole and cached
+    range_header = request.headers.get("range")
+    forward_range = range_header if range_header and range_header.replace(" ", "") != "bytes=0-" else None
+    client = get_http_client("audio_proxy")
+    upstream = None
+    try:
+        upstream = await client.send(
+            client.build_request("GET", url, headers={"Range": forward_range} if forward_range else None),
+            stream=True,
+        )
+        upstream.raise_for_status()
+    except httpx.HTTPError as e:
+        if upstream is not None:
+            await upstream.aclose()
+        logging.error(f"Audio proxy failed: {url} - {e}")
+        raise HTTPException(status_code=502, detail="Could not fetch audio.")
+
+    headers = dict(cors, **{"Accept-Ranges": "bytes"})
+    if "content-encoding" not in upstream.headers:
+        for name in ("content-length", "content-range"):
+            if name in upstream.headers:
+                headers[name] = upstream.headers[name]
+    expected_size = int(upstream.headers["content-length"]) if "content-length" in headers else None
+    writer = await asyncio.to_thread(audio_file_cache.writer, url) if upstream.status_code == 200 else None
+
+    async def body():
+        pending = bytearray()
+        try:
+            async for chunk in upstream.aiter_bytes():
+                if writer:
+                    pending += chunk
+                    if len(pending) >= DISK_CACHE_WRITE_BATCH:
+                        await asyncio.to_thread(writer.write, bytes(pending))
+                        pending.clear()
+                yield chunk
+            if writer:
+                await asyncio.to_thread(writer.write, bytes(pending))
+                await asyncio.to_thread(writer.commit, expected_size)
+        finally:
+            try:
+                if writer:
+                    await asyncio.to_thread(writer.abort)
+            finally:
+                await upstream.aclose()
+
+    return StreamingResponse(body(), status_code=upstream.status_code, media_type=media_type, headers=headers)
+
+
+# --- HTTP Agent Pipeline ---
+class StageLimiter:
+    """Caps concurrent work for one /agent/chat stage and times the wait apart from the work.
+
+        async with stt_stage.slot():
+            ...
+    """
+
+    def __init__(self, name: str, concurrency: int):
+        self.name = name
+        self.concurrency = concurrency
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self.waiting = 0
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self.queue_times = deque(maxlen=TURN_LATENCY_SAMPLES)
+        self.service_times = deque(maxlen=TURN_LATENCY_SAMPLES)
+
+    @asynccontextmanager
+    async def slot(self):
+        queued_at = time.perf_counter()
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        started = time.perf_counter()
+        self.queue_times.append(started - queued_at)
+        self.running += 1
         try:
-            r = await client.get(url)
-            r.raise_for_status()
-            return StreamingResponse(
-                iter([r.content]),
-                media_type="audio/mpeg",
-                headers={"Access-Control-Allow-Origin": "*"}
-            )
-        except httpx.RequestError as e:
-            logging.error(f"Audio proxy failed: {e.request.url} - {e}")
-            raise HTTPException(status_code=502, detail="Could not fetch audio.")
+            yield
+        except BaseException:
+            self.failed += 1
+            raise
+        else:
+            self.completed += 1
+        finally:
+            self.service_times.append(time.perf_counter() - started)
+            self.running -= 1
+            self._semaphore.release()
+
+    def stats(self) -> dict:
+        return {
+            "concurrency": self.concurrency,
+            "running": self.running,
+            "waiting": self.waiting,
+            "completed": self.completed,
+            "failed": self.failed,
+            "queue_time": latency_summary(self.queue_times),
+            "service_time": latency_summary(self.service_times),
+        }
+
+
+stt_stage = StageLimiter("stt", AGENT_STT_CONCURRENCY)
+llm_stage = StageLimiter("llm", AGENT_LLM_CONCURRENCY)
+tts_stage = StageLimiter("tts", AGENT_TTS_CONCURRENCY)
+# The AssemblyAI SDK transcribes synchronously (upload, then poll), so it gets its own threads
+_stt_executor = ThreadPoolExecutor(max_workers=AGENT_STT_CONCURRENCY, thread_name_prefix="agent-stt")
+
+
+def transcribe_upload(file) -> str:
+    """Blocking upload-and-poll transcription; runs on the STT executor."""
+    transcript = aai.Transcriber().transcribe(file)
+    if transcript.error:
+        # AssemblyAI answered, but could not use this audio
+        raise ValueError(f"Transcription Error: {transcript.error}")
+    return (transcript.text or "").strip()
+
+
+async def request_murf_render(payload: dict, timeout: float | None = None) -> str:
+    """POST to Murf's one-shot endpoint and return the rendered file's URL."""
+    if not MURF_API_KEY:
+        raise ValueError("Murf API key not set.")
+    headers = {"api-key": MURF_API_KEY, "Content-Type": "application/json"}
+    with upstream_breakers["murf"].call():
+        async with tts_stage.slot():
+            # Time spent queued for a slot comes out of the turn's budget
+            budget = remaining_budget(timeout or MURF_RENDER_TIMEOUT)
+            if budget <= 0:
+                raise DeadlineExceeded("Turn deadline passed before the Murf render started.")
+            client = get_http_client("murf")
+            # A total bound: httpx's read timeout restarts with every byte received
+            murf_resp = await asyncio.wait_for(
+                client.post(MURF_GENERATE_URL, headers=headers, json=payload, timeout=budget), budget)
+            murf_resp.raise_for_status()
+            audio_url = murf_resp.json().get("audioFile")
+    if not audio_url:
+        raise RuntimeError("Murf API no audio URL.")
+    return audio_url
+
+
+async def synthesize_audio_url(text: str, voice_id: str = "en-US-marcus", timeout: float | None = None) -> str:
+    """Render `text` with Murf's one-shot endpoint and return a /tts-audio/ URL on this server.
+
+    Text rendered before is served from the TTS cache. A fresh render is returned right away,
+    carrying Murf's file URL as `src` for the route to fall back on while it is copied into
+    the cache in the background.
+    """
+    cache_key = tts_cache_key(text, voice_id, "generate", 0)
+    if await tts_audio_cache.has_file(cache_key):
+        return f"/tts-audio/{cache_key}"
+    audio_url = await request_murf_render({"text": text, "voiceId": voice_id}, timeout)
+    spawn_background(cache_generated_audio(cache_key, audio_url), name=f"cache-tts-{cache_key[:12]}")
+    return f"/tts-audio/{cache_key}?{urlencode({'src': audio_url})}"
+
+
+async def cache_generated_audio(cache_key: str, audio_url: str) -> bytes | None:
+    try:
+        resp = await get_http_client("audio_proxy").get(audio_url)
+        resp.raise_for_status()
+    except httpx.HTTPError as e:
+        logging.warning(f"Could not cache rendered audio {audio_url}: {e}")
+        return None
+    await tts_audio_cache.put_file(cache_key, resp.content)
+    return resp.content
+
+
+async def render_wav(text: str, voice_id: str, sample_rate: int = 24000) -> bytes | None:
+    """Mono 16-bit WAV of `text`, from the TTS cache or rendered once by Murf and cached."""
+    cache_key = tts_cache_key(text, voice_id, "WAV", sample_rate)
+    cached = await tts_audio_cache.read_file(cache_key)
+    if cached is not None:
+        return cached
+    audio_url = await request_murf_render({
+        "text": text, "voiceId": voice_id, "format": "WAV", "sampleRate": sample_rate, "channelType": "MONO",
+    })
+    return await cache_generated_audio(cache_key, audio_url)
+
+
+# --- Fallback Clip Catalog ---
+# Spoken when a dependency is failing (so they must not need it) and as filler while a reply is slow
+FALLBACK_CLIP_TEXTS = {
+    "connection_error": "I'm sorry, I'm having trouble connecting right now. Please try again later.",
+    "model_unavailable": "The AI model is currently unavailable.",
+    "thinking": "Hmm, let me think about that.",
+}
+FALLBACK_CLIP_ASSETS = {"connection_error": "static/tts_fallback.wav"}
+# Stands in for any clip that has not been rendered (yet)
+FALLBACK_CLIP_DEFAULT = "connection_error"
+
+
+class FallbackClip(NamedTuple):
+    wav: bytes
+    pcm_format: tuple[int, int, int]
+    pcm: bytes
+
+
+class ClipCatalog:
+    """Pre-rendered status clips held in memory, served without touching Murf.
+
+    Shipped assets are loaded at startup; the rest are rendered once at boot
+    (and kept in the TTS cache, so later boots read them from disk).
+    """
+
+    def __init__(self, texts: dict[str, str], assets: dict[str, str], voice_id: str):
+        self.texts = texts
+        self.assets = assets
+        self.voice_id = voice_id
+        self._clips: dict[str, FallbackClip] = {}
+        self.served = 0
+        self.render_failures = 0
+
+    def add(self, name: str, wav: bytes) -> bool:
+        pcm_format, pcm = parse_wav_chunk(wav)
+        if pcm_format is None or pcm_format[1:] != (1, 16) or not pcm:
+            logging.warning(f"Fallback clip {name} is not mono 16-bit WAV; skipped")
+            return False
+        self._clips[name] = FallbackClip(wav, pcm_format, pcm)
+        return True
+
+    def load_assets(self) -> int:
+        loaded = 0
+        for name, path in self.assets.items():
+            try:
+                with open(path, "rb") as f:
+                    loaded += self.add(name, f.read())
+            except OSError as e:
+                logging.warning(f"Fallback clip asset {path} unavailable: {e}")
+        return loaded
+
+    async def render_missing(self):
+        if not MURF_API_KEY:
+            return
+        for name, text in self.texts.items():
+            if name in self._clips:
+                continue
+            try:
+                wav = await render_wav(text, self.voice_id)
+            except Exception as e:
+                wav = None
+                logging.warning(f"Could not render fallback clip {name}: {e}")
+            if not (wav and self.add(name, wav)):
+                self.render_failures += 1
+
+    def get(self, name: str) -> FallbackClip | None:
+        return self._clips.get(name)
+
+    def url(self, name: str) -> str | None:
+        """Local URL of the clip, or of the generic one while it is missing."""
+        for candidate in (name, FALLBACK_CLIP_DEFAULT):
+            if candidate in self._clips:
+                self.served += 1
+                return f"/fallback-audio/{candidate}"
+        return None
+
+    async def send(self, name: str, sender, audio_format: dict | None = None) -> bool:
+        """Play a clip on a websocket session like a (short) Murf reply; only the exact clip is sent."""
+        clip = self._clips.get(name)
+        if clip is None:
+            return False
+        self.served += 1
+        output = AudioOutput(sender, audio_format, source_rate=clip.pcm_format[0])
+        await output.send(clip.pcm if output.converter is not None else clip.wav)
+        await sender.send({"type": "murf_audio_final"})
+        return True
+
+    def stats(self) -> dict:
+        return {
+            "clips": sorted(self._clips),
+            "missing": sorted(set(self.texts) - set(self._clips)),
+            "served": self.served,
+            "render_failures": self.render_failures,
+        }
+
+
+fallback_clips = ClipCatalog(FALLBACK_CLIP_TEXTS, FALLBACK_CLIP_ASSETS, MURF_VOICE_CONFIG["voiceId"])
+
+
+@app.get("/fallback-audio/{name}")
+async def serve_fallback_audio(name: str):
+    clip = fallback_clips.get(name)
+    if clip is None:
+        raise HTTPException(status_code=404, detail="Audio not found.")
+    return Response(content=clip.wav, media_type="audio/wav", headers={"Access-Control-Allow-Origin": "*"})
+
+
+@app.get("/tts-audio/{cache_key}")
+async def serve_cached_tts(cache_key: str, src: str | None = None):
+    path = None
+    if re.fullmatch(r"[0-9a-f]{64}", cache_key):
+        path = await asyncio.to_thread(tts_audio_cache.disk.get_path, cache_key)
+    if path is None:
+        if src:
+            # Not copied into the cache (yet, or on another worker): stream Murf's file through the proxy
+            return RedirectResponse(f"/proxy-audio/?{urlencode({'url': src})}", status_code=307)
+        raise HTTPException(status_code=404, detail="Audio not found.")
+    media_type = await asyncio.to_thread(sniff_audio_file, path)
+    return FileResponse(path, media_type=media_type, headers={"Access-Control-Allow-Origin": "*"})
 
 
 @app.post("/tts")
@@ -823,85 +3386,62 @@ async def generate_tts(text: str):
     if not MURF_API_KEY:
         logging.error("TTS endpoint called but MURF_API_KEY missing.")
         raise HTTPException(status_code=500, detail="TTS service not configured.")
-    headers = {"api-key": MURF_API_KEY, "Content-Type": "application/json"}
-    payload = {"text": text, "voiceId": "en-US-natalie"}
     try:
-        async with httpx.AsyncClient(timeout=60) as client:
-            resp = await client.post("https://api.murf.ai/v1/speech/generate", headers=headers, json=payload)
-            resp.raise_for_status()
-            data = resp.json()
-            audio_url = data.get("audioFile")
-            if not audio_url:
-                logging.error("Murf API succeeded but no audioFile.")
-                raise HTTPException(status_code=502, detail="TTS API error: no audio.")
-            return {"audio_url": audio_url}
+        audio_url = await synthesize_audio_url(text, "en-US-natalie")
+        return {"audio_url": audio_url}
     except Exception as e:
         logging.error(f"TTS error: {e}")
         raise HTTPException(status_code=500, detail="TTS internal error.")
 
 
-async def generate_fallback_audio(msg="I'm sorry, I'm having trouble connecting right now. Please try again later."):
-    if not MURF_API_KEY:
-        return None
-    headers = {"api-key": MURF_API_KEY, "Content-Type": "application/json"}
-    payload = {"text": msg, "voiceId": "en-US-marcus"}
-    try:
-        async with httpx.AsyncClient(timeout=30) as client:
-            murf_resp = await client.post("https://api.murf.ai/v1/speech/generate", headers=headers, json=payload)
-            murf_resp.raise_for_status()
-            return murf_resp.json().get("audioFile")
-    except Exception as e:
-        logging.error(f"Fallback audio error: {e}")
-        return None
-
-
 @app.post("/agent/chat/{session_id}")
 async def agent_chat(session_id: str, file: UploadFile = File(...)):
+    # Every stage of the turn draws on one budget, so a hung upstream cannot hold it indefinitely
+    with deadline_scope(AGENT_TURN_DEADLINE):
+        return await run_agent_turn(session_id, file)
+
+
+async def run_agent_turn(session_id: str, file):
     try:
         if not ASSEMBLYAI_API_KEY:
             raise ValueError("AssemblyAI API key not set.")
-        transcriber = aai.Transcriber()
-        transcript = transcriber.transcribe(file.file)
-        if transcript.error:
-            raise RuntimeError(f"Transcription Error: {transcript.error}")
-        user_text = (transcript.text or "").strip()
+        with upstream_breakers["assemblyai"].call():
+            async with stt_stage.slot():
+                budget = remaining_budget(AGENT_TURN_DEADLINE)
+                if budget <= 0:
+                    raise DeadlineExceeded("Turn deadline passed before transcription started.")
+                # The executor thread cannot be interrupted, but the turn and its slot stop waiting for it
+                user_text = await asyncio.wait_for(
+                    asyncio.get_running_loop().run_in_executor(_stt_executor, transcribe_upload, file.file), budget)
         if not user_text:
             return JSONResponse(status_code=400, content={"error": "No speech detected. Please speak clearly."})
     except Exception as e:
         logging.error(f"Transcription error: {e}")
-        fallback_audio_url = await generate_fallback_audio()
+        fallback_audio_url = fallback_clips.url("connection_error")
         if fallback_audio_url:
             return JSONResponse(status_code=503, content={"error": "Could not process your audio.", "audio_url": fallback_audio_url})
         return JSONResponse(status_code=503, content={"error": "Speech-to-text unavailable."})
 
-    chat_history[session_id].append({"role": "user", "parts": [user_text]})
+    await session_store.run(session_store.append, session_id, "user", user_text)
 
-    # Check if this is a weather query
-    is_weather, city_name = is_weather_query(user_text)
+    # Route the turn to a skill with one pass over the text
+    route = intent_router.route(user_text)
     
-    if is_weather and city_name:
+    if route.intent is Intent.WEATHER:
+        city_name = route.slots["city"]
         logging.info(f"Weather query detected for city: {city_name}")
         
         # Get weather data
-        weather_data = await weather_skill(city_name)
+        with deadline_scope(UPSTREAM_TURN_DEADLINE):
+            weather_data = await weather_skill(city_name)
         weather_response = format_weather_response(weather_data)
         
         # Add to chat history
-        chat_history[session_id].append({"role": "model", "parts": [weather_response]})
+        await session_store.run(session_store.append, session_id, "model", weather_response)
         
         # Generate TTS for weather response
         try:
-            if not MURF_API_KEY:
-                raise ValueError("Murf API key not set.")
-            murf_text = weather_response[:2900]
-            headers = {"api-key": MURF_API_KEY, "Content-Type": "application/json"}
-            payload = {"text": murf_text, "voiceId": "en-US-marcus"}
-            async with httpx.AsyncClient(timeout=90) as client:
-                murf_resp = await client.post("https://api.murf.ai/v1/speech/generate", headers=headers, json=payload)
-                murf_resp.raise_for_status()
-                audio_url = murf_resp.json().get("audioFile")
-                if not audio_url:
-                    raise RuntimeError("Murf API no audio URL.")
+            audio_url = await synthesize_audio_url(weather_response[:2900])
         except Exception as e:
             logging.error(f"TTS error for weather response: {e}")
             return JSONResponse(status_code=503, content={"error": "Voice generation unavailable.", "transcription": user_text, "llm_response": weather_response})
@@ -914,22 +3454,12 @@ async def agent_chat(session_id: str, file: UploadFile = File(...)):
         }
 
     # Web search route if detected
-    if is_web_query(user_text):
+    if route.intent is Intent.WEB_SEARCH:
         logging.info("Web query detected; performing Tavily search (HTTP)")
-        web_text = webSearch(user_text)
+        web_text = await webSearchAsync(user_text)
         # Optionally TTS for web_text
         try:
-            if not MURF_API_KEY:
-                raise ValueError("Murf API key not set.")
-            murf_text = web_text[:2900]
-            headers = {"api-key": MURF_API_KEY, "Content-Type": "application/json"}
-            payload = {"text": murf_text, "voiceId": "en-US-marcus"}
-            async with httpx.AsyncClient(timeout=90) as client:
-                murf_resp = await client.post("https://api.murf.ai/v1/speech/generate", headers=headers, json=payload)
-                murf_resp.raise_for_status()
-                audio_url = murf_resp.json().get("audioFile")
-                if not audio_url:
-                    raise RuntimeError("Murf API no audio URL.")
+            audio_url = await synthesize_audio_url(web_text[:2900])
         except Exception as e:
             logging.error(f"TTS error for web search response: {e}")
             audio_url = None
@@ -945,34 +3475,30 @@ async def agent_chat(session_id: str, file: UploadFile = File(...)):
     try:
         if not GEMINI_API_KEY:
             raise ValueError("Gemini API key not set.")
-        model = genai.GenerativeModel('gemini-1.5-flash', system_instruction=f"You are {AGENT_PERSONA}. Keep responses brief, natural, and easy to speak aloud. Avoid markdown unless necessary.")
-        conversation = model.start_chat(history=chat_history[session_id][:-1])
-        llm_response = conversation.send_message(user_text)
+        model = get_gemini_model(GEMINI_API_KEY)
+        # Built outside the breaker: a session store error is not a Gemini outage
+        contents = await prompt_window.contents(session_id, GEMINI_API_KEY)
+        with upstream_breakers["gemini"].call():
+            async with llm_stage.slot():
+                budget = remaining_budget(AGENT_TURN_DEADLINE)
+                if budget <= 0:
+                    raise DeadlineExceeded("Turn deadline passed before the LLM call started.")
+                llm_response = await asyncio.wait_for(model.generate_content_async(contents), budget)
         llm_text = (llm_response.text or "").strip()
         if not llm_text:
             raise RuntimeError("LLM returned empty response.")
     except Exception as e:
         logging.error(f"LLM error: {e}")
-        chat_history[session_id].pop()
-        fallback_audio_url = await generate_fallback_audio("The AI model is currently unavailable.")
+        await session_store.run(session_store.pop, session_id)
+        fallback_audio_url = fallback_clips.url("model_unavailable")
         if fallback_audio_url:
             return JSONResponse(status_code=503, content={"error": "AI Model unavailable.", "audio_url": fallback_audio_url, "transcription": user_text})
         return JSONResponse(status_code=503, content={"error": "AI Model unavailable."})
 
-    chat_history[session_id].append({"role": "model", "parts": [llm_text]})
+    await session_store.run(session_store.append, session_id, "model", llm_text)
 
     try:
-        if not MURF_API_KEY:
-            raise ValueError("Murf API key not set.")
-        murf_text = llm_text[:2900]
-        headers = {"api-key": MURF_API_KEY, "Content-Type": "application/json"}
-        payload = {"text": murf_text, "voiceId": "en-US-marcus"}
-        async with httpx.AsyncClient(timeout=90) as client:
-            murf_resp = await client.post("https://api.murf.ai/v1/speech/generate", headers=headers, json=payload)
-            murf_resp.raise_for_status()
-            audio_url = murf_resp.json().get("audioFile")
-            if not audio_url:
-                raise RuntimeError("Murf API no audio URL.")
+        audio_url = await synthesize_audio_url(llm_text[:2900])
     except Exception as e:
         logging.error(f"TTS error: {e}")
         return JSONResponse(status_code=503, content={"error": "Voice generation unavailable.", "transcription": user_text, "llm_response": llm_text})
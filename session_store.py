@@ -0,0 +1,445 @@
+"""
+Session stores: per-session chat history, running summary and API keys
+
+Live objects (websockets, Murf sockets, tasks) stay in the worker that owns the
+connection; everything a reconnect needs to pick a conversation back up lives
+in a SessionStore, so with a shared backend any uvicorn worker can serve it.
+
+    MemorySessionStore   one process; the default
+    SQLiteSessionStore   a SQLite file (WAL mode) shared by every worker on the host
+
+History is kept in Gemini's {"role", "parts"} shape and bounded the same way by
+both backends: a turn cap and a byte cap per session (oldest messages first,
+the newest is always kept and history never starts on a model reply), expiry
+after an idle TTL, and a global byte ceiling that drops the least recently used
+sessions. Messages are numbered from the start of the conversation, so a
+summary can record how many of them it covers after older ones were trimmed.
+
+    store = open_session_store("sqlite:///data/sessions.db")   # relative; sqlite:////abs/path.db
+
+The methods are synchronous. Code on an event loop calls them through `run`,
+which the SQLite store hands to its own thread so lock waits never stall the loop:
+
+    history = await store.run(store.history, session_id)
+"""
+
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+
+def message_size(message: dict) -> int:
+    return sum(len(part.encode()) for part in message["parts"])
+
+
+class SessionStore(ABC):
+    """Interface shared by the backends; see the module docstring for the limits they enforce."""
+
+    def __init__(self, max_turns: int, max_bytes: int, idle_ttl: float, total_bytes: int):
+        self.max_turns = max_turns
+        self.max_bytes = max_bytes
+        self.idle_ttl = idle_ttl
+        self.total_bytes = total_bytes
+        # Counted by this process only
+        self.trimmed_messages = 0
+        self.expired = 0
+        self.evicted = 0
+
+    @abstractmethod
+    def append(self, session_id: str, role: str, text: str):
+        ...
+
+    def history(self, session_id: str) -> list[dict]:
+        """The session's messages, oldest first."""
+        return self.snapshot(session_id)[0]
+
+    @abstractmethod
+    def pop(self, session_id: str) -> dict | None:
+        """Remove and return the newest message (e.g. a user turn the model could not answer)."""
+        ...
+
+    @abstractmethod
+    def snapshot(self, session_id: str) -> tuple[list[dict], int, str, int]:
+        """Messages, the number of the first one, and the running summary with the count it covers."""
+        ...
+
+    @abstractmethod
+    def set_summary(self, session_id: str, summary: str, upto: int):
+        """Store a summary of messages numbered below `upto`, unless a newer one is already stored."""
+        ...
+
+    @abstractmethod
+    def set_keys(self, session_id: str, keys: dict):
+        ...
+
+    @abstractmethod
+    def get_keys(self, session_id: str) -> dict:
+        ...
+
+    @abstractmethod
+    def clear(self, session_id: str):
+        ...
+
+    @abstractmethod
+    def stats(self) -> dict:
+        ...
+
+    async def run(self, method, *args):
+        """Call one of this store's methods from the event loop without blocking it."""
+        return method(*args)
+
+    def _trim_count(self, messages: list, size: int) -> int:
+        """How many of the oldest messages (role, size pairs) to drop to meet the per-session caps."""
+        count = 0
+        while len(messages) - count > 1 and (len(messages) - count > 2 * self.max_turns or size > self.max_bytes
+                                             or messages[count][0] != "user"):
+            size -= messages[count][1]
+            count += 1
+        self.trimmed_messages += count
+        return count
+
+    def _counters(self) -> dict:
+        return {
+            "max_bytes": self.total_bytes,
+            "trimmed_messages": self.trimmed_messages,
+            "expired_sessions": self.expired,
+            "evicted_sessions": self.evicted,
+        }
+
+
+class Conversation:
+    __slots__ = ("messages", "size", "last_used", "dropped", "summary", "summary_upto", "keys")
+
+    def __init__(self):
+        self.messages: list[dict] = []
+        self.size = 0
+        self.last_used = time.time()
+        # Messages trimmed from the front; messages[i] is message number dropped + i of the conversation
+        self.dropped = 0
+        # Running summary of messages numbered below summary_upto
+        self.summary = ""
+        self.summary_upto = 0
+        self.keys: dict = {}
+
+
+class MemorySessionStore(SessionStore):
+    """In-process store. Conversations are kept in least-recently-used order, so idle
+    expiry and the global byte ceiling both evict from the front."""
+
+    backend = "memory"
+
+    def __init__(self, max_turns: int = 20, max_bytes: int = 32 * 1024, idle_ttl: float = 1800,
+                 total_bytes: int = 64 * 1024 * 1024):
+        super().__init__(max_turns, max_bytes, idle_ttl, total_bytes)
+        self._conversations: OrderedDict[str, Conversation] = OrderedDict()
+        self.size = 0
+
+    def _expire(self):
+        deadline = time.time() - self.idle_ttl
+        while self._conversations:
+            session_id, conversation = next(iter(self._conversations.items()))
+            if conversation.last_used > deadline:
+                break
+            self._drop(session_id)
+            self.expired += 1
+
+    def _drop(self, session_id: str):
+        conversation = self._conversations.pop(session_id, None)
+        if conversation is not None:
+            self.size -= conversation.size
+
+    def _touch(self, session_id: str, create: bool = False) -> Conversation | None:
+        self._expire()
+        conversation = self._conversations.get(session_id)
+        if conversation is None and create:
+            conversation = self._conversations[session_id] = Conversation()
+        if conversation is not None:
+            conversation.last_used = time.time()
+            self._conversations.move_to_end(session_id)
+        return conversation
+
+    def append(self, session_id: str, role: str, text: str):
+        conversation = self._touch(session_id, create=True)
+        message = {"role": role, "parts": [text]}
+        conversation.messages.append(message)
+        conversation.size += message_size(message)
+        self.size += message_size(message)
+
+        messages = conversation.messages
+        trim = self._trim_count([(m["role"], message_size(m)) for m in messages], conversation.size)
+        if trim:
+            removed = sum(message_size(m) for m in messages[:trim])
+            del messages[:trim]
+            conversation.dropped += trim
+            conversation.size -= removed
+            self.size -= removed
+
+        while self.size > self.total_bytes and len(self._conversations) > 1:
+            oldest = next(iter(self._conversations))
+            if oldest == session_id:
+                break
+            self._drop(oldest)
+            self.evicted += 1
+
+    def history(self, session_id: str) -> list[dict]:
+        conversation = self._touch(session_id)
+        return list(conversation.messages) if conversation else []
+
+    def pop(self, session_id: str) -> dict | None:
+        conversation = self._touch(session_id)
+        if not conversation or not conversation.messages:
+            return None
+        message = conversation.messages.pop()
+        conversation.size -= message_size(message)
+        self.size -= message_size(message)
+        return message
+
+    def snapshot(self, session_id: str) -> tuple[list[dict], int, str, int]:
+        conversation = self._touch(session_id)
+        if conversation is None:
+            return [], 0, "", 0
+        return list(conversation.messages), conversation.dropped, conversation.summary, conversation.summary_upto
+
+    def set_summary(self, session_id: str, summary: str, upto: int):
+        conversation = self._conversations.get(session_id)
+        if conversation is not None and upto > conversation.summary_upto:
+            conversation.summary = summary
+            conversation.summary_upto = upto
+
+    def set_keys(self, session_id: str, keys: dict):
+        self._touch(session_id, create=True).keys = dict(keys)
+
+    def get_keys(self, session_id: str) -> dict:
+        conversation = self._touch(session_id)
+        return dict(conversation.keys) if conversation else {}
+
+    def clear(self, session_id: str):
+        self._drop(session_id)
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._conversations
+
+    def __len__(self):
+        return len(self._conversations)
+
+    def stats(self) -> dict:
+        self._expire()
+        return {
+            "backend": self.backend,
+            "sessions": len(self._conversations),
+            "messages": sum(len(c.messages) for c in self._conversations.values()),
+            "bytes": self.size,
+            **self._counters(),
+        }
+
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id   TEXT PRIMARY KEY,
+    last_used    REAL NOT NULL,
+    size         INTEGER NOT NULL DEFAULT 0,
+    next_seq     INTEGER NOT NULL DEFAULT 0,
+    summary      TEXT NOT NULL DEFAULT '',
+    summary_upto INTEGER NOT NULL DEFAULT 0,
+    keys         TEXT NOT NULL DEFAULT '{}'
+);
+CREATE INDEX IF NOT EXISTS sessions_last_used ON sessions (last_used);
+CREATE TABLE IF NOT EXISTS messages (
+    session_id TEXT NOT NULL,
+    seq        INTEGER NOT NULL,
+    role       TEXT NOT NULL,
+    parts      TEXT NOT NULL,
+    size       INTEGER NOT NULL,
+    PRIMARY KEY (session_id, seq)
+) WITHOUT ROWID;
+"""
+
+
+class SQLiteSessionStore(SessionStore):
+    """Store in one SQLite file shared by every worker process on the host.
+
+    WAL mode lets readers run alongside the single writer; read-modify-write
+    operations take the write lock up front (BEGIN IMMEDIATE) so two workers
+    never trim or evict from the same stale view. Each call is a few indexed
+    statements against a local file, well under a millisecond, but another
+    worker holding the write lock can stall it for up to `busy_timeout`, so
+    `run` executes calls on a dedicated thread. Calls from other threads (e.g.
+    a sync FastAPI endpoint) share the connection under a lock.
+    """
+
+    backend = "sqlite"
+
+    def __init__(self, path: str, max_turns: int = 20, max_bytes: int = 32 * 1024, idle_ttl: float = 1800,
+                 total_bytes: int = 64 * 1024 * 1024, busy_timeout: float = 1.0):
+        super().__init__(max_turns, max_bytes, idle_ttl, total_bytes)
+        self.path = path
+        self._db = sqlite3.connect(path, isolation_level=None, check_same_thread=False, timeout=busy_timeout)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SQLITE_SCHEMA)
+        self._lock = threading.RLock()
+        # One thread keeps calls in order and never runs two transactions on the connection at once
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="session-store")
+
+    async def run(self, method, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, method, *args)
+
+    @contextmanager
+    def _transaction(self, begin: str):
+        with self._lock:
+            self._db.execute(begin)
+            try:
+                yield self._db
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+
+    def _write(self):
+        return self._transaction("BEGIN IMMEDIATE")
+
+    def _read(self):
+        """A consistent view without the write lock: WAL readers never wait for writers."""
+        return self._transaction("BEGIN")
+
+    def _live(self) -> float:
+        """Sessions used after this time have not expired (read-only calls do not delete them)."""
+        return time.time() - self.idle_ttl
+
+    def _delete(self, db, session_ids: list[str]):
+        db.executemany("DELETE FROM messages WHERE session_id = ?", [(s,) for s in session_ids])
+        db.executemany("DELETE FROM sessions WHERE session_id = ?", [(s,) for s in session_ids])
+
+    def _expire(self, db):
+        expired = [row[0] for row in db.execute(
+            "SELECT session_id FROM sessions WHERE last_used <= ?", (time.time() - self.idle_ttl,))]
+        if expired:
+            self._delete(db, expired)
+            self.expired += len(expired)
+
+    def _touch(self, db, session_id: str, create: bool = False) -> bool:
+        self._expire(db)
+        if create:
+            db.execute("INSERT OR IGNORE INTO sessions (session_id, last_used) VALUES (?, ?)", (session_id, time.time()))
+        updated = db.execute("UPDATE sessions SET last_used = ? WHERE session_id = ?", (time.time(), session_id))
+        return updated.rowcount > 0
+
+    def append(self, session_id: str, role: str, text: str):
+        message = {"role": role, "parts": [text]}
+        size = message_size(message)
+        with self._write() as db:
+            self._touch(db, session_id, create=True)
+            (seq,) = db.execute("SELECT next_seq FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+            db.execute("INSERT INTO messages (session_id, seq, role, parts, size) VALUES (?, ?, ?, ?, ?)",
+                       (session_id, seq, role, json.dumps(message["parts"]), size))
+            db.execute("UPDATE sessions SET next_seq = next_seq + 1, size = size + ? WHERE session_id = ?",
+                       (size, session_id))
+
+            rows = db.execute("SELECT seq, role, size FROM messages WHERE session_id = ? ORDER BY seq",
+                              (session_id,)).fetchall()
+            trim = self._trim_count([(r[1], r[2]) for r in rows], sum(r[2] for r in rows))
+            if trim:
+                db.execute("DELETE FROM messages WHERE session_id = ? AND seq <= ?", (session_id, rows[trim - 1][0]))
+                db.execute("UPDATE sessions SET size = size - ? WHERE session_id = ?",
+                           (sum(r[2] for r in rows[:trim]), session_id))
+
+            (total,) = db.execute("SELECT COALESCE(SUM(size), 0) FROM sessions").fetchone()
+            if total > self.total_bytes:
+                evicted = []
+                for other, other_size in db.execute(
+                        "SELECT session_id, size FROM sessions WHERE session_id != ? ORDER BY last_used", (session_id,)):
+                    if total <= self.total_bytes:
+                        break
+                    evicted.append(other)
+                    total -= other_size
+                self._delete(db, evicted)
+                self.evicted += len(evicted)
+
+    def pop(self, session_id: str) -> dict | None:
+        with self._write() as db:
+            if not self._touch(db, session_id):
+                return None
+            row = db.execute("SELECT seq, role, parts, size FROM messages WHERE session_id = ? ORDER BY seq DESC LIMIT 1",
+                             (session_id,)).fetchone()
+            if row is None:
+                return None
+            seq, role, parts, size = row
+            db.execute("DELETE FROM messages WHERE session_id = ? AND seq = ?", (session_id, seq))
+            # The next message takes the popped one's number, as in the in-memory store
+            db.execute("UPDATE sessions SET next_seq = ?, size = size - ? WHERE session_id = ?", (seq, size, session_id))
+        return {"role": role, "parts": json.loads(parts)}
+
+    def snapshot(self, session_id: str) -> tuple[list[dict], int, str, int]:
+        with self._write() as db:
+            if not self._touch(db, session_id):
+                return [], 0, "", 0
+            next_seq, summary, summary_upto = db.execute(
+                "SELECT next_seq, summary, summary_upto FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+            rows = db.execute("SELECT seq, role, parts FROM messages WHERE session_id = ? ORDER BY seq",
+                              (session_id,)).fetchall()
+        first = rows[0][0] if rows else next_seq
+        return [{"role": role, "parts": json.loads(parts)} for _, role, parts in rows], first, summary, summary_upto
+
+    def set_summary(self, session_id: str, summary: str, upto: int):
+        with self._write() as db:
+            db.execute("UPDATE sessions SET summary = ?, summary_upto = ? WHERE session_id = ? AND summary_upto < ?",
+                       (summary, upto, session_id, upto))
+
+    def set_keys(self, session_id: str, keys: dict):
+        with self._write() as db:
+            self._touch(db, session_id, create=True)
+            db.execute("UPDATE sessions SET keys = ? WHERE session_id = ?", (json.dumps(keys), session_id))
+
+    def get_keys(self, session_id: str) -> dict:
+        with self._read() as db:
+            row = db.execute("SELECT keys FROM sessions WHERE session_id = ? AND last_used > ?",
+                             (session_id, self._live())).fetchone()
+        return json.loads(row[0]) if row else {}
+
+    def clear(self, session_id: str):
+        with self._write() as db:
+            self._delete(db, [session_id])
+
+    def __contains__(self, session_id: str) -> bool:
+        with self._read() as db:
+            return db.execute("SELECT 1 FROM sessions WHERE session_id = ? AND last_used > ?",
+                              (session_id, self._live())).fetchone() is not None
+
+    def __len__(self):
+        with self._read() as db:
+            return db.execute("SELECT COUNT(*) FROM sessions WHERE last_used > ?", (self._live(),)).fetchone()[0]
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        self._db.close()
+
+    def stats(self) -> dict:
+        # Expired sessions still on disk are left for the next write to delete
+        with self._read() as db:
+            live = self._live()
+            sessions, size = db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM sessions WHERE last_used > ?",
+                                        (live,)).fetchone()
+            (messages,) = db.execute("SELECT COUNT(*) FROM messages JOIN sessions USING (session_id) "
+                                     "WHERE last_used > ?", (live,)).fetchone()
+        return {
+            "backend": self.backend,
+            "sessions": sessions,
+            "messages": messages,
+            "bytes": size,
+            **self._counters(),
+        }
+
+
+def open_session_store(url: str, **limits) -> SessionStore:
+    """"memory" (or empty) for the in-process store, "sqlite:///path/to/file.db" for the shared one."""
+    if not url or url == "memory":
+        return MemorySessionStore(**limits)
+    if url.startswith("sqlite:///"):
+        return SQLiteSessionStore(url[len("sqlite:///"):], **limits)
+    raise ValueError(f"Unsupported session store URL: {url}")
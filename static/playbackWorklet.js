@@ -4,6 +4,11 @@ class PlaybackProcessor extends AudioWorkletProcessor {
     super();
     this.audioBuffer = [];
     this.port.onmessage = (event) => {
+      // "flush" drops everything still queued (barge-in / stop button)
+      if (event.data === "flush") {
+        this.audioBuffer = [];
+        return;
+      }
       // Add incoming audio data to the buffer
       this.audioBuffer.push(event.data);
     };
@@ -13,29 +18,23 @@ class PlaybackProcessor extends AudioWorkletProcessor {
     const output = outputs[0];
     const outputChannel = output[0];
 
-    // Check if there is audio data to play
-    if (this.audioBuffer.length > 0) {
+    // Fill the whole render quantum, spanning queued chunks; silence when nothing is queued
+    let written = 0;
+    while (written < outputChannel.length && this.audioBuffer.length > 0) {
       const inputChannel = this.audioBuffer.shift();
-
-      // Write a fixed number of samples to the output
       const samplesToWrite = Math.min(
-        outputChannel.length,
+        outputChannel.length - written,
         inputChannel.length
       );
-      for (let i = 0; i < samplesToWrite; i++) {
-        outputChannel[i] = inputChannel[i];
-      }
+      outputChannel.set(inputChannel.subarray(0, samplesToWrite), written);
+      written += samplesToWrite;
 
       // If the input channel has remaining data, put it back in the buffer
       if (inputChannel.length > samplesToWrite) {
         this.audioBuffer.unshift(inputChannel.subarray(samplesToWrite));
       }
-    } else {
-      // If there's no data, fill the output with silence
-      for (let i = 0; i < outputChannel.length; i++) {
-        outputChannel[i] = 0;
-      }
     }
+    outputChannel.fill(0, written);
 
     // Return true to keep the processor active
     return true;
@@ -49,13 +49,30 @@ document.addEventListener("DOMContentLoaded", () => {
 
   let murfAudioChunks = [];
   let murfFinalReceived = false;
+  // Binary PCM frames are streamed straight into a playback worklet when the browser supports it
+  const binaryAudioSupported = typeof AudioWorkletNode !== "undefined";
+  let playbackContext = null,
+    playbackNode = null,
+    playbackReady = null;
 
   async function connectWebSocket() {
     const protocol = window.location.protocol === "https:" ? "wss:" : "ws:";
     const wsUrl = `${protocol}//${window.location.host}/ws/audio/${window.sessionId}`;
     websocket = new WebSocket(wsUrl);
+    websocket.binaryType = "arraybuffer";
 
     websocket.onopen = () => {
+      if (binaryAudioSupported) {
+        // Announce the device's playback rate; the server sends float32 PCM at exactly that rate
+        websocket.send(
+          JSON.stringify({
+            type: "audio_config",
+            binary: true,
+            sample_rate: ensurePlaybackContext().sampleRate,
+            format: "f32",
+          })
+        );
+      }
       console.log("WebSocket connected for audio streaming");
       websocketStatus.textContent = "WebSocket: Connected";
       websocketStatus.className = "websocket-status connected";
@@ -66,6 +83,10 @@ document.addEventListener("DOMContentLoaded", () => {
 
     websocket.onmessage = (event) => {
       const msg = event.data;
+      if (msg instanceof ArrayBuffer) {
+        handleAudioFrame(msg);
+        return;
+      }
       try {
         const data = JSON.parse(msg);
         switch (data.type) {
@@ -94,6 +115,12 @@ document.addEventListener("DOMContentLoaded", () => {
             murfAudioChunks = [];
             murfFinalReceived = false;
             break;
+          case "audio_flush":
+            handleAudioFlush(data);
+            break;
+          case "audio_config_ack":
+            console.log("Audio delivery:", data.binary ? "binary PCM frames" : "base64 JSON");
+            break;
           default:
             console.log("Unknown message type:", data);
         }
@@ -128,6 +155,7 @@ document.addEventListener("DOMContentLoaded", () => {
 
   recordBtn.addEventListener("click", () => {
     audioContext.resume();
+    if (playbackContext) playbackContext.resume();
     isRecording ? stopRecording() : startRecording();
   });
 
@@ -184,6 +212,7 @@ document.addEventListener("DOMContentLoaded", () => {
   });
 
   stopAudioBtn.addEventListener("click", () => {
+    flushPlaybackNode();
     responseAudio.pause();
     responseAudio.currentTime = 0;
     stopPulseEffect();
@@ -363,6 +392,92 @@ document.addEventListener("DOMContentLoaded", () => {
     }
   }
 
+  // Binary frame: "PCM1" magic, uint32 sample rate, uint16 channels, uint16 bits, then PCM
+  // (32 bits = float32 mono at the negotiated rate, posted as-is; 16 bits = int16, converted here)
+  function handleAudioFrame(buffer) {
+    const view = new DataView(buffer);
+    if (buffer.byteLength < 12 || view.getUint32(0, false) !== 0x50434d31) return;
+    const sampleRate = view.getUint32(4, true);
+    const channels = view.getUint16(8, true) || 1;
+    const bits = view.getUint16(10, true);
+    if (bits === 32) {
+      const pcm = new Float32Array(buffer, 12, Math.floor((buffer.byteLength - 12) / 4));
+      getPlaybackNode(sampleRate).then((node) => {
+        if (node) node.port.postMessage(pcm, [buffer]);
+      });
+      stopAudioBtn.style.display = "inline-block";
+      return;
+    }
+    const samples = new Int16Array(buffer, 12, Math.floor((buffer.byteLength - 12) / 2));
+    const frames = Math.floor(samples.length / channels);
+    const mono = new Float32Array(frames);
+    for (let i = 0; i < frames; i++) {
+      let sum = 0;
+      for (let c = 0; c < channels; c++) sum += samples[i * channels + c];
+      mono[i] = sum / channels / 32768;
+    }
+    getPlaybackNode(sampleRate).then((node) => {
+      if (node) node.port.postMessage(mono, [mono.buffer]);
+    });
+    stopAudioBtn.style.display = "inline-block";
+  }
+
+  function ensurePlaybackContext(sampleRate) {
+    if (playbackContext && sampleRate && playbackContext.sampleRate !== sampleRate) {
+      playbackContext.close();
+      playbackContext = null;
+      playbackNode = null;
+      playbackReady = null;
+    }
+    if (!playbackContext) {
+      const AudioCtx = window.AudioContext || window.webkitAudioContext;
+      playbackContext = sampleRate ? new AudioCtx({ sampleRate }) : new AudioCtx();
+    }
+    return playbackContext;
+  }
+
+  function getPlaybackNode(sampleRate) {
+    ensurePlaybackContext(sampleRate);
+    if (!playbackReady) {
+      const ctx = playbackContext;
+      playbackReady = ctx.audioWorklet
+        .addModule("/static/playbackWorklet.js")
+        .then(() => {
+          playbackNode = new AudioWorkletNode(ctx, "playback-worklet-processor", {
+            outputChannelCount: [1],
+          });
+          playbackNode.connect(ctx.destination);
+          return playbackNode;
+        })
+        .catch((err) => {
+          console.error("Playback worklet failed:", err);
+          return null;
+        });
+    }
+    playbackContext.resume();
+    return playbackReady;
+  }
+
+  function flushPlaybackNode() {
+    if (playbackNode) playbackNode.port.postMessage("flush");
+  }
+
+  function handleAudioFlush(data) {
+    // The user started a new turn: drop buffered audio and stop the reply that is playing
+    flushPlaybackNode();
+    murfAudioChunks = [];
+    murfFinalReceived = false;
+    responseAudio.pause();
+    responseAudio.currentTime = 0;
+    stopWebAudioPlayback();
+    stopPulseEffect();
+    stopAudioBtn.style.display = "none";
+    if (data.interrupted && lastAiBubble) {
+      lastAiBubble.innerHTML = currentLLMResponse;
+      lastAiBubble.classList.add("completed");
+    }
+  }
+
   function handleLLMError(data) {
     console.error("LLM Error:", data.error);
     statusDisplay.textContent = "Error from LLM.";
@@ -540,7 +655,17 @@ async function playViaWebAudio(wavBytes) {
     src.buffer = buf;
     src.connect(ctx.destination);
     src.start(0);
+    window.webAudioSource = src;
   } catch (err) {
     console.error("WebAudio decode failed:", err);
   }
 }
+
+function stopWebAudioPlayback() {
+  if (window.webAudioSource) {
+    try {
+      window.webAudioSource.stop();
+    } catch {}
+    window.webAudioSource = null;
+  }
+}
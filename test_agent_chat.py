@@ -0,0 +1,135 @@
+"""
+Tests for the non-blocking /agent/chat pipeline (no network access needed)
+"""
+
+import asyncio
+import time
+from types import SimpleNamespace
+
+import httpx
+from fastapi.testclient import TestClient
+
+import main
+
+
+class FakeGeminiModel:
+    async def generate_content_async(self, contents, stream=False, generation_config=None):
+        await asyncio.sleep(0.05)
+        return SimpleNamespace(text=f"You said: {contents[-1]['parts'][0]}")
+
+
+def test_agent_chat_keeps_the_event_loop_free(monkeypatch):
+    def slow_transcribe(file):
+        time.sleep(0.2)  # the SDK's blocking upload-and-poll
+        return "hello there"
+
+    monkeypatch.setattr(main, "ASSEMBLYAI_API_KEY", "fake")
+    monkeypatch.setattr(main, "GEMINI_API_KEY", "fake")
+    monkeypatch.setattr(main, "MURF_API_KEY", None)
+    monkeypatch.setattr(main, "transcribe_upload", slow_transcribe)
+    monkeypatch.setattr(main, "get_gemini_model", lambda api_key: FakeGeminiModel())
+    main.session_store.clear("agent")
+
+    async def run():
+        gaps = []
+
+        async def ticker():
+            last = time.perf_counter()
+            while True:
+                await asyncio.sleep(0.01)
+                now = time.perf_counter()
+                gaps.append(now - last)
+                last = now
+
+        tick = asyncio.create_task(ticker())
+        responses = await asyncio.gather(*[main.agent_chat("agent", SimpleNamespace(file=None)) for _ in range(2)])
+        tick.cancel()
+        return responses, max(gaps)
+
+    responses, worst_gap = asyncio.run(run())
+    assert worst_gap < 0.1
+    # No Murf key: the text reply still comes back, with voice marked unavailable
+    assert all(r.status_code == 503 and b"You said: hello there" in r.body for r in responses)
+    assert main.stt_stage.stats()["completed"] >= 2
+    assert main.llm_stage.stats()["service_time"]["samples"] >= 2
+
+
+def test_stage_limiter_caps_concurrency_and_times_the_queue():
+    stage = main.StageLimiter("test", concurrency=2)
+    peak = []
+
+    async def work():
+        async with stage.slot():
+            peak.append(stage.running)
+            await asyncio.sleep(0.05)
+
+    async def run():
+        await asyncio.gather(*[work() for _ in range(4)])
+
+    asyncio.run(run())
+    stats = stage.stats()
+    assert max(peak) == 2
+    assert stats["completed"] == 4 and stats["running"] == 0 and stats["waiting"] == 0
+    # Two requests waited a full service time for a slot
+    assert stats["queue_time"]["max_ms"] >= 40
+    assert stats["service_time"]["samples"] == 4
+
+
+def test_one_shot_renders_are_served_locally_on_repeat(monkeypatch, tts_cache):
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.host)
+        if request.url.host == "api.murf.ai":
+            return httpx.Response(200, json={"audioFile": "https://cdn.murf.example/render.wav"})
+        return httpx.Response(200, content=b"RIFF fake wav")
+
+    transport = httpx.MockTransport(handler)
+    monkeypatch.setattr(main, "MURF_API_KEY", "fake")
+    for upstream in ("murf", "audio_proxy"):
+        monkeypatch.setitem(main.http_clients, upstream, httpx.AsyncClient(transport=transport))
+
+    async def run():
+        first = await main.synthesize_audio_url("Sorry, try again.")
+        await asyncio.sleep(0.01)  # background copy into the cache
+        return first, await main.synthesize_audio_url("Sorry,  try again.")
+
+    first, second = asyncio.run(run())
+    # Both forms are local; a fresh render also names Murf's file to fall back on
+    assert first == f"{second}?src=https%3A%2F%2Fcdn.murf.example%2Frender.wav"
+    assert second.startswith("/tts-audio/")
+    assert calls == ["api.murf.ai", "cdn.murf.example"]
+
+    served = TestClient(main.app).get(second)
+    assert served.content == b"RIFF fake wav" and served.headers["content-type"] == "audio/wav"
+    assert tts_cache.stats()["bytes_saved"] == len(b"RIFF fake wav")
+
+
+def test_background_cache_fills_are_kept_alive_and_failures_logged(caplog):
+    async def boom():
+        await asyncio.sleep(0)
+        raise RuntimeError("disk full")
+
+    async def run():
+        task = main.spawn_background(boom(), name="cache-test")
+        assert task in main.background_tasks
+        await asyncio.gather(task, return_exceptions=True)
+        await asyncio.sleep(0)
+        return task
+
+    task = asyncio.run(run())
+    assert task not in main.background_tasks
+    assert "cache-test failed: RuntimeError('disk full')" in caplog.text
+
+
+def test_fresh_render_not_cached_yet_is_redirected_through_the_proxy(monkeypatch, tmp_path):
+    monkeypatch.setitem(main.http_clients, "audio_proxy", httpx.AsyncClient(
+        transport=httpx.MockTransport(lambda request: httpx.Response(200, content=b"RIFF proxied"))))
+    monkeypatch.setattr(main, "audio_file_cache",
+                        main.DiskLRUCache("audio_files", str(tmp_path / "audio"), 1024 * 1024, 64 * 1024))
+    key = "0" * 64
+    client = TestClient(main.app)
+    served = client.get(f"/tts-audio/{key}?src=https://cdn.murf.example/render.wav")
+    assert served.content == b"RIFF proxied"
+    assert served.history[0].status_code == 307
+    assert client.get(f"/tts-audio/{key}").status_code == 404
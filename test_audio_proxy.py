@@ -0,0 +1,132 @@
+"""
+Tests for the streaming /proxy-audio endpoint and its on-disk cache (no network access needed)
+"""
+
+import asyncio
+import os
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+
+AUDIO = bytes(range(256)) * 40
+
+
+@pytest.fixture
+def upstream(monkeypatch, tmp_path):
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        range_header = request.headers.get("range")
+        if range_header:
+            start = int(range_header.split("=")[1].split("-")[0])
+            return httpx.Response(206, content=AUDIO[start:],
+                                  headers={"Content-Range": f"bytes {start}-{len(AUDIO) - 1}/{len(AUDIO)}"})
+        return httpx.Response(200, content=AUDIO)
+
+    monkeypatch.setitem(main.http_clients, "audio_proxy", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    monkeypatch.setattr(main, "audio_file_cache",
+                        main.DiskLRUCache("audio_files", str(tmp_path / "audio"), 1024 * 1024, 64 * 1024))
+    return requests
+
+
+def test_audio_is_streamed_once_then_served_from_disk_with_ranges(upstream):
+    client = TestClient(main.app)
+    url = "/proxy-audio/?url=https://murf.example/clip.mp3"
+
+    first = client.get(url, headers={"Range": "bytes=0-"})
+    assert first.status_code == 200 and first.content == AUDIO
+    assert first.headers["content-type"] == "audio/mpeg"
+
+    again = client.get(url)
+    ranged = client.get(url, headers={"Range": "bytes=10-19"})
+    assert again.content == AUDIO
+    assert ranged.status_code == 206 and ranged.content == AUDIO[10:20]
+    assert len(upstream) == 1
+    assert main.audio_file_cache.stats()["hits"] == 2
+
+
+def test_cache_file_io_runs_off_the_event_loop(upstream, monkeypatch):
+    on_loop = []
+
+    def recording(method):
+        def wrapper(*args, **kwargs):
+            try:
+                asyncio.get_running_loop()
+                on_loop.append(method.__name__)
+            except RuntimeError:
+                pass
+            return method(*args, **kwargs)
+        return wrapper
+
+    for cls, name in ((main.DiskLRUCache, "get_path"), (main.DiskLRUCache, "writer"),
+                      (main.DiskCacheWriter, "write"), (main.DiskCacheWriter, "commit")):
+        monkeypatch.setattr(cls, name, recording(getattr(cls, name)))
+    client = TestClient(main.app)
+    assert client.get("/proxy-audio/?url=https://murf.example/clip.mp3").content == AUDIO
+    assert client.get("/proxy-audio/?url=https://murf.example/clip.mp3").content == AUDIO
+    assert on_loop == [] and len(upstream) == 1
+
+
+def test_seek_into_uncached_audio_is_forwarded_and_not_cached(upstream):
+    client = TestClient(main.app)
+    response = client.get("/proxy-audio/?url=https://murf.example/clip.wav", headers={"Range": "bytes=100-"})
+    assert response.status_code == 206 and response.content == AUDIO[100:]
+    assert response.headers["content-type"] == "audio/x-wav"
+    assert upstream[0].headers["range"] == "bytes=100-"
+    assert main.audio_file_cache.stats()["entries"] == 0
+
+
+def test_disk_cache_evicts_lru_skips_oversized_and_reloads(tmp_path):
+    directory = str(tmp_path / "cache")
+    cache = main.DiskLRUCache("test", directory, max_bytes=250, max_entry_bytes=150)
+    assert cache.put("a", b"a" * 100) and cache.put("b", b"b" * 100)
+    assert cache.get_path("a")            # "a" is now most recently used
+    assert not cache.put("huge", b"h" * 200)
+    cache.put("c", b"c" * 100)            # evicts "b"
+    assert cache.get_path("b") is None
+    assert open(cache.get_path("c"), "rb").read() == b"c" * 100
+    assert cache.stats()["evictions"] == 1
+
+    reloaded = main.DiskLRUCache("test", directory, max_bytes=250, max_entry_bytes=150)
+    assert reloaded.get_path("a") and reloaded.get_path("c")
+    assert reloaded.stats()["bytes"] == 200
+
+
+def test_workers_sharing_a_directory_see_each_others_entries_and_one_budget(tmp_path):
+    directory = str(tmp_path / "cache")
+    first = main.DiskLRUCache("test", directory, max_bytes=250, max_entry_bytes=150)
+    second = main.DiskLRUCache("test", directory, max_bytes=250, max_entry_bytes=150)
+    assert second.get_path("a") is None       # index built before the other worker wrote "a"
+
+    assert first.put("a", b"a" * 100)
+    assert open(second.get_path("a"), "rb").read() == b"a" * 100
+    assert second.put("b", b"b" * 100) and first.put("c", b"c" * 100)   # three entries, room for two
+    assert sum(entry.stat().st_size for entry in os.scandir(directory)) <= 250
+    assert first.get_path("a") is None and second.get_path("a") is None
+    assert first.get_path("b") and second.get_path("c")
+
+
+def test_startup_keeps_other_workers_temp_files_and_lost_ones_do_not_raise(tmp_path):
+    directory = tmp_path / "cache"
+    directory.mkdir()
+    other_worker = directory / "999999999-inflight.part"
+    abandoned = directory / "999999998-old.part"
+    other_worker.write_bytes(b"x")
+    abandoned.write_bytes(b"x")
+    os.utime(abandoned, (0, 0))
+    own = directory / f"{os.getpid()}-mine.part"
+    own.write_bytes(b"x")
+
+    cache = main.DiskLRUCache("test", str(directory), max_bytes=1000, max_entry_bytes=100)
+    writer = cache.writer("a")
+    assert other_worker.exists() and not abandoned.exists() and not own.exists()
+    assert os.path.basename(writer.temp_path).startswith(f"{os.getpid()}-")
+
+    writer.write(b"data")
+    os.remove(writer.temp_path)           # e.g. swept by an older build of another worker
+    assert writer.commit() is False
+    assert cache.get_path("a") is None
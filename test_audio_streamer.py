@@ -0,0 +1,218 @@
+"""
+Tests for the realtime AudioStreamer session handling (AssemblyAI client is faked)
+"""
+
+import asyncio
+
+import assemblyai.streaming.v3 as aai_v3
+import pytest
+
+import main
+from testkit import FakeChunk, FakeStreamingClient, RecordingWebSocket
+
+
+@pytest.fixture(autouse=True)
+def fake_assemblyai(monkeypatch):
+    monkeypatch.setattr(aai_v3, "StreamingClient", FakeStreamingClient)
+
+
+def test_end_of_turn_starts_llm_without_another_audio_frame():
+    streamer = main.AudioStreamer()
+    started = []
+
+    async def fake_llm_response(session_id, user_text, websocket, turn_started_at=None):
+        started.append(user_text)
+        await streamer.send_llm_start(streamer.get_sender(session_id, websocket), user_text, turn_started_at)
+
+    streamer.stream_llm_response = fake_llm_response
+
+    async def run():
+        ws = RecordingWebSocket()
+        await streamer.set_session_keys("s1", {"ASSEMBLYAI_API_KEY": "fake"})
+        await streamer.start_streaming("s1", ws)
+        FakeStreamingClient.instances[-1].fire_end_of_turn("Tell me a joke.", 1)
+        for _ in range(100):
+            if started:
+                break
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.01)
+        await streamer.stop_streaming("s1")
+        return ws
+
+    ws = asyncio.run(run())
+    assert started == ["Tell me a joke."]
+    assert [m["type"] for m in ws.sent] == ["transcription", "llm_start"]
+    assert streamer.latency_stats()["samples"] == 1
+    assert "s1" not in streamer.sessions
+
+
+def test_session_state_lives_in_one_object_and_is_torn_down_at_once():
+    streamer = main.AudioStreamer()
+
+    async def run():
+        await streamer.set_session_keys("s4", {"ASSEMBLYAI_API_KEY": "fake"})
+        await streamer.start_streaming("s4", RecordingWebSocket())
+        for _ in range(3):
+            await streamer.stream_audio_data("s4", b"\x00" * 320)
+        session = streamer.sessions["s4"]
+        stats = session.stats()
+        await streamer.stop_streaming("s4")
+        return session, stats
+
+    session, stats = asyncio.run(run())
+    assert stats["audio_frames"] == 3 and stats["audio_bytes"] == 960
+    assert FakeStreamingClient.instances[-1].streamed == 3
+    assert "s4" not in streamer.sessions and streamer.active_sessions == 0
+    assert session.sender.closed and session.transcript_consumer.cancelled()
+    assert not hasattr(session, "__dict__")
+
+
+class SlowWebSocket(RecordingWebSocket):
+    def __init__(self, delay):
+        super().__init__()
+        self.delay = delay
+
+    async def send_text(self, text):
+        await asyncio.sleep(self.delay)
+        await super().send_text(text)
+
+
+def test_sender_keeps_order_merges_text_and_prioritizes_audio():
+    async def run():
+        ws = SlowWebSocket(0.01)
+        sender = main.SessionSender(ws, max_queue=4)
+        await sender.send({"type": "llm_start", "transcript": "hi"})
+        for word in ["Hello", " there", " friend"]:
+            await sender.send({"type": "llm_chunk", "text": word, "is_complete": False})
+        await sender.send({"type": "llm_complete", "full_response": "Hello there friend", "is_complete": True})
+        await sender.send({"type": "murf_audio_chunk", "audio": "AAAA"})
+        await sender.drain()
+        sender.close()
+        return ws, sender
+
+    ws, sender = asyncio.run(run())
+    types = [m["type"] for m in ws.sent]
+    assert types.index("llm_chunk") < types.index("llm_complete")
+    assert types.index("murf_audio_chunk") < types.index("llm_complete")
+    chunks = [m["text"] for m in ws.sent if m["type"] == "llm_chunk"]
+    assert "".join(chunks) == "Hello there friend"
+    assert sender.merged >= 1
+
+
+def test_sender_applies_backpressure_when_full():
+    async def run():
+        ws = SlowWebSocket(0.02)
+        sender = main.SessionSender(ws, max_queue=2)
+        for i in range(6):
+            await sender.send({"type": "murf_audio_chunk", "audio": str(i)})
+            assert sender.depth <= 2
+        await sender.drain()
+        sender.close()
+        return ws
+
+    ws = asyncio.run(run())
+    assert [m["audio"] for m in ws.sent] == [str(i) for i in range(6)]
+
+
+class FakeGeminiModel:
+    """Async streaming stand-in for GenerativeModel; `gate` holds the stream after the first chunk."""
+
+    def __init__(self, chunks, gate=None):
+        self.chunks = chunks
+        self.gate = gate
+
+    async def generate_content_async(self, contents, stream=False, generation_config=None):
+        self.contents = contents
+        async def iterate():
+            for i, text in enumerate(self.chunks):
+                if i == 1 and self.gate is not None:
+                    await self.gate.wait()
+                yield FakeChunk(text)
+        return iterate()
+
+
+def run_llm_turn(monkeypatch, model, cancel_after_first_chunk=False):
+    monkeypatch.setattr(main, "MURF_API_KEY", None)
+    monkeypatch.setattr(main, "get_gemini_model", lambda api_key: model)
+    main.session_store.clear("s2")
+    streamer = main.AudioStreamer()
+    asyncio.run(streamer.set_session_keys("s2", {"GEMINI_API_KEY": "fake"}))
+
+    async def run():
+        ws = RecordingWebSocket()
+        task = asyncio.create_task(streamer.stream_llm_response("s2", "tell me a joke", ws))
+        if cancel_after_first_chunk:
+            while not streamer.first_token_latencies:
+                await asyncio.sleep(0.001)
+            task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        await streamer.sessions["s2"].sender.drain()
+        return ws
+
+    return streamer, asyncio.run(run())
+
+
+def test_llm_stream_runs_on_the_event_loop(monkeypatch):
+    model = FakeGeminiModel(["Why did ", "the chicken..."])
+    streamer, ws = run_llm_turn(monkeypatch, model)
+    types = [m["type"] for m in ws.sent]
+    assert types[0] == "llm_start" and types[-1] == "llm_complete"
+    assert ws.sent[-1]["full_response"] == "Why did the chicken..."
+    stats = streamer.llm_stats()
+    assert stats["completed"] == 1 and stats["active"] == 0
+    assert stats["time_to_first_token"]["samples"] == 1
+    assert main.session_store.history("s2")[-1] == {"role": "model", "parts": ["Why did the chicken..."]}
+    assert model.contents == [{"role": "user", "parts": ["tell me a joke"]}]
+
+
+def test_llm_stream_can_be_cancelled(monkeypatch):
+    streamer, ws = run_llm_turn(monkeypatch, FakeGeminiModel(["Hello", " never sent"], gate=asyncio.Event()),
+                                cancel_after_first_chunk=True)
+    assert "llm_complete" not in [m["type"] for m in ws.sent]
+    assert streamer.llm_stats()["cancelled"] == 1
+    assert streamer.llm_stats()["active"] == 0
+    assert main.session_store.history("s2")[-1]["role"] == "user"
+
+
+def test_new_user_turn_barges_in_on_the_previous_reply():
+    streamer = main.AudioStreamer()
+    cancelled = []
+
+    async def slow_llm_response(session_id, user_text, websocket, turn_started_at=None):
+        await streamer.send_llm_start(streamer.get_sender(session_id, websocket), user_text, turn_started_at)
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(user_text)
+            raise
+
+    streamer.stream_llm_response = slow_llm_response
+
+    async def wait_for(condition):
+        for _ in range(200):
+            if condition():
+                return
+            await asyncio.sleep(0.005)
+
+    async def run():
+        ws = RecordingWebSocket()
+        await streamer.set_session_keys("s3", {"ASSEMBLYAI_API_KEY": "fake"})
+        await streamer.start_streaming("s3", ws)
+        client = FakeStreamingClient.instances[-1]
+        client.fire_end_of_turn("Tell me a long story.", 1)
+        await wait_for(lambda: streamer.sessions["s3"].turn_tasks)
+        # The user starts talking over the reply
+        client.fire_end_of_turn("wait", 2, end_of_turn=False)
+        await wait_for(lambda: cancelled)
+        await streamer.sessions["s3"].sender.drain()
+        await streamer.stop_streaming("s3")
+        return ws
+
+    ws = asyncio.run(run())
+    assert cancelled == ["Tell me a long story."]
+    assert streamer.barge_ins == 1
+    flushes = [m for m in ws.sent if m["type"] == "audio_flush"]
+    assert flushes == [{"type": "audio_flush", "interrupted": True}]
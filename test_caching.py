@@ -0,0 +1,154 @@
+"""
+Tests for the in-process caches used by the skills (no network access needed)
+"""
+
+import asyncio
+import json
+
+import pytest
+
+import main
+
+
+@pytest.fixture(autouse=True)
+def no_gazetteer(monkeypatch):
+    """Exercise the API/cache path; the offline gazetteer has its own tests."""
+    monkeypatch.setattr(main, "_gazetteer", None)
+    monkeypatch.setattr(main, "_gazetteer_loaded", True)
+
+
+def test_ttl_cache_expiry_and_lru(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(main.time, "time", lambda: now[0])
+
+    cache = main.TTLCache("test", maxsize=2, ttl=10)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "a" is now most recently used
+    cache.set("c", 3)           # evicts "b"
+    assert cache.get("b") is main._CACHE_MISS
+    assert cache.evictions == 1
+
+    now[0] += 11
+    assert cache.get("a") is main._CACHE_MISS
+    assert cache.stats()["hits"] == 1
+
+
+def test_geocoding_cache_positive_and_negative(monkeypatch):
+    main.geocode_cache.clear()
+    calls = []
+
+    async def fake_fetch(city_name):
+        calls.append(city_name)
+        return (48.85, 2.35) if city_name.lower().strip() == "paris" else None
+
+    monkeypatch.setattr(main, "fetch_coordinates", fake_fetch)
+
+    async def run():
+        assert await main.get_coordinates("Paris") == (48.85, 2.35)
+        assert await main.get_coordinates("  paris! ") == (48.85, 2.35)
+        assert await main.get_coordinates("InvalidCity123") is None
+        assert await main.get_coordinates("invalidcity123") is None
+
+    asyncio.run(run())
+    assert calls == ["Paris", "InvalidCity123"]
+
+
+def test_geocoding_errors_are_not_cached(monkeypatch):
+    main.geocode_cache.clear()
+    calls = []
+
+    async def failing_fetch(city_name):
+        calls.append(city_name)
+        raise RuntimeError("network down")
+
+    monkeypatch.setattr(main, "fetch_coordinates", failing_fetch)
+    asyncio.run(main.get_coordinates("Berlin"))
+    asyncio.run(main.get_coordinates("Berlin"))
+    assert len(calls) == 2
+
+
+def test_geocoding_snapshot_roundtrip(tmp_path):
+    path = str(tmp_path / "geocode.json")
+    main.geocode_cache.clear()
+    main.geocode_cache.set("paris", (48.85, 2.35))
+    main.geocode_cache.set("nowhere", None, ttl=60)
+    assert main.save_geocode_snapshot(path) == 1
+
+    main.geocode_cache.clear()
+    assert main.load_geocode_snapshot(path) == 1
+    assert main.geocode_cache.get("paris") == (48.85, 2.35)
+    with open(path, encoding="utf-8") as f:
+        assert json.load(f)[0][0] == "paris"
+
+
+def test_weather_cache_coalesces_concurrent_lookups(monkeypatch):
+    main.weather_cache.clear()
+    calls = []
+
+    async def fake_fetch(lat, lon):
+        calls.append((lat, lon))
+        await asyncio.sleep(0.01)
+        return {"temperature": 12.0, "wind_speed": 5.0, "description": "Overcast",
+                "weather_code": 3, "humidity": 80}
+
+    monkeypatch.setattr(main, "fetch_weather", fake_fetch)
+
+    async def run():
+        # Nearby coordinates snap to the same grid cell
+        results = await asyncio.gather(*[main.get_weather(51.5074 + i * 0.0005, -0.1278) for i in range(50)])
+        assert all(r["temperature"] == 12.0 for r in results)
+        assert await main.get_weather(51.51, -0.13) is not None
+
+    asyncio.run(run())
+    assert calls == [main.weather_grid_key(51.5074, -0.1278)]
+
+
+def test_weather_failures_are_not_cached(monkeypatch):
+    main.weather_cache.clear()
+    calls = []
+
+    async def failing_fetch(lat, lon):
+        calls.append((lat, lon))
+        return None
+
+    monkeypatch.setattr(main, "fetch_weather", failing_fetch)
+    assert asyncio.run(main.get_weather(48.85, 2.35)) is None
+    assert asyncio.run(main.get_weather(48.85, 2.35)) is None
+    assert len(calls) == 2
+
+
+def test_multi_city_weather_uses_one_batched_call(monkeypatch):
+    main.weather_cache.clear()
+    coords = {"paris": (48.85, 2.35), "berlin": (52.52, 13.41)}
+    batches = []
+
+    async def fake_coordinates(city_name):
+        return coords.get(city_name.lower())
+
+    async def fake_batch(keys):
+        batches.append(keys)
+        return [{"temperature": 10.0 + i, "wind_speed": 3.0, "description": "Clear sky",
+                 "weather_code": 0, "humidity": 50} for i in range(len(keys))]
+
+    monkeypatch.setattr(main, "get_coordinates", fake_coordinates)
+    monkeypatch.setattr(main, "fetch_weather_batch", fake_batch)
+
+    result = asyncio.run(main.weather_skill("paris and berlin"))
+    assert [c["city"] for c in result["cities"]] == ["paris", "berlin"]
+    assert len(batches) == 1 and len(batches[0]) == 2
+    assert "Here's the weather in berlin" in main.format_weather_response(result)
+
+    # Both grid cells are now cached, so a repeat needs no upstream call
+    asyncio.run(main.weather_skill("Berlin & Paris"))
+    assert len(batches) == 1
+
+
+def test_parse_current_weather_payload():
+    payload = {"current": {"time": "2025-01-01T12:00", "interval": 900, "temperature_2m": 4.2,
+                           "relative_humidity_2m": 71, "wind_speed_10m": 12.5, "weather_code": 61}}
+    assert main.parse_current_weather(payload) == {
+        "temperature": 4.2, "wind_speed": 12.5, "description": "Slight rain",
+        "weather_code": 61, "humidity": 71,
+    }
+    assert main.parse_current_weather({}) is None
@@ -0,0 +1,211 @@
+"""
+Tests for the bounded session stores (in-memory and SQLite) and the prompt window built from them
+"""
+
+import asyncio
+import sqlite3
+
+import pytest
+
+import main
+from session_store import MemorySessionStore, SessionStore, SQLiteSessionStore, open_session_store
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_store(request, tmp_path):
+    stores = []
+
+    def make(**limits):
+        if request.param == "memory":
+            store = MemorySessionStore(**limits)
+        else:
+            store = SQLiteSessionStore(str(tmp_path / "sessions.db"), **limits)
+        stores.append(store)
+        return store
+
+    yield make
+    for store in stores:
+        if isinstance(store, SQLiteSessionStore):
+            store.close()
+
+
+def fake_clock(monkeypatch, start=1000.0):
+    now = [start]
+    monkeypatch.setattr(main.time, "time", lambda: now[0])
+    return now
+
+
+def test_turn_cap_keeps_latest_turns_starting_with_user(make_store):
+    store = make_store(max_turns=2, max_bytes=10_000)
+    for i in range(4):
+        store.append("s", "user", f"q{i}")
+        store.append("s", "model", f"a{i}")
+    assert store.history("s") == [
+        {"role": "user", "parts": ["q2"]}, {"role": "model", "parts": ["a2"]},
+        {"role": "user", "parts": ["q3"]}, {"role": "model", "parts": ["a3"]},
+    ]
+    assert store.trimmed_messages == 4
+    assert store.stats()["bytes"] == 8
+
+
+def test_byte_cap_drops_oldest_but_keeps_newest_message(make_store):
+    store = make_store(max_turns=100, max_bytes=10)
+    store.append("s", "user", "12345")
+    store.append("s", "model", "12345")
+    store.append("s", "user", "this one alone is over the cap")
+    assert store.history("s") == [{"role": "user", "parts": ["this one alone is over the cap"]}]
+    assert store.stats()["bytes"] == len("this one alone is over the cap")
+
+
+def test_idle_sessions_expire(monkeypatch, make_store):
+    now = fake_clock(monkeypatch)
+    store = make_store(idle_ttl=60)
+    store.append("old", "user", "hi")
+    now[0] += 30
+    store.append("new", "user", "hello")
+    now[0] += 45
+    assert store.history("old") == []
+    assert store.history("new") == [{"role": "user", "parts": ["hello"]}]
+    assert store.stats()["expired_sessions"] == 1
+    assert store.stats()["bytes"] == 5
+
+
+def test_global_ceiling_evicts_least_recently_used_sessions(monkeypatch, make_store):
+    now = fake_clock(monkeypatch)
+    store = make_store(max_bytes=100, total_bytes=20)
+    store.append("a", "user", "x" * 8)
+    now[0] += 1
+    store.append("b", "user", "y" * 8)
+    now[0] += 1
+    store.history("a")                  # "a" is now most recently used
+    now[0] += 1
+    store.append("c", "user", "z" * 8)  # 24 bytes > 20: "b" goes
+    assert "b" not in store
+    assert "a" in store and "c" in store
+    assert store.stats()["evicted_sessions"] == 1
+
+
+def test_pop_removes_the_unanswered_user_turn(make_store):
+    store = make_store()
+    store.append("s", "user", "hello")
+    assert store.pop("s") == {"role": "user", "parts": ["hello"]}
+    assert store.history("s") == []
+    assert store.stats()["bytes"] == 0
+    assert store.pop("missing") is None
+
+
+def test_keys_and_summary_round_trip(make_store):
+    store = make_store()
+    store.set_keys("s", {"GEMINI_API_KEY": "g"})
+    store.append("s", "user", "hello")
+    store.set_summary("s", "newer", 4)
+    store.set_summary("s", "stale", 2)
+    assert store.get_keys("s") == {"GEMINI_API_KEY": "g"}
+    assert store.snapshot("s") == ([{"role": "user", "parts": ["hello"]}], 0, "newer", 4)
+    assert store.get_keys("missing") == {}
+
+
+def test_sqlite_store_is_shared_between_workers(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    first, second = SQLiteSessionStore(path, max_turns=1), open_session_store(f"sqlite:///{path}", max_turns=1)
+    first.append("s", "user", "q0")
+    first.append("s", "model", "a0")
+    second.append("s", "user", "q1")    # trims q0/a0 for both workers
+    first.pop("s")
+    second.append("s", "user", "q1 again")
+    assert first.snapshot("s") == ([{"role": "user", "parts": ["q1 again"]}], 2, "", 0)
+    first.close()
+    second.close()
+
+
+def test_incomplete_backend_fails_when_created():
+    class HistoryOnly(SessionStore):
+        def append(self, session_id, role, text):
+            pass
+
+    with pytest.raises(TypeError):
+        HistoryOnly(20, 1024, 60, 1024)
+
+
+def test_sqlite_lock_waits_do_not_stall_the_event_loop(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    store = SQLiteSessionStore(path, busy_timeout=2)
+    other_worker = sqlite3.connect(path, isolation_level=None)
+    other_worker.execute("BEGIN IMMEDIATE")
+
+    async def run():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        tick = asyncio.create_task(ticker())
+        append = asyncio.create_task(store.run(store.append, "s", "user", "hello"))
+        await asyncio.sleep(0.2)            # the append is waiting for the other worker's lock...
+        assert not append.done() and ticks >= 10
+        other_worker.execute("COMMIT")
+        await append                        # ...and lands once it is released
+        tick.cancel()
+        return await store.run(store.history, "s")
+
+    history = asyncio.run(run())
+    assert history == [{"role": "user", "parts": ["hello"]}]
+    assert store.stats()["sessions"] == 1
+    other_worker.close()
+    store.close()
+
+
+class FakeSummaryModel:
+    def __init__(self):
+        self.prompts = []
+
+    async def generate_content_async(self, contents, stream=False, generation_config=None):
+        self.prompts.append(contents)
+        return FakeResponse(f"summary #{len(self.prompts)}")
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+def fill(store, turns):
+    for i in range(turns):
+        store.append("s", "user", f"question {i}")
+        store.append("s", "model", f"answer {i}")
+    store.append("s", "user", "newest")
+
+
+def test_prompt_window_summarizes_older_turns_in_the_background(monkeypatch):
+    model = FakeSummaryModel()
+    monkeypatch.setattr(main, "get_gemini_model", lambda api_key: model)
+    store = MemorySessionStore()
+    window = main.PromptWindow(store, turns=2, token_budget=10_000)
+    fill(store, 4)
+
+    async def run():
+        before = await window.contents("s", "key")
+        await asyncio.sleep(0)  # let the summary task run
+        return before, await window.contents("s", "key")
+
+    before, after = asyncio.run(run())
+    # Before the summary lands, the turns that left the window are still sent verbatim
+    assert len(before) == 9 and before[-1] == {"role": "user", "parts": ["newest"]}
+    assert "user: question 0" in model.prompts[0] and "question 1" in model.prompts[0]
+    assert "question 2" not in model.prompts[0]
+    assert after[0]["parts"] == ["Summary of our conversation so far: summary #1"]
+    assert [m["parts"][0] for m in after[2:]] == ["question 2", "answer 2", "question 3", "answer 3", "newest"]
+    assert len(model.prompts) == 1
+
+
+def test_prompt_window_enforces_the_token_budget():
+    store = MemorySessionStore()
+    window = main.PromptWindow(store, turns=10, token_budget=12)
+    fill(store, 3)
+    contents = asyncio.run(window.contents("s"))  # no key: nothing is summarized
+    assert contents[0]["role"] == "user" and contents[-1]["parts"] == ["newest"]
+    assert sum(map(main.message_tokens, contents)) <= 12
+    assert window.budget_trims > 0
@@ -0,0 +1,125 @@
+"""
+Tests for the pre-rendered fallback/filler clip catalog (no network access needed)
+"""
+
+import asyncio
+import json
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from testkit import FakeChunk, RecordingWebSocket, wav_bytes
+
+CLIP = wav_bytes(b"\x01\x00" * 2400)
+
+
+@pytest.fixture
+def murf_calls(monkeypatch):
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.host)
+        if request.url.host == "api.murf.ai":
+            assert json.loads(request.content)["format"] == "WAV"
+            return httpx.Response(200, json={"audioFile": "https://cdn.murf.example/clip.wav"})
+        return httpx.Response(200, content=CLIP)
+
+    transport = httpx.MockTransport(handler)
+    monkeypatch.setattr(main, "MURF_API_KEY", "fake")
+    for upstream in ("murf", "audio_proxy"):
+        monkeypatch.setitem(main.http_clients, upstream, httpx.AsyncClient(transport=transport))
+    return calls
+
+
+def test_assets_load_and_missing_clips_are_rendered_once(monkeypatch, murf_calls):
+    texts, assets = {"connection_error": "Sorry.", "thinking": "Hmm."}, {"connection_error": "static/tts_fallback.wav"}
+    catalog = main.ClipCatalog(texts, assets, "en-US-amara")
+    assert catalog.load_assets() == 1
+    assert catalog.url("thinking") == "/fallback-audio/connection_error"  # stands in until rendered
+
+    asyncio.run(catalog.render_missing())
+    assert murf_calls == ["api.murf.ai", "cdn.murf.example"]
+    assert catalog.get("thinking").pcm_format == (24000, 1, 16)
+    assert catalog.stats()["missing"] == []
+
+    # The next boot reads the render from the TTS cache instead of asking Murf again
+    again = main.ClipCatalog(texts, assets, "en-US-amara")
+    again.load_assets()
+    asyncio.run(again.render_missing())
+    assert len(murf_calls) == 2 and again.get("thinking").wav == CLIP
+
+    monkeypatch.setattr(main, "fallback_clips", catalog)
+    served = TestClient(main.app).get(catalog.url("thinking"))
+    assert served.content == CLIP and served.headers["content-type"] == "audio/wav"
+    assert TestClient(main.app).get("/fallback-audio/unknown").status_code == 404
+
+
+def test_agent_chat_answers_stt_failure_with_a_catalog_clip(monkeypatch):
+    catalog = main.ClipCatalog(main.FALLBACK_CLIP_TEXTS, main.FALLBACK_CLIP_ASSETS, "en-US-amara")
+    catalog.load_assets()
+    monkeypatch.setattr(main, "fallback_clips", catalog)
+    monkeypatch.setattr(main, "ASSEMBLYAI_API_KEY", "fake")
+
+    def broken_transcribe(file):
+        raise RuntimeError("upstream down")
+
+    monkeypatch.setattr(main, "transcribe_upload", broken_transcribe)
+    response = asyncio.run(main.agent_chat("agent", None))
+    assert response.status_code == 503
+    assert json.loads(response.body)["audio_url"] == "/fallback-audio/connection_error"
+
+
+class SlowFailingModel:
+    def __init__(self, delay, fail=False):
+        self.delay = delay
+        self.fail = fail
+
+    async def generate_content_async(self, contents, stream=False, generation_config=None):
+        async def iterate():
+            await asyncio.sleep(self.delay)
+            if self.fail:
+                raise RuntimeError("model overloaded")
+            yield FakeChunk("Here you go.")
+        return iterate()
+
+
+def run_turn(monkeypatch, model, filler_delay):
+    catalog = main.ClipCatalog({}, {}, "en-US-amara")
+    catalog.add("thinking", CLIP)
+    catalog.add("connection_error", CLIP)
+    monkeypatch.setattr(main, "fallback_clips", catalog)
+    monkeypatch.setattr(main, "THINKING_FILLER_DELAY", filler_delay)
+    monkeypatch.setattr(main, "get_gemini_model", lambda api_key: model)
+    main.session_store.clear("s5")
+    streamer = main.AudioStreamer()
+    asyncio.run(streamer.set_session_keys("s5", {"GEMINI_API_KEY": "fake", "MURF_API_KEY": "fake"}))
+    monkeypatch.setattr(streamer, "get_murf_connection", lambda session_id: None)
+
+    async def run():
+        ws = RecordingWebSocket()
+        await streamer.stream_llm_response("s5", "what is the meaning of life", ws)
+        await streamer.sessions["s5"].sender.drain()
+        return ws
+
+    return catalog, [m["type"] for m in asyncio.run(run()).sent]
+
+
+def test_slow_reply_gets_the_thinking_filler(monkeypatch):
+    catalog, types = run_turn(monkeypatch, SlowFailingModel(0.1), filler_delay=0.02)
+    assert types == ["llm_start", "murf_audio_chunk", "murf_audio_final", "llm_chunk", "llm_complete"]
+    assert catalog.stats()["served"] == 1
+
+
+def test_fast_reply_cancels_the_filler(monkeypatch):
+    catalog, types = run_turn(monkeypatch, SlowFailingModel(0.01), filler_delay=0.2)
+    assert types == ["llm_start", "llm_chunk", "llm_complete"]
+    assert catalog.stats()["served"] == 0
+
+
+def test_model_failure_plays_the_fallback_clip(monkeypatch):
+    catalog, types = run_turn(monkeypatch, SlowFailingModel(0.01, fail=True), filler_delay=0)
+    # No "model_unavailable" clip in this catalog: the generic one stands in (audio lane goes first)
+    assert types == ["llm_start", "murf_audio_chunk", "murf_audio_final", "llm_error"]
+    assert catalog.stats()["served"] == 1
@@ -0,0 +1,67 @@
+"""
+Tests for the offline gazetteer index (fully offline)
+"""
+
+import asyncio
+
+import pytest
+
+import main
+from gazetteer import Gazetteer, build_index, normalize_name, read_seed_tsv
+
+ROWS = [
+    (["Paris"], 48.8534, 2.3488, 11000000),
+    (["Paris"], 33.6609, -95.5555, 25000),
+    (["São Paulo"], -23.5475, -46.6361, 22000000),
+    (["Bangalore", "Bengaluru"], 12.9716, 77.5946, 12300000),
+    (["Bangkok"], 13.7540, 100.5014, 10500000),
+    (["New York", "NYC"], 40.7128, -74.0060, 18800000),
+]
+
+
+@pytest.fixture
+def index(tmp_path):
+    path = str(tmp_path / "gazetteer.bin")
+    assert build_index(ROWS, path) == 8
+    gazetteer = Gazetteer(path)
+    yield gazetteer
+    gazetteer.close()
+
+
+def test_normalize_name():
+    assert normalize_name("  São-Paulo! ") == "sao paulo"
+
+
+def test_exact_prefers_most_populous(index):
+    place = index.exact("PARIS")
+    assert (place.latitude, place.longitude) == (48.8534, 2.3488)
+    assert index.exact("sao paulo").population == 22000000
+    assert index.exact("bengaluru").name == "bengaluru"
+    assert index.exact("Atlantis") is None
+
+
+def test_prefix_and_fuzzy(index):
+    assert [p.name for p in index.prefix("ban")] == ["bangalore", "bangkok"]
+    assert index.fuzzy("new yrok")[0].name == "new york"
+    assert index.lookup("Bangkokk").name == "bangkok"
+    assert index.lookup("xyz") is None
+
+
+def test_bundled_seed_builds(tmp_path):
+    path = str(tmp_path / "seed.bin")
+    assert build_index(read_seed_tsv("data/cities.tsv"), path) > 100
+    gazetteer = Gazetteer(path)
+    assert gazetteer.exact("London") is not None
+    gazetteer.close()
+
+
+def test_get_coordinates_uses_gazetteer_before_api(index, monkeypatch):
+    main.geocode_cache.clear()
+    monkeypatch.setattr(main, "_gazetteer", index)
+    monkeypatch.setattr(main, "_gazetteer_loaded", True)
+
+    async def no_network(city_name):
+        raise AssertionError("geocoding API should not be called")
+
+    monkeypatch.setattr(main, "fetch_coordinates", no_network)
+    assert asyncio.run(main.get_coordinates("New York")) == (40.7128, -74.006)
@@ -0,0 +1,68 @@
+"""
+Tests for the compiled intent router
+"""
+
+import pytest
+
+from main import Intent, IntentRouter, intent_router, is_weather_query, is_web_query, split_city_names
+from testkit import CORPUS, legacy_route
+
+# Classification of the test_weather.py queries before the router was introduced
+PINNED = [
+    ("What's the weather in Paris?", (True, "paris")),
+    ("How hot is it in London?", (True, "london")),
+    ("Tell me about the temperature in Tokyo", (True, "tokyo")),
+    ("What's the forecast for New York?", (True, "new york")),
+    ("Hello, how are you today?", (False, None)),
+    ("Weather in Berlin", (True, "berlin")),
+    ("Temperature in Sydney", (True, "sydney")),
+]
+
+
+@pytest.mark.parametrize("query,expected", PINNED)
+def test_weather_queries_are_pinned(query, expected):
+    assert is_weather_query(query) == expected
+
+
+def test_web_queries():
+    assert is_web_query("Hello, how are you today?")
+    assert is_web_query("who won the match")
+    assert not is_web_query("What's the weather in Paris today?")
+    assert not is_web_query("tell me a joke")
+
+
+@pytest.mark.parametrize("query", CORPUS)
+def test_router_matches_legacy_intent(query):
+    assert intent_router.route(query).intent == legacy_route(query)[0]
+
+
+def test_route_returns_slots():
+    route = intent_router.route("weather in Paris and Berlin")
+    assert route.intent is Intent.WEATHER
+    assert route.slots == {"city": "paris and berlin"}
+    assert intent_router.route("tell me a joke").slots == {}
+
+
+@pytest.mark.parametrize("query,cities", [
+    ("What's the weather in Paris, Berlin and Rome?", ["paris", "berlin", "rome"]),
+    ("What's the weather in New York, NY?", ["new york"]),
+    ("What's the temperature for Rome, Italy?", ["rome"]),
+    ("Weather in Boston, MA and Austin, TX", ["boston", "austin"]),
+    ("Weather in Trinidad and Tobago", ["trinidad and tobago"]),
+    ("Temperature in Ulm & Bonn", ["ulm", "bonn"]),
+])
+def test_routed_weather_slot_splits_into_cities(query, cities):
+    route = intent_router.route(query)
+    assert route.intent is Intent.WEATHER
+    assert split_city_names(route.slots["city"]) == cities
+
+
+def test_overlapping_keywords_of_different_skills():
+    router = IntentRouter()
+    router.register(Intent.WEATHER, ["prices"])
+    router.register(Intent.WEB_SEARCH, ["price", "rice"])
+    assert router.route("the price went up").intent is Intent.WEB_SEARCH
+    # "prices" wins by registration order; "price" and "rice" overlap it
+    assert router.route("prices").intent is Intent.WEATHER
+    router.register(Intent.CHAT, ["ice"])
+    assert router.route("ice").intent is Intent.CHAT
@@ -0,0 +1,304 @@
+"""
+Tests for the session-scoped Murf streaming connection (against a local fake Murf server)
+"""
+
+import asyncio
+import base64
+import json
+
+import numpy as np
+
+import main
+from testkit import FakeMurfServer, wav_bytes
+
+
+async def collect(context):
+    return [base64.b64decode(chunk).decode() async for chunk in context.audio_chunks()]
+
+
+def test_replies_share_one_socket_and_are_routed_by_context():
+    async def run():
+        async with FakeMurfServer() as server:
+            connection = main.MurfConnection(server.url, "key", "ctx")
+            await connection.connect()
+            first = await connection.open_context()
+            second = await connection.open_context()
+            await first.send_text("one")
+            await second.send_text("two")
+            await first.end()
+            await second.end()
+            results = await asyncio.gather(collect(first), collect(second))
+            await connection.close()
+            return server, first, second, results
+
+    server, first, second, results = asyncio.run(run())
+    assert results == [["one"], ["two"]]
+    assert server.connections == 1
+    assert first.warm and second.warm
+    assert first.context_id != second.context_id
+
+
+def test_dropped_socket_is_reopened_and_unplayed_context_replayed():
+    async def run():
+        async with FakeMurfServer() as server:
+            server.drop_on_text = 1
+            connection = main.MurfConnection(server.url, "key", "ctx")
+            context = await connection.open_context()
+            await context.send_text("hello")
+            await context.end()
+            audio = await asyncio.wait_for(collect(context), timeout=2)
+            await connection.close()
+            return server, audio
+
+    server, audio = asyncio.run(run())
+    assert audio == ["hello"]
+    assert server.connections == 2
+
+
+class SlowSocket:
+    """Stand-in Murf socket whose sends take a moment, so other tasks run mid-replay."""
+
+    def __init__(self):
+        self.sent = []
+        self._closed = asyncio.Event()
+
+    async def send(self, raw):
+        await asyncio.sleep(0.01)
+        self.sent.append(json.loads(raw))
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        await self._closed.wait()
+        raise StopAsyncIteration
+
+    async def close(self):
+        self._closed.set()
+
+
+def test_text_sent_during_a_replay_goes_out_once_and_in_order(monkeypatch):
+    sockets = []
+
+    async def connect(uri, **kwargs):
+        sockets.append(SlowSocket())
+        return sockets[-1]
+
+    monkeypatch.setattr(main.websockets, "connect", connect)
+
+    async def run():
+        connection = main.MurfConnection("ws://murf.example", "key", "ctx")
+        context = await connection.open_context()
+        await context.send_text("one")
+        connection._drop(sockets[0])   # no audio yet: the context waits for a replay
+        reconnect = asyncio.create_task(connection.connect())
+        await asyncio.sleep(0.005)     # the replay is in flight
+        await context.send_text("two")
+        await context.end()
+        await reconnect
+        await connection.close()
+
+    asyncio.run(run())
+    texts = [message.get("text") for message in sockets[1].sent]
+    assert texts == [None, "one", "two", ""]
+
+
+def test_close_during_the_handshake_does_not_leak_the_socket(monkeypatch):
+    sockets = []
+
+    async def slow_connect(uri, **kwargs):
+        await asyncio.sleep(0.05)
+        sockets.append(SlowSocket())
+        return sockets[-1]
+
+    monkeypatch.setattr(main.websockets, "connect", slow_connect)
+
+    async def run():
+        connection = main.MurfConnection("ws://murf.example", "key", "ctx")
+        prewarm = asyncio.create_task(connection.connect())
+        await asyncio.sleep(0.01)      # the handshake is in flight
+        await connection.close()
+        await prewarm
+        return connection
+
+    connection = asyncio.run(run())
+    assert not connection.connected and connection._reader is None
+    assert sockets[0]._closed.is_set()
+
+
+def test_cancelled_reply_clears_its_murf_context():
+    async def run():
+        async with FakeMurfServer(synthesis_delay=0.5) as server:
+            connection = main.MurfConnection(server.url, "key", "ctx")
+            await connection.connect()
+            sender = main.SessionSender(RecordingWebSocket())
+            text_queue = asyncio.Queue()
+            text_queue.put_nowait("a long answer")
+            task = asyncio.create_task(main.AudioStreamer().speak(connection, sender, text_queue, final_timeout=5))
+            await asyncio.sleep(0.05)
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            await asyncio.sleep(0.05)
+            await connection.close()
+            sender.close()
+            return server
+
+    server = asyncio.run(run())
+    assert server.cleared == ["ctx_1"]
+
+
+class RecordingWebSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def send_text(self, text):
+        self.sent.append(text)
+
+    async def send_bytes(self, data):
+        self.sent.append(data)
+
+
+def test_parse_wav_chunk_and_frame_header():
+    assert main.parse_wav_chunk(wav_bytes(b"\x01\x00\x02\x00")) == ((24000, 1, 16), b"\x01\x00\x02\x00")
+    assert main.parse_wav_chunk(b"\x05\x00") == (None, b"\x05\x00")
+    frame = main.encode_audio_frame(b"\x01\x00", (24000, 1, 16))
+    assert main.AUDIO_FRAME_HEADER.unpack_from(frame) == (b"PCM1", 24000, 1, 16)
+    assert frame[main.AUDIO_FRAME_HEADER.size:] == b"\x01\x00"
+
+
+def test_binary_mode_sends_pcm_frames_on_the_audio_lane():
+    async def run():
+        async with FakeMurfServer() as server:
+            connection = main.MurfConnection(server.url, "key", "ctx")
+            ws = RecordingWebSocket()
+            sender = main.SessionSender(ws)
+            text_queue = asyncio.Queue()
+            text_queue.put_nowait("Hello there, this is a binary test.")
+            text_queue.put_nowait(None)
+            await main.AudioStreamer().speak(connection, sender, text_queue, final_timeout=2, audio_format={"binary": True})
+            await sender.drain()
+            sender.close()
+            await connection.close()
+            return ws.sent
+
+    sent = asyncio.run(run())
+    frames = [m for m in sent if isinstance(m, bytes)]
+    assert len(frames) == 1
+    assert frames[0][:4] == b"PCM1"
+    assert frames[0][main.AUDIO_FRAME_HEADER.size:] == b"Hello there, this is a binary test."
+    assert json.loads(sent[-1]) == {"type": "murf_audio_final"}
+
+
+def test_client_rate_negotiation_picks_murf_rate():
+    assert main.choose_murf_sample_rate(48000) == 48000
+    assert main.choose_murf_sample_rate(16000) == 24000
+    assert main.choose_murf_sample_rate(96000) == 48000
+
+    streamer = main.AudioStreamer()
+    accepted = streamer.set_audio_config("s", {"binary": True, "sample_rate": 22050, "format": "f32"})
+    assert accepted == {"binary": True, "sample_rate": 22050, "format": "f32", "murf_sample_rate": 24000}
+    assert main.murf_stream_params(accepted) == "sample_rate=24000&channel_type=MONO&format=PCM"
+    assert streamer.set_audio_config("s", {"binary": True, "sample_rate": "bogus"}) == {"binary": True}
+    assert main.murf_stream_params({"binary": True}) == main.MURF_STREAM_PARAMS
+
+
+def sine_pcm(rate, seconds=0.5, freq=440.0):
+    t = np.arange(int(rate * seconds)) / rate
+    return (np.sin(2 * np.pi * freq * t) * 20000).astype("<i2").tobytes()
+
+
+def test_pcm_converter_is_seamless_across_chunks():
+    pcm = sine_pcm(24000)
+    whole = np.frombuffer(main.PcmConverter(24000, 22050).convert(pcm), dtype="<f4")
+
+    converter = main.PcmConverter(24000, 22050)
+    # Odd-sized chunks also split samples across chunk boundaries
+    parts = [converter.convert(pcm[i:i + 777]) for i in range(0, len(pcm), 777)]
+    chunked = np.frombuffer(b"".join(parts), dtype="<f4")
+
+    assert abs(len(whole) - 24000 * 0.5 * 22050 / 24000) <= 2
+    assert len(chunked) == len(whole)
+    assert np.allclose(chunked, whole, atol=1e-6)
+
+
+def test_pcm_converter_passthrough_and_s16_output():
+    pcm = sine_pcm(48000, seconds=0.01)
+    floats = np.frombuffer(main.PcmConverter(48000, 48000).convert(pcm), dtype="<f4")
+    assert np.allclose(floats * 32768, np.frombuffer(pcm, dtype="<i2"))
+    converter = main.PcmConverter(24000, 48000, "s16")
+    assert converter.frame_format == (48000, 1, 16)
+    assert len(converter.convert(sine_pcm(24000, seconds=0.1))) // 2 in range(4798, 4801)
+
+
+def test_repeated_text_is_replayed_from_the_tts_cache(monkeypatch, tmp_path):
+    monkeypatch.setattr(main, "tts_audio_cache", main.TtsAudioCache(
+        1024, main.DiskLRUCache("tts_audio", str(tmp_path), 1024 * 1024, 64 * 1024)))
+
+    async def run():
+        async with FakeMurfServer() as server:
+            monkeypatch.setattr(main, "MURF_API_KEY", "key")
+            monkeypatch.setattr(main, "MURF_WS_URL", server.url)
+            streamer = main.AudioStreamer()
+            ws = RecordingWebSocket()
+            await streamer.stream_tts("It is  sunny in Paris.", ws, "s")
+            contexts = main.murf_stats["contexts"]
+            await streamer.stream_tts("It is sunny in Paris.", ws, "s")
+            await streamer.sessions["s"].sender.drain()
+            replayed_without_murf = main.murf_stats["contexts"] == contexts
+            await streamer.sessions["s"].murf.close()
+            streamer.sessions["s"].sender.close()
+            return ws.sent, replayed_without_murf
+
+    sent, replayed_without_murf = asyncio.run(run())
+    messages = [json.loads(m) for m in sent]
+    audio = [base64.b64decode(m["audio"]) for m in messages if m["type"] == "murf_audio_chunk"]
+    assert audio == [b"It is  sunny in Paris."] * 2
+    assert [m["type"] for m in messages].count("murf_audio_final") == 2
+    assert replayed_without_murf
+    stats = main.tts_audio_cache.stats()
+    assert stats["memory_hits"] == 1 and stats["misses"] == 1
+    assert stats["bytes_saved"] == len(b"It is  sunny in Paris.")
+
+
+def test_tts_cache_disk_tier_survives_memory_eviction(tmp_path):
+    cache = main.TtsAudioCache(10, main.DiskLRUCache("tts_audio", str(tmp_path), 1024, 1024))
+
+    async def run():
+        await cache.put_chunks("a", [b"RIFF....", b"pcm"])
+        await cache.put_chunks("b", [b"0123456789"])   # pushes "a" out of memory
+        await cache.put_file("c", b"RIFFwav")
+        return await cache.get_chunks("a"), await cache.read_file("c"), await cache.has_file("d")
+
+    assert asyncio.run(run()) == ([b"RIFF....", b"pcm"], b"RIFFwav", False)
+    assert cache.stats()["disk_hits"] == 2 and cache.stats()["misses"] == 1
+    assert main.tts_cache_key(" Hi  there ", "v", "WAV", 44100) == main.tts_cache_key("Hi there", "v", "WAV", 44100)
+    assert main.tts_cache_key("Hi there", "v", "PCM", 24000) != main.tts_cache_key("Hi there", "v", "WAV", 44100)
+
+
+def test_audio_cut_short_by_a_dropped_socket_is_not_cached(monkeypatch, tmp_path):
+    monkeypatch.setattr(main, "tts_audio_cache", main.TtsAudioCache(
+        1024, main.DiskLRUCache("tts_audio", str(tmp_path), 1024 * 1024, 64 * 1024)))
+
+    async def run():
+        async with FakeMurfServer() as server:
+            connection = main.MurfConnection(server.url, "key", "ctx")
+            ws = RecordingWebSocket()
+            sender = main.SessionSender(ws)
+            text_queue = asyncio.Queue()
+            text_queue.put_nowait("This first sentence is long enough to be sent. ")
+            task = asyncio.create_task(main.AudioStreamer().speak(
+                connection, sender, text_queue, final_timeout=2, cache_key="key"))
+            while not any("murf_audio_chunk" in m for m in ws.sent):
+                await asyncio.sleep(0.01)
+            server.drop_on_text = 1   # the socket dies mid-utterance
+            text_queue.put_nowait("And this second sentence never makes it out.")
+            text_queue.put_nowait(None)
+            await asyncio.wait_for(task, timeout=3)
+            sender.close()
+            await connection.close()
+            return ws.sent
+
+    sent = asyncio.run(run())
+    assert json.loads(sent[-1]) == {"type": "murf_audio_final"}
+    assert asyncio.run(main.tts_audio_cache.get_chunks("key")) is None
+    assert main.tts_audio_cache.stats()["stores"] == 0
@@ -0,0 +1,62 @@
+"""
+Tests for the sentence-aware segmenter between the LLM stream and TTS
+"""
+
+import asyncio
+
+import main
+
+
+def feed_words(segmenter, text):
+    segments = []
+    for word in text.split(" "):
+        segments += segmenter.feed(word + " ")
+    rest = segmenter.finish()
+    return segments + ([rest] if rest else [])
+
+
+def test_cuts_on_sentence_boundaries_and_skips_abbreviations():
+    segmenter = main.TextSegmenter(min_chars=10, max_chars=200)
+    text = "It is sunny in Paris today. Dr. Smith says bring a hat. Enjoy!"
+    assert feed_words(segmenter, text) == [
+        "It is sunny in Paris today.",
+        "Dr. Smith says bring a hat.",
+        "Enjoy!",
+    ]
+
+
+def test_first_segment_may_end_on_a_clause():
+    segmenter = main.TextSegmenter(min_chars=10, max_chars=200)
+    segments = feed_words(segmenter, "Well, the short answer is yes, but it depends on the season.")
+    assert segments == ["Well, the short answer is yes,", "but it depends on the season."]
+
+
+def test_long_text_is_cut_within_the_budget():
+    segmenter = main.TextSegmenter(min_chars=10, max_chars=40)
+    segments = feed_words(segmenter, "word " * 30)
+    assert all(len(segment) <= 40 for segment in segments)
+    assert " ".join(segments).split() == ["word"] * 30
+
+
+def test_first_flush_deadline_sends_buffered_words():
+    async def run():
+        queue = asyncio.Queue()
+        queue.put_nowait("Hmm let me think about")
+        segments = []
+
+        async def consume():
+            async for segment in main.segment_text_stream(queue, main.TextSegmenter(min_chars=200),
+                                                          first_flush_deadline=0.02):
+                segments.append(segment)
+
+        consumer = asyncio.create_task(consume())
+        await asyncio.sleep(0.1)
+        first = list(segments)
+        queue.put_nowait(" that for a second.")
+        queue.put_nowait(None)
+        await consumer
+        return first, segments
+
+    first, segments = asyncio.run(run())
+    assert first == ["Hmm let me think"]
+    assert segments == ["Hmm let me think", "about that for a second."]
@@ -0,0 +1,213 @@
+"""
+Tests for the per-upstream circuit breakers and deadline-bounded hedged GETs (no network access needed)
+"""
+
+import asyncio
+import sqlite3
+import threading
+import time
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from google.api_core.exceptions import PermissionDenied, ResourceExhausted
+
+import main
+
+
+@pytest.fixture(autouse=True)
+def breakers(monkeypatch):
+    fresh = {name: main.CircuitBreaker(name, failure_threshold=3, reset_timeout=30) for name in main.upstream_breakers}
+    monkeypatch.setattr(main, "upstream_breakers", fresh)
+    monkeypatch.setattr(main, "UPSTREAM_HEDGE_DELAY", 0.05)
+    return fresh
+
+
+def fake_upstream(monkeypatch, *replies):
+    """Serve the scripted replies in order: (delay seconds, status code)."""
+    calls = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        delay, status = replies[min(len(calls), len(replies) - 1)]
+        calls.append(request)
+        await asyncio.sleep(delay)
+        return httpx.Response(status, json={"ok": status == 200})
+
+    monkeypatch.setitem(main.http_clients, "open_meteo", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    return calls
+
+
+def test_breaker_opens_rejects_and_recovers_through_one_probe(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(main.time, "monotonic", lambda: now[0])
+    breaker = main.CircuitBreaker("test", failure_threshold=2, reset_timeout=10)
+
+    def call(error=None):
+        with breaker.call():
+            if error:
+                raise error
+
+    bad_key = httpx.HTTPStatusError("401", request=None, response=httpx.Response(401))
+    for error in (RuntimeError("down"), bad_key, RuntimeError("down"), RuntimeError("down")):
+        with pytest.raises(type(error)):
+            call(error)
+    # The 401 was an answer, so only the last two failures were in a row
+    assert breaker.state == "open" and breaker.stats()["trips"] == 1
+    with pytest.raises(main.CircuitOpenError):
+        call()
+
+    now[0] += 10
+    assert breaker.state == "half_open"
+    breaker.allow()                      # the probe is in flight...
+    with pytest.raises(main.CircuitOpenError):
+        breaker.allow()                  # ...so everyone else still fails fast
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.stats()["rejected"] == 2
+
+
+def test_session_key_quota_and_auth_errors_do_not_trip_the_shared_breaker():
+    breaker = main.CircuitBreaker("gemini", failure_threshold=2, reset_timeout=10)
+    quota, forbidden = ResourceExhausted("quota exceeded"), PermissionDenied("API key not valid")
+
+    for error in (quota, forbidden, quota):
+        with pytest.raises(type(error)):
+            with breaker.call(session_key=True):
+                raise error
+    assert breaker.state == "closed" and breaker.stats()["failures"] == 0
+
+    # The server's own key running out of quota is everyone's outage
+    for _ in range(2):
+        with pytest.raises(ResourceExhausted):
+            with breaker.call():
+                raise quota
+    assert breaker.state == "open"
+
+
+def test_slow_get_is_hedged_and_the_faster_copy_wins(monkeypatch, breakers):
+    calls = fake_upstream(monkeypatch, (1.0, 200), (0.0, 200))
+
+    async def run():
+        started = time.perf_counter()
+        response = await main.resilient_get("open_meteo", "https://api.open-meteo.example/v1/forecast")
+        return response, time.perf_counter() - started
+
+    response, elapsed = asyncio.run(run())
+    assert response.json() == {"ok": True} and elapsed < 0.5
+    assert len(calls) == 2
+    assert breakers["open_meteo"].stats()["hedge_wins"] == 1
+
+
+def test_failed_get_is_retried_within_the_deadline(monkeypatch, breakers):
+    calls = fake_upstream(monkeypatch, (0.0, 503), (0.0, 200))
+    response = asyncio.run(main.resilient_get("open_meteo", "https://api.open-meteo.example/v1/forecast"))
+    assert response.status_code == 200 and len(calls) == 2
+    stats = breakers["open_meteo"].stats()
+    assert stats["retries"] == 1 and stats["failures"] == 0
+
+
+def test_deadline_bounds_the_whole_turn_and_trips_the_breaker(monkeypatch, breakers):
+    fake_upstream(monkeypatch, (5.0, 200))
+
+    async def turn():
+        with main.deadline_scope(0.2):
+            return await main.fetch_weather(52.5, 13.4)
+
+    async def run():
+        started = time.perf_counter()
+        results = [await turn() for _ in range(3)]
+        return results, time.perf_counter() - started
+
+    results, elapsed = asyncio.run(run())
+    assert results == [None, None, None] and elapsed < 1.5
+    assert breakers["open_meteo"].state == "open"
+
+    # While open, the next lookup fails fast without touching the network
+    started = time.perf_counter()
+    assert asyncio.run(main.fetch_weather(52.5, 13.4)) is None
+    assert time.perf_counter() - started < 0.05
+
+
+def test_open_breaker_serves_the_web_search_fallback_immediately(monkeypatch, breakers):
+    searched = []
+
+    class FakeTavily:
+        async def search(self, query, **kwargs):
+            searched.append(query)
+            return {"answer": "never"}
+
+    monkeypatch.setattr(main, "get_tavily_client", lambda api_key=None, use_async=False: FakeTavily())
+    for _ in range(3):
+        breakers["tavily"].record_failure()
+    text = asyncio.run(main.webSearchAsync("who won the match tonight"))
+    assert "unavailable" in text and searched == []
+    assert main.service_stats()["upstreams"]["tavily"]["state"] == "open"
+
+
+def test_hung_murf_render_is_bounded_by_the_agent_turn_deadline(monkeypatch, breakers):
+    async def hung(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(60)
+
+    class FakeGeminiModel:
+        async def generate_content_async(self, contents, stream=False, generation_config=None):
+            return SimpleNamespace(text="Hello there.")
+
+    monkeypatch.setitem(main.http_clients, "murf", httpx.AsyncClient(transport=httpx.MockTransport(hung)))
+    monkeypatch.setattr(main, "AGENT_TURN_DEADLINE", 0.3)
+    monkeypatch.setattr(main, "ASSEMBLYAI_API_KEY", "fake")
+    monkeypatch.setattr(main, "GEMINI_API_KEY", "fake")
+    monkeypatch.setattr(main, "MURF_API_KEY", "fake")
+    monkeypatch.setattr(main, "transcribe_upload", lambda file: "tell me something")
+    monkeypatch.setattr(main, "get_gemini_model", lambda api_key: FakeGeminiModel())
+    main.session_store.clear("deadline")
+
+    started = time.perf_counter()
+    response = asyncio.run(main.agent_chat("deadline", SimpleNamespace(file=None)))
+    assert time.perf_counter() - started < 1.0
+    assert response.status_code == 503 and b"Voice generation unavailable" in response.body
+    assert breakers["murf"].stats()["failures"] == 1
+
+    # With the budget already spent, Murf is not called and not blamed
+    async def late_render():
+        with main.deadline_scope(0):
+            await main.request_murf_render({"text": "hi"})
+
+    with pytest.raises(main.DeadlineExceeded):
+        asyncio.run(late_render())
+    assert breakers["murf"].stats()["failures"] == 1
+
+
+def test_hung_transcription_is_bounded_by_the_agent_turn_deadline(monkeypatch, breakers):
+    released = threading.Event()
+
+    def hung_transcribe(file):
+        released.wait(5)
+        return "too late"
+
+    monkeypatch.setattr(main, "AGENT_TURN_DEADLINE", 0.2)
+    monkeypatch.setattr(main, "ASSEMBLYAI_API_KEY", "fake")
+    monkeypatch.setattr(main, "transcribe_upload", hung_transcribe)
+
+    started = time.perf_counter()
+    try:
+        response = asyncio.run(main.agent_chat("stt-deadline", SimpleNamespace(file=None)))
+    finally:
+        released.set()
+    assert time.perf_counter() - started < 1.0
+    assert response.status_code == 503
+    assert breakers["assemblyai"].stats()["failures"] == 1
+    assert main.stt_stage.running == 0
+
+
+def test_session_store_errors_while_building_the_prompt_do_not_count_against_gemini(monkeypatch, breakers):
+    async def broken_contents(session_id, api_key):
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(main, "ASSEMBLYAI_API_KEY", "fake")
+    monkeypatch.setattr(main, "GEMINI_API_KEY", "fake")
+    monkeypatch.setattr(main, "transcribe_upload", lambda file: "tell me something")
+    monkeypatch.setattr(main.prompt_window, "contents", broken_contents)
+    main.session_store.clear("store-error")
+
+    response = asyncio.run(main.agent_chat("store-error", SimpleNamespace(file=None)))
+    assert response.status_code == 503
+    assert breakers["gemini"].stats()["calls"] == 0 and breakers["gemini"].stats()["failures"] == 0
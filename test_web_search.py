@@ -0,0 +1,97 @@
+"""
+Tests for the Tavily web search helpers (Tavily clients are faked; no network access needed)
+"""
+
+import asyncio
+
+import pytest
+
+import main
+
+
+@pytest.fixture(autouse=True)
+def empty_search_cache():
+    main.web_search_cache.clear()
+    yield
+    main.web_search_cache.clear()
+
+
+class FakeAsyncTavily:
+    def __init__(self, delay=0.0, answer="Spain won the final."):
+        self.delay = delay
+        self.answer = answer
+        self.queries = []
+
+    async def search(self, query, **kwargs):
+        self.queries.append(query)
+        await asyncio.sleep(self.delay)
+        return {"answer": self.answer, "results": []}
+
+
+def test_async_search_returns_answer(monkeypatch):
+    fake = FakeAsyncTavily()
+    monkeypatch.setattr(main, "get_tavily_client", lambda api_key=None, use_async=False: fake)
+    assert asyncio.run(main.webSearchAsync("who won the final")) == "Spain won the final."
+    assert fake.queries == ["who won the final"]
+
+
+def test_async_search_times_out_without_blocking(monkeypatch):
+    fake = FakeAsyncTavily(delay=5)
+    monkeypatch.setattr(main, "get_tavily_client", lambda api_key=None, use_async=False: fake)
+
+    async def run():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        tick_task = asyncio.create_task(ticker())
+        text = await main.webSearchAsync("latest news", timeout=0.1)
+        tick_task.cancel()
+        return text, ticks
+
+    text, ticks = asyncio.run(run())
+    assert "taking too long" in text
+    assert ticks >= 5  # the event loop kept running while the search was pending
+
+
+def test_tavily_clients_are_cached_per_key(monkeypatch):
+    monkeypatch.setattr(main, "TAVILY_CLIENT_CACHE_SIZE", 2)
+    main._tavily_clients.clear()
+    first = main.get_tavily_client("key-a", use_async=True)
+    assert main.get_tavily_client("key-a", use_async=True) is first
+    main.get_tavily_client("key-b", use_async=True)
+    main.get_tavily_client("key-c", use_async=True)
+    assert len(main._tavily_clients) == 2
+    assert main.get_tavily_client("key-a", use_async=True) is not first
+    main._tavily_clients.clear()
+
+
+def test_normalized_queries_share_cached_answer(monkeypatch):
+    fake = FakeAsyncTavily()
+    monkeypatch.setattr(main, "get_tavily_client", lambda api_key=None, use_async=False: fake)
+
+    async def run():
+        first = await main.webSearchAsync("Who won the match today?")
+        second = await main.webSearchAsync("who won the match today")
+        return first, second
+
+    assert asyncio.run(run()) == ("Spain won the final.", "Spain won the final.")
+    assert len(fake.queries) == 1
+    assert main.web_search_cache.stats()["hits"] == 1
+
+
+def test_volatile_queries_get_short_ttl():
+    assert main.normalize_search_query("What's the price of bitcoin?") == "price bitcoin"
+    assert main.search_cache_ttl("price bitcoin") == main.WEB_SEARCH_VOLATILE_TTL
+    assert main.search_cache_ttl("history rome") == main.WEB_SEARCH_CACHE_TTL
+
+
+def test_failed_searches_are_not_cached(monkeypatch):
+    fake = FakeAsyncTavily(delay=5)
+    monkeypatch.setattr(main, "get_tavily_client", lambda api_key=None, use_async=False: fake)
+    asyncio.run(main.webSearchAsync("latest news", timeout=0.05))
+    assert len(main.web_search_cache) == 0
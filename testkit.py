@@ -0,0 +1,221 @@
+"""
+Fakes and reference data shared by the test_*.py files and the bench_*.py scripts (no network access needed)
+"""
+
+import asyncio
+import base64
+import json
+import re
+import struct
+import threading
+
+import assemblyai.streaming.v3 as aai_v3
+import websockets
+
+from main import WEATHER_KEYWORDS, WEATHER_PATTERNS, Intent
+
+
+# --- Browser ---
+class RecordingWebSocket:
+    """Browser socket stand-in; JSON messages are decoded so tests can look at their fields."""
+
+    def __init__(self):
+        self.sent = []
+
+    async def send_text(self, text):
+        self.sent.append(json.loads(text) if text.startswith("{") else text)
+
+
+def wav_bytes(pcm: bytes, sample_rate=24000, channels=1, bits=16) -> bytes:
+    fmt = struct.pack("<HHIIHH", 1, channels, sample_rate, sample_rate * channels * bits // 8, channels * bits // 8, bits)
+    body = b"WAVE" + b"fmt " + struct.pack("<I", len(fmt)) + fmt + b"data" + struct.pack("<I", len(pcm)) + pcm
+    return b"RIFF" + struct.pack("<I", len(body)) + body
+
+
+# --- Upstreams ---
+class FakeChunk:
+    """One chunk of a streamed Gemini response."""
+
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeStreamingClient:
+    """Stands in for assemblyai.streaming.v3.StreamingClient; handlers run on a separate thread."""
+
+    instances = []
+
+    def __init__(self, options):
+        self.handlers = {}
+        self.streamed = 0
+        FakeStreamingClient.instances.append(self)
+
+    def on(self, event, handler):
+        self.handlers[event] = handler
+
+    def connect(self, params):
+        pass
+
+    def stream(self, data):
+        self.streamed += 1
+
+    def disconnect(self, terminate=False):
+        pass
+
+    def fire_end_of_turn(self, text, order, end_of_turn=True):
+        event = aai_v3.TurnEvent(
+            type="Turn", turn_order=order, turn_is_formatted=end_of_turn, end_of_turn=end_of_turn,
+            transcript=text, end_of_turn_confidence=1.0 if end_of_turn else 0.0, words=[],
+        )
+        threading.Thread(target=self.handlers[aai_v3.StreamingEvents.Turn], args=(self, event)).start()
+
+
+class FakeMurfServer:
+    """Speaks just enough of Murf's stream-input protocol: audio per text message, final after end."""
+
+    def __init__(self, handshake_delay: float = 0.0, synthesis_delay: float = 0.0):
+        self.handshake_delay = handshake_delay
+        self.synthesis_delay = synthesis_delay
+        self.connections = 0
+        self.drop_on_text = 0  # close the socket instead of answering the next N text messages
+        self.cleared = []
+        self._server = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.sockets[0].getsockname()[:2]
+        return f"ws://{host}:{port}"
+
+    async def _process_request(self, connection, request):
+        await asyncio.sleep(self.handshake_delay)
+
+    async def _handler(self, ws):
+        self.connections += 1
+        try:
+            await self._serve(ws)
+        except websockets.ConnectionClosed:
+            pass
+
+    async def _serve(self, ws):
+        pending = []
+        async for raw in ws:
+            data = json.loads(raw)
+            context_id = data.get("context_id")
+            if data.get("clear"):
+                self.cleared.append(context_id)
+            if data.get("text"):
+                if self.drop_on_text:
+                    self.drop_on_text -= 1
+                    await ws.close()
+                    return
+                pending.append(asyncio.create_task(self._synthesize(ws, data["text"], context_id)))
+            if data.get("end"):
+                await asyncio.gather(*pending, return_exceptions=True)
+                pending.clear()
+                await ws.send(json.dumps({"final": True, "context_id": context_id}))
+
+    async def _synthesize(self, ws, text: str, context_id: str):
+        await asyncio.sleep(self.synthesis_delay)
+        if context_id not in self.cleared:
+            audio = base64.b64encode(text.encode()).decode()
+            try:
+                await ws.send(json.dumps({"audio": audio, "context_id": context_id}))
+            except websockets.ConnectionClosed:
+                pass
+
+    async def __aenter__(self):
+        self._server = await websockets.serve(self._handler, "127.0.0.1", 0, process_request=self._process_request)
+        return self
+
+    async def __aexit__(self, *exc):
+        self._server.close()
+        await self._server.wait_closed()
+
+
+# --- Intent router ---
+CORPUS = [
+    # Weather (from test_weather.py)
+    "What's the weather in Paris?",
+    "How hot is it in London?",
+    "Tell me about the temperature in Tokyo",
+    "What's the forecast for New York?",
+    "Weather in Berlin",
+    "Temperature in Sydney",
+    # Weather, other phrasings
+    "whats the weather like in san francisco",
+    "what is the weather like at the beach",
+    "how cold is it in moscow right now?",
+    "climate in Dubai",
+    "forecast in Mumbai please",
+    "weather Paris",
+    "is it going to snow tomorrow",
+    "any wind today?",
+    "weather in Paris and Berlin",
+    "humidity levels in Singapore",
+    "what's the temperature for Rome, Italy?",
+    # Web search
+    "who won the match today",
+    "latest news about AI",
+    "what's the price of bitcoin",
+    "how much does an iPhone cost",
+    "release date of the new Zelda game",
+    "India vs Australia score",
+    "champions league final result",
+    "premier league fixtures this weekend",
+    "breaking news in tech",
+    "Best movies of 2025",
+    "who is the winner of the election",
+    # Chat
+    "Hello, how are you today?",
+    "Hello, how are you?",
+    "tell me a joke",
+    "what's your name",
+    "can you help me write a poem about the sea",
+    "I feel a bit down, any advice?",
+    "explain quantum computing simply",
+    "take a photo of the window",
+    "thanks buddy",
+    "",
+]
+
+
+# Legacy implementation (before the router), kept for comparison
+def legacy_is_weather_query(text: str) -> tuple[bool, str | None]:
+    text_lower = text.lower().strip()
+    if not any(keyword in text_lower for keyword in WEATHER_KEYWORDS):
+        return False, None
+    for pattern in WEATHER_PATTERNS:
+        match = re.search(pattern, text_lower, re.IGNORECASE)
+        if match:
+            city_name = re.sub(r'\?|\.|!|,', '', match.group(1).strip()).strip()
+            if city_name:
+                return True, city_name
+    words = text_lower.split()
+    for i, word in enumerate(words):
+        if word in WEATHER_KEYWORDS and i + 1 < len(words):
+            potential_city = words[i + 1]
+            if potential_city not in ['in', 'at', 'for', 'the', 'is', 'like', 'today', 'now']:
+                return True, potential_city
+    return False, None
+
+
+def legacy_is_web_query(text: str) -> bool:
+    t = (text or "").lower()
+    keywords = [
+        "who won", "winner", "latest", "breaking", "news", "today",
+        "price", "prices", "cost", "how much", "release date", "2024", "2025", "2026",
+        "score", "result", "final", "vs ", "schedule", "fixtures",
+    ]
+    is_weather, _ = legacy_is_weather_query(t)
+    if is_weather:
+        return False
+    return any(k in t for k in keywords)
+
+
+def legacy_route(text: str) -> tuple[Intent, str | None]:
+    is_weather, city = legacy_is_weather_query(text)
+    if is_weather and city:
+        return Intent.WEATHER, city
+    if legacy_is_web_query(text):
+        return Intent.WEB_SEARCH, None
+    return Intent.CHAT, None